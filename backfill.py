@@ -0,0 +1,72 @@
+import argparse
+import json
+# Import the logging configuration first: log.py sets up the file and console handlers
+import log  # noqa: F401
+from logging import getLogger
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import configure_pool
+from pipeline_dimensional_data.flow import DimensionalDataFlow
+
+logger = getLogger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill ORDER_DDS: one dimension pass, fact loads per month/quarter in parallel")
+    parser.add_argument("--start_date", required=True, help="Start date in YYYY-MM-DD")
+    parser.add_argument("--end_date", required=True, help="End date in YYYY-MM-DD")
+    parser.add_argument("--granularity", choices=["month", "quarter"], default="month", help="Size of each fact slice")
+    parser.add_argument("--execution_id", required=False, help="Optional execution id")
+    parser.add_argument("--max_workers", type=int, default=config.MAX_WORKERS, help="Max number of fact slices running concurrently")
+    parser.add_argument("--param_mode", choices=["bound", "literal"], default=config.SQL_PARAM_MODE,
+                        help="Send date/execution tokens as bound parameters (plan reuse) or as SQL literals")
+    parser.add_argument("--slice_size", type=int, default=config.FACT_SLICE_SIZE,
+                        help="Within each slice, load facts in OrderID chunks of this size")
+    parser.add_argument("--fact_builder", choices=["single_pass", "two_pass"],
+                        default="single_pass" if config.FACT_SINGLE_PASS else "two_pass",
+                        help="Build FactOrders and fact_error in one pass over staging, or with one script each")
+    parser.add_argument("--resolver", choices=list(config.KEY_RESOLVERS), default=config.KEY_RESOLVER,
+                        help="Resolve fact surrogate keys with SQL joins or with in-memory key maps (needs numpy)")
+    parser.add_argument("--refresh_all", action="store_true",
+                        help="Run every dimension script, even when its staging source is unchanged since its last refresh")
+    parser.add_argument("--pool_size", type=int, default=config.POOL_SIZE, help="Max number of pooled SQL Server connections")
+    parser.add_argument("--report_file", required=False, help="Also write the backfill report to this JSON file")
+    parser.add_argument("--resume", action="store_true",
+                        help="Only rerun the dimension tasks and slices that did not succeed for --execution_id")
+    args = parser.parse_args()
+    if args.resume and not args.execution_id:
+        parser.error("--resume needs the --execution_id of the backfill to resume")
+    return args
+
+def main():
+    args = parse_args()
+    pool = configure_pool(size=max(args.pool_size, args.max_workers))
+    # Always a full load (flow.backfill rejects incremental slices)
+    flow = DimensionalDataFlow(
+        execution_id=args.execution_id,
+        pool=pool,
+        max_workers=args.max_workers,
+        param_mode=args.param_mode,
+        load_mode="full",
+        slice_size=args.slice_size,
+        single_pass=args.fact_builder == "single_pass",
+        resolver=args.resolver,
+        skip_unchanged=not args.refresh_all,
+    )
+    logger.info(f"Starting backfill execution_id={flow.execution_id} start_date={args.start_date} end_date={args.end_date} granularity={args.granularity}")
+    try:
+        report = flow.backfill(args.start_date, args.end_date, args.granularity, resume=args.resume)
+    finally:
+        pool.close()
+
+    if args.report_file:
+        with open(args.report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    logger.info(f"Backfill finished: {len(report['slices'])} slices, failed: {report['failed_slices']}")
+    if not report["success"]:
+        logger.error("Backfill completed with failures.")
+        raise SystemExit(1)
+    logger.info("Backfill completed successfully.")
+    return report
+
+if __name__ == "__main__":
+    main()
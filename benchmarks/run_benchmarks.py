@@ -0,0 +1,293 @@
+"""
+Benchmark suite: times the pipeline stages on synthetic data at several scale factors and
+compares the timings with a stored baseline.
+
+    python -m benchmarks.run_benchmarks --scales 1 10 100 --churn 0.05
+    python -m benchmarks.run_benchmarks --scales 1 10 --save_baseline
+    python -m benchmarks.run_benchmarks --scales 1 10 100 1000 --server   # also the real tasks
+
+Stand-in stages (sqlite3, always available):
+    generate, churn        building the synthetic sheets and their SCD changes
+    workbook_write         writing them as a raw_data_source.xlsx-shaped workbook (openpyxl)
+    workbook_parse         the loader's parse + clean of that workbook (load_excel_to_staging deps)
+    staging_insert         the loader's batched inserts (staging_bulk_load) into sqlite staging tables
+    key_maps_load          loading the dimension key maps of the python resolver (numpy)
+    fact_resolve           resolving and writing every order line with key_resolver.build_facts (numpy)
+With --server, the workbook is also loaded with load_excel_to_staging and the flow runs against
+the SQL Server of sql_server_config.cfg, adding one "task:<name>" stage per task. That
+database's staging and dimensional tables are overwritten: never point it at production.
+
+A stage counts as a regression when it is more than --tolerance slower than the baseline and
+at least --min_seconds slower in absolute terms (tiny stages are mostly noise).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from benchmarks.synthetic_data import ORDER_DATES, SHEET_COLUMNS, apply_churn, generate, write_workbook
+from staging_bulk_load import BatchSizeTuner, insert_batches
+
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_SCALES = (1, 10)
+DEFAULT_CHURN = 0.05
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_SECONDS = 0.05
+
+
+def _as_text(value):
+    """Staging text of a workbook value, as the loader writes it."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _timed(results: Dict[str, Any], stage: str, fn, rows_of=None):
+    started = time.perf_counter()
+    value = fn()
+    seconds = time.perf_counter() - started
+    entry = {"seconds": round(seconds, 4)}
+    rows = rows_of(value) if rows_of else None
+    if rows is not None:
+        entry["rows"] = rows
+        entry["rows_per_sec"] = round(rows / seconds) if seconds > 0 else None
+    results[stage] = entry
+    return value
+
+
+def _stand_in_database() -> sqlite3.Connection:
+    sqlite3.register_adapter(Decimal, str)
+    sqlite3.register_adapter(date, date.isoformat)
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    for schema in ("dbo", "staging"):
+        conn.execute(f"ATTACH DATABASE ':memory:' AS {schema}")
+    for sheet, columns in SHEET_COLUMNS.items():
+        extra = ", OrderDate_dt" if sheet == "Orders" else ""
+        conn.execute(f"CREATE TABLE staging.{sheet} (staging_raw_id_sk INTEGER PRIMARY KEY, {', '.join(columns)}{extra})")
+    return conn
+
+
+def _insert_staging(conn, data) -> int:
+    cursor = conn.cursor()
+    total = 0
+    for sheet, rows in data.items():
+        stats = insert_batches(cursor, f"staging.{sheet}", list(SHEET_COLUMNS[sheet]),
+                               ([_as_text(v) for v in row] for row in rows), backend="executemany", tuner=BatchSizeTuner())
+        total += stats["rows"]
+    cursor.execute("UPDATE staging.Orders SET OrderDate_dt = OrderDate")
+    conn.commit()
+    return total
+
+
+def _build_dimensions(conn, base, churned):
+    """Stand-in dimension tables: churned customers and products get a second SCD2 version."""
+    switch = "1997-06-01"
+    conn.executescript("""
+        CREATE TABLE dbo.DimCustomers (Customer_SK INTEGER PRIMARY KEY, CustomerID_nk, effective_start_dt, effective_end_dt);
+        CREATE TABLE dbo.DimProducts (Product_SK INTEGER PRIMARY KEY, ProductID_nk, effective_start_dt, effective_end_dt, is_deleted);
+        CREATE TABLE dbo.DimEmployees (Employee_SK INTEGER PRIMARY KEY, EmployeeID_nk, is_deleted);
+        CREATE TABLE dbo.DimShippers (Shipper_SK INTEGER PRIMARY KEY, ShipperID_nk);
+        CREATE TABLE dbo.DimTerritories (Territory_SK INTEGER PRIMARY KEY, TerritoryID_nk);
+    """)
+    for table, sheet, tail in (("DimCustomers", "Customers", ()), ("DimProducts", "Products", (0,))):
+        nk = SHEET_COLUMNS[sheet][0]
+        rows = []
+        for old, new in zip(base[sheet], churned[sheet]):
+            if old == new:
+                rows.append((str(old[0]), "1900-01-01", "9999-12-31") + tail)
+            else:
+                rows.append((str(old[0]), "1900-01-01", "1997-05-31") + tail)
+                rows.append((str(old[0]), switch, "9999-12-31") + tail)
+        marks = ", ".join("?" * (3 + len(tail)))
+        conn.executemany(f"INSERT INTO dbo.{table} ({nk}_nk, effective_start_dt, effective_end_dt"
+                         f"{', is_deleted' if tail else ''}) VALUES ({marks})", rows)
+    conn.executemany("INSERT INTO dbo.DimEmployees (EmployeeID_nk, is_deleted) VALUES (?, 0)",
+                     [(str(r[0]),) for r in churned["Employees"]])
+    conn.executemany("INSERT INTO dbo.DimShippers (ShipperID_nk) VALUES (?)", [(str(r[0]),) for r in churned["Shippers"]])
+    conn.executemany("INSERT INTO dbo.DimTerritories (TerritoryID_nk) VALUES (?)", [(str(r[0]),) for r in churned["Territories"]])
+    conn.executescript("""
+        CREATE TABLE dbo.FactOrders (snapshot_dt, OrderID_nk, ProductID_nk, Customer_SK, Employee_SK, Shipper_SK,
+                                     Territory_SK, Product_SK, OrderDate, RequiredDate, ShippedDate,
+                                     Quantity, UnitPrice, Discount, Freight);
+        CREATE INDEX dbo.IX_FactOrders_grain ON FactOrders (snapshot_dt, OrderID_nk, ProductID_nk);
+        CREATE TABLE dbo.fact_error (snapshot_dt, OrderID_nk, ProductID_nk, Orders_staging_raw_id_nk,
+                                     OrderDetails_staging_raw_id_nk, CustomerID_nk, EmployeeID_nk, ShipperID_nk,
+                                     TerritoryID_nk, OrderDate, RequiredDate, ShippedDate,
+                                     Quantity, UnitPrice, Discount, Freight, error_reason);
+    """)
+    conn.commit()
+
+
+def _fact_stages(results, conn):
+    from pipeline_dimensional_data import key_resolver
+    from pipeline_dimensional_data.connection_pool import ConnectionPool
+
+    if not key_resolver.resolver_available():
+        results["key_maps_load"] = results["fact_resolve"] = {"skipped": "numpy not installed"}
+        return
+    cache = key_resolver.KeyMapCache()
+    _timed(results, "key_maps_load", lambda: cache.get(conn.cursor()))
+    pool = ConnectionPool(factory=lambda _: conn, size=1, conn_str="stand-in", health_check_sql=None)
+    first, last = ORDER_DATES
+
+    def resolve():
+        res = key_resolver.build_facts(first.isoformat(), last.isoformat(), "benchmark", pool=pool,
+                                       key_maps=cache, backend="executemany")
+        if not res["success"]:
+            raise RuntimeError(res["error"])
+        return res
+
+    _timed(results, "fact_resolve", resolve, lambda res: res["lines"])
+
+
+def _server_stages(results, workbook_path):
+    """Load the workbook into the configured SQL Server and run the flow, one stage per task."""
+    from load_excel_to_staging import load_excel_to_staging
+    from pipeline_dimensional_data.connection_pool import configure_pool
+    from pipeline_dimensional_data.flow import DimensionalDataFlow
+
+    _timed(results, "load_excel_to_staging", lambda: load_excel_to_staging(workbook_path))
+    pool = configure_pool()
+    try:
+        flow = DimensionalDataFlow(pool=pool, metrics_file=None)
+        first, last = ORDER_DATES
+        run = flow.exec(first.isoformat(), last.isoformat())
+    finally:
+        pool.close()
+    for task_name, res in run["tasks"].items():
+        metrics = res.get("metrics", {})
+        results[f"task:{task_name}"] = {"seconds": round(metrics.get("wall_seconds", 0.0), 4),
+                                        "rows": metrics.get("rows_affected"), "success": bool(res.get("success"))}
+
+
+def run_scale(scale: int, churn: float, seed: int = 0, server: bool = False) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    base = _timed(results, "generate", lambda: generate(scale, seed), lambda d: sum(len(r) for r in d.values()))
+    data, _ = _timed(results, "churn", lambda: apply_churn(base, churn, seed + 1), lambda d: sum(d[1].values()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook_path = os.path.join(tmp, f"synthetic_x{scale}.xlsx")
+        try:
+            _timed(results, "workbook_write", lambda: write_workbook(data, workbook_path))
+        except ImportError as e:
+            results["workbook_write"] = {"skipped": str(e)}
+            workbook_path = None
+        try:
+            from load_excel_to_staging import iter_clean_sheets
+        except ImportError as e:
+            results["workbook_parse"] = {"skipped": str(e)}
+        else:
+            if workbook_path:
+                _timed(results, "workbook_parse", lambda: [df for _, df in iter_clean_sheets(workbook_path)],
+                       lambda frames: sum(len(df) for df in frames))
+
+        conn = _stand_in_database()
+        _timed(results, "staging_insert", lambda: _insert_staging(conn, data), lambda rows: rows)
+        _build_dimensions(conn, base, data)
+        _fact_stages(results, conn)
+        conn.close()
+
+        if server:
+            if workbook_path is None:
+                raise RuntimeError("--server needs openpyxl to write the workbook")
+            _server_stages(results, workbook_path)
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE,
+            min_seconds: float = DEFAULT_MIN_SECONDS) -> List[str]:
+    """Stages of `current` that are slower than in `baseline` beyond the tolerance."""
+    regressions = []
+    for scale, stages in current["results"].items():
+        for stage, entry in stages.items():
+            before = baseline.get("results", {}).get(scale, {}).get(stage, {})
+            if "seconds" not in entry or "seconds" not in before:
+                continue
+            delta = entry["seconds"] - before["seconds"]
+            if entry["seconds"] > before["seconds"] * (1 + tolerance) and delta >= min_seconds:
+                regressions.append(f"x{scale} {stage}: {before['seconds']:.3f}s -> {entry['seconds']:.3f}s "
+                                   f"(+{delta / before['seconds']:.0%})")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic Northwind-shaped data")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="Scale factors relative to raw_data_source.xlsx (e.g. 1 10 100 1000)")
+    parser.add_argument("--churn", type=float, default=DEFAULT_CHURN, help="Fraction of dimension rows changed (SCD churn)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the generator")
+    parser.add_argument("--server", action="store_true",
+                        help="Also load and run the real tasks against the configured SQL Server (overwrites its tables)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON to compare against")
+    parser.add_argument("--save_baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before a regression")
+    parser.add_argument("--min_seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help="Ignore slowdowns smaller than this many seconds")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "churn": args.churn,
+            "seed": args.seed,
+            "server": args.server,
+        },
+        "results": {},
+    }
+    for scale in args.scales:
+        print(f"⏱️ Scale x{scale}...")
+        results = run_scale(scale, args.churn, args.seed, args.server)
+        report["results"][str(scale)] = results
+        for stage, entry in results.items():
+            if "skipped" in entry:
+                print(f"   - {stage}: skipped ({entry['skipped']})")
+            else:
+                rate = f", {entry['rows_per_sec']:,} rows/sec" if entry.get("rows_per_sec") else ""
+                print(f"   ✔ {stage}: {entry['seconds']:.3f}s{rate}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return report
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print("\n❌ Regressions against the baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            raise SystemExit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+    else:
+        print(f"\nℹ️ No baseline at {args.baseline}; run with --save_baseline to create one")
+    return report
+
+
+if __name__ == "__main__":
+    main()
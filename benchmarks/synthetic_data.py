@@ -0,0 +1,177 @@
+"""
+Synthetic Northwind-shaped data for the benchmarks.
+
+generate(scale) returns every sheet of raw_data_source.xlsx as {sheet: [row tuples]} with the
+workbook's own columns and value types (ints, floats, datetimes, text), so the rows can be
+written to a workbook for the loader or inserted straight into staging tables.
+
+Scale 1 matches the sample workbook (830 orders, ~2,150 order lines). Customers, Employees,
+Suppliers, Products and Orders grow with the scale factor; the reference dimensions
+(Categories, Region, Shippers, Territories) keep their size, as they do in practice.
+apply_churn() then changes a fraction of the dimension rows to simulate SCD activity
+between two loads.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+SHEET_COLUMNS = {
+    "Categories": ("CategoryID", "CategoryName", "Description"),
+    "Customers": ("CustomerID", "CompanyName", "ContactName", "ContactTitle", "Address", "City", "Region",
+                  "PostalCode", "Country", "Phone", "Fax"),
+    "Employees": ("EmployeeID", "LastName", "FirstName", "Title", "TitleOfCourtesy", "BirthDate", "HireDate",
+                  "Address", "City", "Region", "PostalCode", "Country", "HomePhone", "Extension", "Notes",
+                  "ReportsTo", "PhotoPath"),
+    "OrderDetails": ("OrderID", "ProductID", "UnitPrice", "Quantity", "Discount"),
+    "Orders": ("OrderID", "CustomerID", "EmployeeID", "OrderDate", "RequiredDate", "ShippedDate", "ShipVia",
+               "Freight", "ShipName", "ShipAddress", "ShipCity", "ShipRegion", "ShipPostalCode", "ShipCountry",
+               "TerritoryID"),
+    "Products": ("ProductID", "ProductName", "SupplierID", "CategoryID", "QuantityPerUnit", "UnitPrice",
+                 "UnitsInStock", "UnitsOnOrder", "ReorderLevel", "Discontinued"),
+    "Region": ("RegionID", "RegionDescription", "RegionCategory", "RegionImportance"),
+    "Shippers": ("ShipperID", "CompanyName", "Phone"),
+    "Suppliers": ("SupplierID", "CompanyName", "ContactName", "ContactTitle", "Address", "City", "Region",
+                  "PostalCode", "Country", "Phone", "Fax", "HomePage"),
+    "Territories": ("TerritoryID", "TerritoryDescription", "TerritoryCode", "RegionID"),
+}
+
+# Rows per sheet at scale 1 (the sample workbook); OrderDetails follows from Orders
+BASE_ROWS = {
+    "Categories": 8, "Customers": 91, "Employees": 9, "Shippers": 3, "Suppliers": 29,
+    "Region": 4, "Territories": 53, "Products": 77, "Orders": 830,
+}
+SCALED_SHEETS = ("Customers", "Employees", "Suppliers", "Products", "Orders")
+
+# Column changed by apply_churn, per sheet (the natural key never changes)
+CHURN_COLUMNS = {
+    "Categories": "Description", "Customers": "Address", "Employees": "Title", "Products": "UnitPrice",
+    "Region": "RegionImportance", "Shippers": "Phone", "Suppliers": "Phone", "Territories": "TerritoryDescription",
+}
+
+FIRST_ORDER_ID = 10248
+ORDER_DATES = (date(1996, 7, 4), date(1998, 5, 6))
+
+_COUNTRIES = ("Germany", "Mexico", "UK", "Sweden", "France", "Spain", "Canada", "Argentina", "Switzerland",
+              "Brazil", "Austria", "Italy", "Portugal", "USA", "Venezuela", "Ireland", "Belgium", "Norway",
+              "Denmark", "Finland", "Poland")
+_TITLES = ("Sales Representative", "Owner", "Marketing Manager", "Order Administrator", "Accounting Manager",
+           "Sales Agent", "Sales Associate", "Purchasing Manager")
+
+
+def _customer_id(i: int) -> str:
+    """Five-letter customer code (AAAAA, AAAAB, ...), like the Northwind ids."""
+    letters = []
+    for _ in range(5):
+        i, r = divmod(i, 26)
+        letters.append(chr(ord("A") + r))
+    return "".join(reversed(letters))
+
+
+def _rows_at(sheet: str, scale: int) -> int:
+    return BASE_ROWS[sheet] * scale if sheet in SCALED_SHEETS else BASE_ROWS[sheet]
+
+
+def generate(scale: int = 1, seed: int = 0) -> Dict[str, List[tuple]]:
+    """All sheets at `scale` times the sample workbook's volume (deterministic for a seed)."""
+    if scale < 1:
+        raise ValueError(f"scale must be >= 1, got {scale}")
+    rnd = random.Random(seed)
+    data: Dict[str, List[tuple]] = {}
+
+    data["Categories"] = [(i, f"Category {i}", f"Products of category {i}") for i in range(1, 9)]
+    data["Region"] = [(i, name, tier, importance) for i, (name, tier, importance) in enumerate(
+        (("Eastern", "Gold", "High"), ("Western", "Silver", "Medium"),
+         ("Northern", "Bronze", "Low"), ("Southern", "Silver", "Medium")), start=1)]
+    data["Shippers"] = [(i, f"Shipper {i}", f"(503) 555-{9830 + i:04d}") for i in range(1, 4)]
+    data["Territories"] = [(f"{1581 + i * 37:05d}", f"Territory {i}", f"T{i % 100:02d}", i % 4 + 1)
+                           for i in range(BASE_ROWS["Territories"])]
+
+    data["Customers"] = [
+        (_customer_id(i), f"Company {i}", f"Contact {i}", rnd.choice(_TITLES), f"{rnd.randint(1, 999)} Main St.",
+         f"City {i % 500}", None, f"{rnd.randint(10000, 99999)}", rnd.choice(_COUNTRIES),
+         f"(5) 555-{rnd.randint(0, 9999):04d}", None)
+        for i in range(_rows_at("Customers", scale))
+    ]
+    n_employees = _rows_at("Employees", scale)
+    data["Employees"] = [
+        (i, f"Last{i}", f"First{i}", rnd.choice(_TITLES), rnd.choice(("Ms.", "Mr.", "Dr.", "Mrs.")),
+         datetime(1950 + i % 20, i % 12 + 1, i % 28 + 1), datetime(1992 + i % 3, i % 12 + 1, 1),
+         f"{i} Employee Way", "Seattle", "WA", "98122", "USA", f"(206) 555-{i % 10000:04d}", str(1000 + i % 9000),
+         f"Notes for employee {i}.", None if i == 1 else rnd.randint(1, max(1, i - 1)), f"http://accweb/emp{i}.bmp")
+        for i in range(1, n_employees + 1)
+    ]
+    n_suppliers = _rows_at("Suppliers", scale)
+    data["Suppliers"] = [
+        (i, f"Supplier {i}", f"Contact {i}", rnd.choice(_TITLES), f"{i} Supply Rd.", f"City {i % 300}", None,
+         f"{rnd.randint(10000, 99999)}", rnd.choice(_COUNTRIES), f"(100) 555-{i % 10000:04d}", None, None)
+        for i in range(1, n_suppliers + 1)
+    ]
+    n_products = _rows_at("Products", scale)
+    data["Products"] = [
+        (i, f"Product {i}", rnd.randint(1, n_suppliers), rnd.randint(1, 8), f"{rnd.randint(1, 48)} units",
+         round(rnd.uniform(2.5, 263.5), 2), rnd.randint(0, 125), rnd.choice((0, 0, 10, 40, 70)),
+         rnd.choice((0, 5, 10, 25)), rnd.random() < 0.1)
+        for i in range(1, n_products + 1)
+    ]
+
+    first, last = ORDER_DATES
+    span = (last - first).days
+    customers = data["Customers"]
+    territories = [t[0] for t in data["Territories"]]
+    orders, lines = [], []
+    for n in range(_rows_at("Orders", scale)):
+        order_id = FIRST_ORDER_ID + n
+        # Orders are spread evenly over the date range, in id order like the sample
+        order_date = datetime.combine(first + timedelta(days=span * n // max(1, _rows_at("Orders", scale) - 1)),
+                                      datetime.min.time())
+        shipped = order_date + timedelta(days=rnd.randint(1, 30)) if rnd.random() < 0.97 else None
+        customer = rnd.choice(customers)
+        orders.append((
+            order_id, customer[0], rnd.randint(1, n_employees), order_date, order_date + timedelta(days=28), shipped,
+            rnd.randint(1, 3), round(rnd.uniform(0.02, 1007.64), 2), customer[1], customer[4], customer[5], None,
+            customer[7], customer[8], rnd.choice(territories),
+        ))
+        for product_id in rnd.sample(range(1, n_products + 1), rnd.choice((1, 2, 2, 3, 3, 4))):
+            lines.append((order_id, product_id, round(rnd.uniform(2.0, 263.5), 2), rnd.randint(1, 120),
+                          rnd.choice((0, 0, 0, 0.05, 0.1, 0.15, 0.2, 0.25))))
+    data["Orders"] = orders
+    data["OrderDetails"] = lines
+    return data
+
+
+def apply_churn(data: Dict[str, List[tuple]], churn: float, seed: int = 1) -> Tuple[Dict[str, List[tuple]], Dict[str, int]]:
+    """
+    A copy of `data` where a `churn` fraction of every dimension sheet's rows has one attribute
+    changed (CHURN_COLUMNS). Returns the new data and the changed row count per sheet.
+    """
+    if not 0 <= churn <= 1:
+        raise ValueError(f"churn must be between 0 and 1, got {churn}")
+    rnd = random.Random(seed)
+    changed_data = dict(data)
+    changed = {}
+    for sheet, column in CHURN_COLUMNS.items():
+        rows = list(data[sheet])
+        col = SHEET_COLUMNS[sheet].index(column)
+        picked = rnd.sample(range(len(rows)), int(round(len(rows) * churn)))
+        for i in picked:
+            row = list(rows[i])
+            value = row[col]
+            row[col] = round(value * 1.1, 2) if isinstance(value, float) else f"{value} (rev)"
+            rows[i] = tuple(row)
+        changed_data[sheet] = rows
+        changed[sheet] = len(picked)
+    return changed_data, changed
+
+
+def write_workbook(data: Dict[str, List[tuple]], path: str):
+    """Write the sheets as an .xlsx workbook shaped like raw_data_source.xlsx (needs openpyxl)."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet, rows in data.items():
+        worksheet = workbook.create_sheet(sheet)
+        worksheet.append(SHEET_COLUMNS[sheet])
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
@@ -0,0 +1,181 @@
+"""
+Catalog metadata cache: column names, types, lengths, nullability and primary keys of every
+staging table, read with two catalog queries and kept for a TTL.
+
+The loader reads CatalogCache once per run (instead of asking the ODBC catalog per table) and
+uses it to
+    - bind sized parameters (TableInfo.input_sizes -> cursor.setinputsizes), so the driver does
+      not rebind when a batch holds a longer value than the first row; every writable staging
+      column is NVARCHAR today, so non-text types are only bound if the DDL introduces them,
+    - drop columns the table does not have and reject over-long values before anything is sent.
+
+Only a DB-API cursor is needed. The catalog queries are SQL Server's (sys.*); tests can pass
+their own `loader`.
+"""
+
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+
+CATALOG_SCHEMAS = ("staging",)
+CATALOG_TTL_SECONDS = 600
+
+# ODBC SQL type codes for setinputsizes (the values of the pyodbc.SQL_* constants)
+SQL_CHAR, SQL_VARCHAR, SQL_WCHAR, SQL_WVARCHAR = 1, 12, -8, -9
+SQL_INTEGER, SQL_BIGINT, SQL_SMALLINT, SQL_TINYINT, SQL_BIT = 4, -5, 5, -6, -7
+SQL_DECIMAL, SQL_NUMERIC, SQL_FLOAT, SQL_REAL = 3, 2, 6, 7
+SQL_TYPE_DATE, SQL_TYPE_TIME, SQL_TYPE_TIMESTAMP = 91, 92, 93
+
+TEXT_TYPES = {"nvarchar": SQL_WVARCHAR, "nchar": SQL_WCHAR, "varchar": SQL_VARCHAR, "char": SQL_CHAR}
+INTEGER_TYPES = {"int": (SQL_INTEGER, 10), "bigint": (SQL_BIGINT, 19), "smallint": (SQL_SMALLINT, 5),
+                 "tinyint": (SQL_TINYINT, 3), "bit": (SQL_BIT, 1)}
+DECIMAL_TYPES = {"decimal": SQL_DECIMAL, "numeric": SQL_NUMERIC, "money": SQL_DECIMAL, "smallmoney": SQL_DECIMAL}
+FLOAT_TYPES = {"float": (SQL_FLOAT, 53), "real": (SQL_REAL, 24)}
+DATE_TYPES = {"date": (SQL_TYPE_DATE, 10), "time": (SQL_TYPE_TIME, 16), "datetime": (SQL_TYPE_TIMESTAMP, 23),
+              "smalldatetime": (SQL_TYPE_TIMESTAMP, 16), "datetime2": (SQL_TYPE_TIMESTAMP, 27)}
+
+_COLUMNS_QUERY = """
+SELECT s.name, t.name, c.name, ty.name, c.max_length, c.precision, c.scale,
+       c.is_nullable, c.is_identity, c.is_computed
+FROM sys.columns AS c
+JOIN sys.tables AS t ON t.object_id = c.object_id
+JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+JOIN sys.types AS ty ON ty.user_type_id = c.user_type_id
+WHERE s.name IN ({schemas})
+ORDER BY s.name, t.name, c.column_id
+"""
+
+_PRIMARY_KEYS_QUERY = """
+SELECT s.name, t.name, c.name
+FROM sys.indexes AS i
+JOIN sys.index_columns AS ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+JOIN sys.columns AS c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+JOIN sys.tables AS t ON t.object_id = i.object_id
+JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+WHERE i.is_primary_key = 1 AND s.name IN ({schemas})
+ORDER BY s.name, t.name, ic.key_ordinal
+"""
+
+
+class Column(NamedTuple):
+    name: str
+    type_name: str
+    # In characters for text columns; None for (N)VARCHAR(MAX) and types without a length
+    max_length: Optional[int] = None
+    precision: int = 0
+    scale: int = 0
+    nullable: bool = True
+    generated: bool = False  # identity or computed: never written by an INSERT
+
+    @property
+    def is_text(self) -> bool:
+        return self.type_name in TEXT_TYPES
+
+    def input_size(self) -> Tuple[int, int, int]:
+        """(sql_type, column_size, decimal_digits) for cursor.setinputsizes."""
+        if self.type_name in TEXT_TYPES:
+            # Size 0 binds a MAX column
+            return TEXT_TYPES[self.type_name], self.max_length or 0, 0
+        if self.type_name in INTEGER_TYPES:
+            sql_type, size = INTEGER_TYPES[self.type_name]
+            return sql_type, size, 0
+        if self.type_name in DECIMAL_TYPES:
+            return DECIMAL_TYPES[self.type_name], self.precision, self.scale
+        if self.type_name in FLOAT_TYPES:
+            sql_type, size = FLOAT_TYPES[self.type_name]
+            return sql_type, size, 0
+        if self.type_name in DATE_TYPES:
+            sql_type, size = DATE_TYPES[self.type_name]
+            return sql_type, size, self.scale if self.type_name == "datetime2" else 0
+        # Anything else (uniqueidentifier, varbinary, ...) is bound as wide text
+        return SQL_WVARCHAR, 0, 0
+
+
+class TableInfo(NamedTuple):
+    schema: str
+    name: str
+    columns: Tuple[Column, ...]
+    primary_key: Tuple[str, ...] = ()
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+    def column(self, name: str) -> Optional[Column]:
+        return next((c for c in self.columns if c.name.lower() == name.lower()), None)
+
+    def writable_columns(self) -> list:
+        return [c.name for c in self.columns if not c.generated]
+
+    def unknown_columns(self, names) -> list:
+        """The names that are not writable columns of this table."""
+        writable = {c.lower() for c in self.writable_columns()}
+        return [name for name in names if name.lower() not in writable]
+
+    def input_sizes(self, names) -> list:
+        return [self.column(name).input_size() for name in names]
+
+
+def load_catalog(cursor, schemas=CATALOG_SCHEMAS):
+    """{"schema.table": TableInfo} for every table of `schemas`, from two catalog queries."""
+    markers = ", ".join("?" * len(schemas))
+    columns = {}
+    cursor.execute(_COLUMNS_QUERY.format(schemas=markers), tuple(schemas))
+    for schema, table, name, type_name, max_length, precision, scale, nullable, identity, computed in cursor.fetchall():
+        type_name = type_name.lower()
+        if max_length == -1 or type_name not in TEXT_TYPES:
+            length = None
+        else:
+            # sys.columns counts bytes: two per character for the N types
+            length = max_length // 2 if type_name.startswith("n") else max_length
+        column = Column(name, type_name, length, precision, scale, bool(nullable), bool(identity or computed))
+        columns.setdefault((schema, table), []).append(column)
+
+    keys = {}
+    cursor.execute(_PRIMARY_KEYS_QUERY.format(schemas=markers), tuple(schemas))
+    for schema, table, name in cursor.fetchall():
+        keys.setdefault((schema, table), []).append(name)
+
+    return {
+        f"{schema}.{table}": TableInfo(schema, table, tuple(cols), tuple(keys.get((schema, table), ())))
+        for (schema, table), cols in columns.items()
+    }
+
+
+class CatalogCache:
+    """Thread-safe cache of load_catalog(), reloaded once older than `ttl` seconds."""
+
+    def __init__(self, ttl=CATALOG_TTL_SECONDS, schemas=CATALOG_SCHEMAS, loader=load_catalog, clock=time.monotonic):
+        self.ttl = ttl
+        self.schemas = schemas
+        self._loader = loader
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tables = None
+        self._loaded_at = None
+        self.loads = 0
+
+    def _fresh(self, cursor):
+        with self._lock:
+            if self._tables is None or self._clock() - self._loaded_at > self.ttl:
+                self._tables = {name.lower(): info for name, info in self._loader(cursor, self.schemas).items()}
+                self._loaded_at = self._clock()
+                self.loads += 1
+            return self._tables
+
+    def table(self, cursor, qualified_name) -> Optional[TableInfo]:
+        """Metadata of "schema.table" (None if the catalog has no such table); `cursor` is only used to (re)load."""
+        return self._fresh(cursor).get(qualified_name.lower())
+
+    def columns(self, cursor, qualified_name) -> list:
+        info = self.table(cursor, qualified_name)
+        return [c.name for c in info.columns] if info else []
+
+    def primary_key(self, cursor, qualified_name) -> list:
+        info = self.table(cursor, qualified_name)
+        return list(info.primary_key) if info else []
+
+    def invalidate(self):
+        """Forget the cached catalog, e.g. after DDL; the next lookup reloads it."""
+        with self._lock:
+            self._tables = None
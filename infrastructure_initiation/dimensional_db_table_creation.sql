@@ -11,6 +11,10 @@ GO
    DROP (dev-friendly reruns)
    ========================= */
 DROP TABLE IF EXISTS dbo.FactOrders;
+DROP TABLE IF EXISTS dbo.fact_error;
+DROP TABLE IF EXISTS dbo.pipeline_watermark;
+DROP TABLE IF EXISTS dbo.pipeline_fact_progress;
+DROP TABLE IF EXISTS dbo.dim_refresh_state;
 
 DROP TABLE IF EXISTS dbo.DimSuppliers_History;
 
@@ -26,6 +30,12 @@ DROP TABLE IF EXISTS dbo.DimCategories;
 DROP TABLE IF EXISTS dbo.Dim_SOR;
 GO
 
+IF EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_snapshot_dt')
+    DROP PARTITION SCHEME ps_snapshot_dt;
+IF EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_snapshot_dt')
+    DROP PARTITION FUNCTION pf_snapshot_dt;
+GO
+
 /* =========================
    Dim_SOR  (required)
    ========================= */
@@ -57,6 +67,8 @@ GO
 /* ==========================================================
    DIMENSIONS (GROUP 3)
    Each dimension includes: SOR_SK + staging_raw_id_nk
+   (staging_raw_id_nk: the staging row of the member's last change; the SCD scripts only
+   set it when the row_hash changed, so reloading unchanged rows rewrites nothing)
    ========================================================== */
 
 -- DimCategories (SCD1 with delete)
@@ -108,6 +120,12 @@ ON dbo.DimCustomers(CustomerID_nk)
 WHERE is_current = 1;
 GO
 
+-- Fact lookup: version valid at OrderDate (seek on NK, range on the validity dates)
+CREATE INDEX IX_DimCustomers_nk_effective
+ON dbo.DimCustomers(CustomerID_nk, effective_start_dt, effective_end_dt)
+INCLUDE (Customer_SK);
+GO
+
 -- DimEmployees (SCD1 with delete)
 CREATE TABLE dbo.DimEmployees (
     Employee_SK INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
@@ -171,6 +189,12 @@ ON dbo.DimProducts(ProductID_nk)
 WHERE is_current = 1;
 GO
 
+-- Fact lookup: version valid at OrderDate (seek on NK, range on the validity dates)
+CREATE INDEX IX_DimProducts_nk_effective
+ON dbo.DimProducts(ProductID_nk, effective_start_dt, effective_end_dt)
+INCLUDE (Product_SK, is_deleted);
+GO
+
 -- DimRegion (SCD1)
 CREATE TABLE dbo.DimRegion (
     Region_SK INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
@@ -270,12 +294,29 @@ CREATE TABLE dbo.DimTerritories (
 GO
 
 
+/* =========================
+   SNAPSHOT PARTITIONING
+   One partition per snapshot_dt for FactOrders and fact_error (RANGE RIGHT: a boundary is
+   the first day of its partition). The snapshot_retention task splits the next day's
+   boundary ahead of its load, truncates the partitions of expired snapshots and merges
+   their boundaries away.
+   ========================= */
+DECLARE @first_snapshot DATE = CAST(SYSDATETIME() AS DATE);
+CREATE PARTITION FUNCTION pf_snapshot_dt (DATE)
+AS RANGE RIGHT FOR VALUES (@first_snapshot);
+GO
+
+CREATE PARTITION SCHEME ps_snapshot_dt
+AS PARTITION pf_snapshot_dt ALL TO ([PRIMARY]);
+GO
+
+
 /* =========================
    FACT (GROUP 3)
    FactOrders SNAPSHOT
    ========================= */
 CREATE TABLE dbo.FactOrders (
-    FactOrders_SK BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    FactOrders_SK BIGINT IDENTITY(1,1) NOT NULL,
 
     -- snapshot grain control (your pipeline will load per [start_date,end_date])
     snapshot_dt DATE NOT NULL,
@@ -300,13 +341,17 @@ CREATE TABLE dbo.FactOrders (
     Quantity  INT NULL,
     UnitPrice DECIMAL(18,2) NULL,
     Discount  DECIMAL(5,4) NULL,
-    Freight   DECIMAL(18,2) NULL
-);
+    Freight   DECIMAL(18,2) NULL,
+
+    -- partition-aligned: the partitioning column leads the clustered key
+    CONSTRAINT PK_FactOrders PRIMARY KEY CLUSTERED (snapshot_dt, FactOrders_SK)
+) ON ps_snapshot_dt(snapshot_dt);
 GO
 
--- recommended uniqueness per snapshot
+-- recommended uniqueness per snapshot (aligned, so partitions can be truncated)
 CREATE UNIQUE INDEX UX_FactOrders_Snapshot_Grain
-ON dbo.FactOrders(snapshot_dt, OrderID_nk, ProductID_nk);
+ON dbo.FactOrders(snapshot_dt, OrderID_nk, ProductID_nk)
+ON ps_snapshot_dt(snapshot_dt);
 GO
 
 
@@ -318,7 +363,7 @@ IF OBJECT_ID('dbo.fact_error','U') IS NOT NULL
 GO
 
 CREATE TABLE dbo.fact_error (
-    fact_error_sk BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    fact_error_sk BIGINT IDENTITY(1,1) NOT NULL,
     snapshot_dt  DATE NOT NULL,
     OrderID_nk   INT  NOT NULL,
     ProductID_nk INT  NOT NULL,
@@ -342,10 +387,71 @@ CREATE TABLE dbo.fact_error (
     Freight       DECIMAL(18,2) NULL,
 
     error_reason NVARCHAR(4000) NOT NULL,
-    created_dt   DATETIME2(0) NOT NULL DEFAULT SYSDATETIME()
-);
+    created_dt   DATETIME2(0) NOT NULL DEFAULT SYSDATETIME(),
+
+    CONSTRAINT PK_fact_error PRIMARY KEY CLUSTERED (snapshot_dt, fact_error_sk)
+) ON ps_snapshot_dt(snapshot_dt);
 GO
 
 CREATE UNIQUE INDEX UX_fact_error_grain
-ON dbo.fact_error(snapshot_dt, OrderID_nk, ProductID_nk);
+ON dbo.fact_error(snapshot_dt, OrderID_nk, ProductID_nk)
+ON ps_snapshot_dt(snapshot_dt);
+GO
+
+
+/* =========================
+   PIPELINE WATERMARKS
+   Last staging row processed by each incremental consumer per date window
+   (main.py --mode incremental) and the snapshot that run wrote; kept by tasks.run_sql_script
+   ========================= */
+CREATE TABLE dbo.pipeline_watermark (
+    consumer     NVARCHAR(128) NOT NULL,   -- task that reads the source (fact_orders, fact_error)
+    source_table NVARCHAR(128) NOT NULL,   -- staging.Orders / staging.OrderDetails
+    start_date   DATE NOT NULL,            -- window of the runs that share this watermark
+    end_date     DATE NOT NULL,
+    last_staging_raw_id_sk INT NOT NULL,
+    last_snapshot_dt DATE NULL,            -- FactOrders/fact_error snapshot the run wrote: the next
+                                           -- incremental run of the window carries forward from it
+    last_execution_id NVARCHAR(100) NULL,
+    updated_dt DATETIME2(0) NOT NULL CONSTRAINT DF_pipeline_watermark_updated DEFAULT(SYSDATETIME()),
+
+    CONSTRAINT PK_pipeline_watermark PRIMARY KEY (consumer, source_table, start_date, end_date)
+);
+GO
+
+/* =========================
+   FACT SLICE PROGRESS
+   Completed OrderID slices of an unfinished chunked fact load (main.py --slice_size);
+   cleared when the final slice of the window commits
+   ========================= */
+CREATE TABLE dbo.pipeline_fact_progress (
+    consumer     NVARCHAR(128) NOT NULL,   -- fact_orders / fact_error
+    start_date   DATE NOT NULL,
+    end_date     DATE NOT NULL,
+    load_mode    NVARCHAR(20) NOT NULL,
+    slice_lo     INT NOT NULL,
+    slice_hi     INT NOT NULL,
+    hw_orders        INT NOT NULL,         -- staging high-water marks fixed by the first slice
+    hw_order_details INT NOT NULL,
+    execution_id NVARCHAR(100) NULL,
+    completed_dt DATETIME2(0) NOT NULL CONSTRAINT DF_pipeline_fact_progress_completed DEFAULT(SYSDATETIME()),
+
+    CONSTRAINT PK_pipeline_fact_progress PRIMARY KEY (consumer, start_date, end_date, load_mode, slice_lo)
+);
+GO
+
+/* =========================
+   DIMENSION REFRESH STATE
+   Source fingerprint (staging.table_fingerprint) and script checksum of each dimension's
+   last successful refresh; an unchanged dimension is skipped by its task
+   ========================= */
+CREATE TABLE dbo.dim_refresh_state (
+    dimension        NVARCHAR(128) NOT NULL PRIMARY KEY,   -- task name: dim_categories, ...
+    source_table     NVARCHAR(128) NOT NULL,
+    row_count        BIGINT NOT NULL,
+    content_checksum BIGINT NOT NULL,
+    script_checksum  CHAR(64) NOT NULL,                    -- SHA-256 of the SCD script text
+    last_execution_id NVARCHAR(100) NULL,
+    refreshed_dt DATETIME2(0) NOT NULL CONSTRAINT DF_dim_refresh_state_refreshed DEFAULT(SYSDATETIME())
+);
 GO
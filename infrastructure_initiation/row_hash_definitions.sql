@@ -0,0 +1,199 @@
+USE ORDER_DDS;
+GO
+
+/* infrastructure_initiation/row_hash_definitions.sql
+   Row hashes for dimension change detection.
+
+   dbo.row_hash_set / dbo.row_hash_column list, per dimension, the tracked attributes and
+   how to normalize them. dbo.usp_apply_row_hash turns that definition into a persisted
+   computed column row_hash on both the staging table and the dimension, so the SCD
+   scripts detect a change with one comparison: d.row_hash <> s.row_hash.
+
+   Both sides hash the same canonical text whatever their column types
+   (staging N'18.0' and DECIMAL 18.00 hash equal); NULL hashes as a sentinel distinct from N''.
+   Run after staging_raw_table_creation.sql and dimensional_db_table_creation.sql,
+   and again whenever either of them is re-run.
+*/
+
+DROP PROCEDURE IF EXISTS dbo.usp_apply_row_hash;
+DROP TABLE IF EXISTS dbo.row_hash_column;
+DROP TABLE IF EXISTS dbo.row_hash_set;
+GO
+
+CREATE TABLE dbo.row_hash_set (
+    hash_set      NVARCHAR(128) NOT NULL PRIMARY KEY,
+    staging_table NVARCHAR(256) NOT NULL,
+    dim_table     NVARCHAR(256) NOT NULL,
+    dim_key       NVARCHAR(128) NOT NULL,   -- natural key column of the dimension
+    dim_filter    NVARCHAR(200) NULL        -- rows compared against staging (SCD2: current version)
+);
+
+CREATE TABLE dbo.row_hash_column (
+    hash_set       NVARCHAR(128) NOT NULL REFERENCES dbo.row_hash_set(hash_set),
+    ordinal        INT NOT NULL,
+    staging_column NVARCHAR(128) NOT NULL,
+    dim_column     NVARCHAR(128) NOT NULL,
+    normalize_as   NVARCHAR(10) NOT NULL
+        CONSTRAINT CK_row_hash_column_normalize CHECK (normalize_as IN (N'text', N'number', N'bit', N'date')),
+
+    CONSTRAINT PK_row_hash_column PRIMARY KEY (hash_set, ordinal)
+);
+GO
+
+INSERT INTO dbo.row_hash_set (hash_set, staging_table, dim_table, dim_key, dim_filter)
+VALUES
+    (N'Categories',  N'staging.Categories',  N'dbo.DimCategories',  N'CategoryID_nk',  NULL),
+    (N'Customers',   N'staging.Customers',   N'dbo.DimCustomers',   N'CustomerID_nk',  N'is_current = 1'),
+    (N'Employees',   N'staging.Employees',   N'dbo.DimEmployees',   N'EmployeeID_nk',  NULL),
+    (N'Products',    N'staging.Products',    N'dbo.DimProducts',    N'ProductID_nk',   N'is_current = 1'),
+    (N'Region',      N'staging.Region',      N'dbo.DimRegion',      N'RegionID_nk',    NULL),
+    (N'Shippers',    N'staging.Shippers',    N'dbo.DimShippers',    N'ShipperID_nk',   NULL),
+    (N'Suppliers',   N'staging.Suppliers',   N'dbo.DimSuppliers',   N'SupplierID_nk',  NULL),
+    (N'Territories', N'staging.Territories', N'dbo.DimTerritories', N'TerritoryID_nk', NULL);
+
+INSERT INTO dbo.row_hash_column (hash_set, ordinal, staging_column, dim_column, normalize_as)
+VALUES
+    (N'Categories', 1, N'CategoryName', N'CategoryName', N'text'),
+    (N'Categories', 2, N'Description',  N'Description',  N'text'),
+
+    (N'Customers',  1, N'CompanyName',  N'CompanyName',  N'text'),
+    (N'Customers',  2, N'ContactName',  N'ContactName',  N'text'),
+    (N'Customers',  3, N'ContactTitle', N'ContactTitle', N'text'),
+    (N'Customers',  4, N'Address',      N'Address',      N'text'),
+    (N'Customers',  5, N'City',         N'City',         N'text'),
+    (N'Customers',  6, N'Region',       N'Region',       N'text'),
+    (N'Customers',  7, N'PostalCode',   N'PostalCode',   N'text'),
+    (N'Customers',  8, N'Country',      N'Country',      N'text'),
+    (N'Customers',  9, N'Phone',        N'Phone',        N'text'),
+    (N'Customers', 10, N'Fax',          N'Fax',          N'text'),
+
+    (N'Employees',  1, N'LastName',        N'LastName',                N'text'),
+    (N'Employees',  2, N'FirstName',       N'FirstName',               N'text'),
+    (N'Employees',  3, N'Title',           N'Title',                   N'text'),
+    (N'Employees',  4, N'TitleOfCourtesy', N'TitleOfCourtesy',         N'text'),
+    (N'Employees',  5, N'BirthDate',       N'BirthDate',               N'date'),
+    (N'Employees',  6, N'HireDate',        N'HireDate',                N'date'),
+    (N'Employees',  7, N'Address',         N'Address',                 N'text'),
+    (N'Employees',  8, N'City',            N'City',                    N'text'),
+    (N'Employees',  9, N'Region',          N'Region',                  N'text'),
+    (N'Employees', 10, N'PostalCode',      N'PostalCode',              N'text'),
+    (N'Employees', 11, N'Country',         N'Country',                 N'text'),
+    (N'Employees', 12, N'HomePhone',       N'HomePhone',               N'text'),
+    (N'Employees', 13, N'Extension',       N'Extension',               N'number'),
+    (N'Employees', 14, N'Notes',           N'Notes',                   N'text'),
+    (N'Employees', 15, N'ReportsTo',       N'ReportsTo_EmployeeID_nk', N'number'),
+    (N'Employees', 16, N'PhotoPath',       N'PhotoPath',               N'text'),
+
+    (N'Products',   1, N'ProductName',     N'ProductName',     N'text'),
+    (N'Products',   2, N'SupplierID',      N'SupplierID_nk',   N'number'),
+    (N'Products',   3, N'CategoryID',      N'CategoryID_nk',   N'number'),
+    (N'Products',   4, N'QuantityPerUnit', N'QuantityPerUnit', N'text'),
+    (N'Products',   5, N'UnitPrice',       N'UnitPrice',       N'number'),
+    (N'Products',   6, N'UnitsInStock',    N'UnitsInStock',    N'number'),
+    (N'Products',   7, N'UnitsOnOrder',    N'UnitsOnOrder',    N'number'),
+    (N'Products',   8, N'ReorderLevel',    N'ReorderLevel',    N'number'),
+    (N'Products',   9, N'Discontinued',    N'Discontinued',    N'bit'),
+
+    (N'Region',     1, N'RegionDescription', N'RegionDescription', N'text'),
+    (N'Region',     2, N'RegionCategory',    N'RegionCategory',    N'text'),
+    (N'Region',     3, N'RegionImportance',  N'RegionImportance',  N'text'),
+
+    (N'Shippers',   1, N'CompanyName', N'CompanyName', N'text'),
+    (N'Shippers',   2, N'Phone',       N'Phone',       N'text'),
+
+    (N'Suppliers',  1, N'CompanyName',  N'CompanyName',  N'text'),
+    (N'Suppliers',  2, N'ContactName',  N'ContactName',  N'text'),
+    (N'Suppliers',  3, N'ContactTitle', N'ContactTitle', N'text'),
+    (N'Suppliers',  4, N'Address',      N'Address',      N'text'),
+    (N'Suppliers',  5, N'City',         N'City',         N'text'),
+    (N'Suppliers',  6, N'Region',       N'Region',       N'text'),
+    (N'Suppliers',  7, N'PostalCode',   N'PostalCode',   N'text'),
+    (N'Suppliers',  8, N'Country',      N'Country',      N'text'),
+    (N'Suppliers',  9, N'Phone',        N'Phone',        N'text'),
+    (N'Suppliers', 10, N'Fax',          N'Fax',          N'text'),
+    (N'Suppliers', 11, N'HomePage',     N'HomePage',     N'text'),
+
+    (N'Territories', 1, N'RegionID',             N'RegionID_nk',                  N'number'),
+    (N'Territories', 2, N'TerritoryCode',        N'TerritoryCode',                N'text'),
+    (N'Territories', 3, N'TerritoryDescription', N'TerritoryDescription_Current', N'text');
+GO
+
+CREATE PROCEDURE dbo.usp_apply_row_hash
+    @hash_set NVARCHAR(128)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @staging_table NVARCHAR(256), @dim_table NVARCHAR(256), @dim_key NVARCHAR(128), @dim_filter NVARCHAR(200);
+    SELECT @staging_table = staging_table, @dim_table = dim_table, @dim_key = dim_key, @dim_filter = dim_filter
+    FROM dbo.row_hash_set
+    WHERE hash_set = @hash_set;
+
+    IF @staging_table IS NULL
+        THROW 50010, 'Unknown row hash set (see dbo.row_hash_set)', 1;
+
+    DECLARE @side NVARCHAR(10) = N'staging';
+    DECLARE @table NVARCHAR(256), @expr NVARCHAR(MAX), @sql NVARCHAR(MAX);
+    DECLARE @index NVARCHAR(256) = N'IX_' + PARSENAME(@dim_table, 1) + N'_row_hash';
+
+    WHILE @side IS NOT NULL
+    BEGIN
+        SET @table = CASE @side WHEN N'staging' THEN @staging_table ELSE @dim_table END;
+
+        -- Typed normalization: both sides reduce each attribute to the same canonical text.
+        -- A blank staging value is NULL, as the update_dim_* scripts store it (NULLIF(s.X, '')).
+        -- Every expression is deterministic, so the column can be PERSISTED.
+        SELECT @expr = STRING_AGG(CAST(
+            N'ISNULL(' +
+            CASE c.normalize_as
+                WHEN N'number' THEN N'CONVERT(NVARCHAR(40), TRY_CONVERT(DECIMAL(19,4), ' + col.ref + N'))'
+                WHEN N'bit'    THEN N'CONVERT(NVARCHAR(1), TRY_CONVERT(BIT, ' + col.ref + N'))'
+                WHEN N'date'   THEN N'CONVERT(NVARCHAR(10), TRY_CONVERT(DATE, ' + col.ref + N', 23), 23)'
+                ELSE                N'RTRIM(CONVERT(NVARCHAR(MAX), ' + col.ref + N'))'
+            END +
+            N', NCHAR(0))' AS NVARCHAR(MAX)), N', ') WITHIN GROUP (ORDER BY c.ordinal)
+        FROM dbo.row_hash_column c
+        CROSS APPLY (SELECT CASE @side WHEN N'staging' THEN c.staging_column ELSE c.dim_column END AS name) col_name
+        CROSS APPLY (SELECT CASE WHEN @side = N'staging' AND c.normalize_as <> N'text'
+                                 THEN N'NULLIF(' + QUOTENAME(col_name.name) + N', N'''')'
+                                 ELSE QUOTENAME(col_name.name) END AS ref) col
+        WHERE c.hash_set = @hash_set;
+
+        IF @side = N'dim'
+        BEGIN
+            SET @sql = N'DROP INDEX IF EXISTS ' + QUOTENAME(@index) + N' ON ' + @table + N';';
+            EXEC sp_executesql @sql;
+        END;
+
+        IF COL_LENGTH(@table, 'row_hash') IS NOT NULL
+        BEGIN
+            SET @sql = N'ALTER TABLE ' + @table + N' DROP COLUMN row_hash;';
+            EXEC sp_executesql @sql;
+        END;
+
+        SET @sql = N'ALTER TABLE ' + @table + N' ADD row_hash AS '
+                 + N'CAST(HASHBYTES(''SHA2_256'', CONCAT_WS(NCHAR(31), ' + @expr + N')) AS BINARY(32)) PERSISTED;';
+        EXEC sp_executesql @sql;
+
+        SET @side = CASE @side WHEN N'staging' THEN N'dim' END;
+    END;
+
+    -- Change detection probes the dimension by natural key and reads only the hash
+    SET @sql = N'CREATE INDEX ' + QUOTENAME(@index) + N' ON ' + @dim_table + N'(' + QUOTENAME(@dim_key) + N') INCLUDE (row_hash)'
+             + ISNULL(N' WHERE ' + @dim_filter, N'') + N';';
+    EXEC sp_executesql @sql;
+END;
+GO
+
+DECLARE @hash_set NVARCHAR(128);
+DECLARE sets CURSOR LOCAL FAST_FORWARD FOR SELECT hash_set FROM dbo.row_hash_set;
+OPEN sets;
+FETCH NEXT FROM sets INTO @hash_set;
+WHILE @@FETCH_STATUS = 0
+BEGIN
+    EXEC dbo.usp_apply_row_hash @hash_set;
+    FETCH NEXT FROM sets INTO @hash_set;
+END;
+CLOSE sets;
+DEALLOCATE sets;
+GO
@@ -19,6 +19,8 @@ DROP TABLE IF EXISTS staging.Suppliers;
 DROP TABLE IF EXISTS staging.Territories;
 DROP TABLE IF EXISTS staging.Region;
 DROP TABLE IF EXISTS staging.Categories;
+DROP TABLE IF EXISTS staging.row_fingerprint;
+DROP TABLE IF EXISTS staging.table_fingerprint;
 GO
 
 /* =========================
@@ -138,7 +140,11 @@ CREATE TABLE staging.Orders (
     ShipRegion NVARCHAR(100) NULL,
     ShipPostalCode NVARCHAR(20) NULL,
     ShipCountry NVARCHAR(100) NULL,
-    TerritoryID NVARCHAR(100) NULL              -- FK to Territories.TerritoryID (per project spec)
+    TerritoryID NVARCHAR(100) NULL,             -- FK to Territories.TerritoryID (per project spec)
+
+    -- Typed, indexable order date for the fact scripts' date window (the loader writes yyyy-mm-dd).
+    -- Computed: the loader and the staging.Orders_tvp type never carry it.
+    OrderDate_dt AS TRY_CONVERT(DATE, NULLIF(OrderDate, N''), 23) PERSISTED
 );
 
 CREATE TABLE staging.OrderDetails (
@@ -151,3 +157,37 @@ CREATE TABLE staging.OrderDetails (
 );
 GO
 
+/* =========================
+   SECONDARY INDEXES
+   IX_Orders_OrderDate_dt, IX_Orders_OrderID and IX_OrderDetails_OrderID are not created
+   here: load_excel_to_staging.py drops them before a full load and rebuilds them after it
+   (see STAGING_INDEXES there).
+   ========================= */
+
+/* =========================
+   ROW FINGERPRINTS
+   (content hash per source row, used by load_excel_to_staging.py --incremental)
+   ========================= */
+
+CREATE TABLE staging.row_fingerprint (
+    table_name NVARCHAR(128) NOT NULL,
+    natural_key NVARCHAR(400) NOT NULL,
+    row_hash BIGINT NOT NULL,
+    CONSTRAINT PK_row_fingerprint PRIMARY KEY (table_name, natural_key)
+);
+GO
+
+/* =========================
+   TABLE FINGERPRINTS
+   (row count + summed row_hash checksum per staging table, written by load_excel_to_staging.py
+   after every load; a dimension task whose source fingerprint matches dbo.dim_refresh_state
+   is skipped)
+   ========================= */
+
+CREATE TABLE staging.table_fingerprint (
+    table_name NVARCHAR(128) NOT NULL PRIMARY KEY,   -- staging.Categories, ...
+    row_count BIGINT NOT NULL,
+    content_checksum BIGINT NOT NULL,
+    loaded_dt DATETIME2(0) NOT NULL CONSTRAINT DF_table_fingerprint_loaded DEFAULT(SYSDATETIME())
+);
+GO
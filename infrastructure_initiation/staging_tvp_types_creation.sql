@@ -0,0 +1,136 @@
+USE ORDER_DDS;
+GO
+
+/* infrastructure_initiation/staging_tvp_types_creation.sql
+   Table types used by the loader's "tvp" bulk-load backend
+   (load_excel_to_staging.py --backend tvp): one staging.<Table>_tvp per staging
+   table, same columns without the staging_raw_id_sk identity and computed columns.
+   Run after staging_raw_table_creation.sql.
+*/
+
+DROP TYPE IF EXISTS staging.OrderDetails_tvp;
+DROP TYPE IF EXISTS staging.Orders_tvp;
+DROP TYPE IF EXISTS staging.Products_tvp;
+DROP TYPE IF EXISTS staging.Territories_tvp;
+DROP TYPE IF EXISTS staging.Region_tvp;
+DROP TYPE IF EXISTS staging.Suppliers_tvp;
+DROP TYPE IF EXISTS staging.Shippers_tvp;
+DROP TYPE IF EXISTS staging.Employees_tvp;
+DROP TYPE IF EXISTS staging.Customers_tvp;
+DROP TYPE IF EXISTS staging.Categories_tvp;
+GO
+
+CREATE TYPE staging.Categories_tvp AS TABLE (
+    CategoryID NVARCHAR(100) NOT NULL,
+    CategoryName NVARCHAR(50) NULL,
+    Description NVARCHAR(500) NULL
+);
+
+CREATE TYPE staging.Customers_tvp AS TABLE (
+    CustomerID NVARCHAR(10) NOT NULL,
+    CompanyName NVARCHAR(100) NULL,
+    ContactName NVARCHAR(100) NULL,
+    ContactTitle NVARCHAR(100) NULL,
+    Address NVARCHAR(200) NULL,
+    City NVARCHAR(100) NULL,
+    Region NVARCHAR(100) NULL,
+    PostalCode NVARCHAR(20) NULL,
+    Country NVARCHAR(100) NULL,
+    Phone NVARCHAR(50) NULL,
+    Fax NVARCHAR(50) NULL
+);
+
+CREATE TYPE staging.Employees_tvp AS TABLE (
+    EmployeeID NVARCHAR(100) NOT NULL,
+    LastName NVARCHAR(50) NULL,
+    FirstName NVARCHAR(50) NULL,
+    Title NVARCHAR(100) NULL,
+    TitleOfCourtesy NVARCHAR(20) NULL,
+    BirthDate NVARCHAR(100) NULL,
+    HireDate NVARCHAR(100) NULL,
+    Address NVARCHAR(200) NULL,
+    City NVARCHAR(100) NULL,
+    Region NVARCHAR(100) NULL,
+    PostalCode NVARCHAR(20) NULL,
+    Country NVARCHAR(100) NULL,
+    HomePhone NVARCHAR(50) NULL,
+    Extension NVARCHAR(100) NULL,
+    Notes NVARCHAR(MAX) NULL,
+    ReportsTo NVARCHAR(100) NULL,
+    PhotoPath NVARCHAR(300) NULL
+);
+
+CREATE TYPE staging.Shippers_tvp AS TABLE (
+    ShipperID NVARCHAR(100) NOT NULL,
+    CompanyName NVARCHAR(200) NULL,
+    Phone NVARCHAR(50) NULL
+);
+
+CREATE TYPE staging.Suppliers_tvp AS TABLE (
+    SupplierID NVARCHAR(100) NOT NULL,
+    CompanyName NVARCHAR(200) NULL,
+    ContactName NVARCHAR(200) NULL,
+    ContactTitle NVARCHAR(200) NULL,
+    Address NVARCHAR(200) NULL,
+    City NVARCHAR(100) NULL,
+    Region NVARCHAR(100) NULL,
+    PostalCode NVARCHAR(20) NULL,
+    Country NVARCHAR(100) NULL,
+    Phone NVARCHAR(50) NULL,
+    Fax NVARCHAR(50) NULL,
+    HomePage NVARCHAR(500) NULL
+);
+
+CREATE TYPE staging.Region_tvp AS TABLE (
+    RegionID NVARCHAR(100) NOT NULL,
+    RegionDescription NVARCHAR(100) NULL,
+    RegionCategory NVARCHAR(50) NULL,
+    RegionImportance NVARCHAR(50) NULL
+);
+
+CREATE TYPE staging.Territories_tvp AS TABLE (
+    TerritoryID NVARCHAR(100) NOT NULL,
+    TerritoryDescription NVARCHAR(200) NULL,
+    TerritoryCode NVARCHAR(20) NULL,
+    RegionID NVARCHAR(100) NULL
+);
+
+CREATE TYPE staging.Products_tvp AS TABLE (
+    ProductID NVARCHAR(100) NOT NULL,
+    ProductName NVARCHAR(200) NULL,
+    SupplierID NVARCHAR(100) NULL,
+    CategoryID NVARCHAR(100) NULL,
+    QuantityPerUnit NVARCHAR(100) NULL,
+    UnitPrice NVARCHAR(100) NULL,
+    UnitsInStock NVARCHAR(100) NULL,
+    UnitsOnOrder NVARCHAR(100) NULL,
+    ReorderLevel NVARCHAR(100) NULL,
+    Discontinued NVARCHAR(100) NULL
+);
+
+CREATE TYPE staging.Orders_tvp AS TABLE (
+    OrderID NVARCHAR(100) NOT NULL,
+    CustomerID NVARCHAR(10) NOT NULL,
+    EmployeeID NVARCHAR(100) NOT NULL,
+    OrderDate NVARCHAR(100) NULL,
+    RequiredDate NVARCHAR(100) NULL,
+    ShippedDate NVARCHAR(100) NULL,
+    ShipVia NVARCHAR(100) NULL,
+    Freight NVARCHAR(100) NULL,
+    ShipName NVARCHAR(200) NULL,
+    ShipAddress NVARCHAR(200) NULL,
+    ShipCity NVARCHAR(100) NULL,
+    ShipRegion NVARCHAR(100) NULL,
+    ShipPostalCode NVARCHAR(20) NULL,
+    ShipCountry NVARCHAR(100) NULL,
+    TerritoryID NVARCHAR(100) NULL
+);
+
+CREATE TYPE staging.OrderDetails_tvp AS TABLE (
+    OrderID NVARCHAR(100) NOT NULL,
+    ProductID NVARCHAR(100) NOT NULL,
+    UnitPrice NVARCHAR(100) NULL,
+    Quantity NVARCHAR(100) NULL,
+    Discount NVARCHAR(100) NULL
+);
+GO
@@ -1,8 +1,36 @@
 import argparse
+import openpyxl
+import numpy as np
 import pandas as pd
 import pyodbc
 import os
 import re
+import time
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from catalog_cache import DATE_TYPES, DECIMAL_TYPES, FLOAT_TYPES, CatalogCache
+from pipeline_dimensional_data.config import PROFILE_DIR
+from pipeline_dimensional_data.connection_pool import ConnectionPool
+from pipeline_dimensional_data.telemetry import profiled
+from staging_bulk_load import (
+    BACKENDS, DEFAULT_BACKEND, DEFAULT_BATCH_SIZE, BatchSizeTuner, insert_batches,
+)
+from staging_sources import StagingSource, excel_frame
+from staging_workbook_cache import (
+    cache_available, cache_entry_dir, cached_sheet_names, finalize_entry, read_sheet, write_sheet,
+)
+
+# Rows read, cleaned and inserted at a time in streaming mode
+CHUNK_SIZE = 10000
+
+# Every table a full workbook/directory load replaces; both the sequential and the parallel
+# load clear these up front, so a sheet missing here would be appended to on each reload
+STAGING_TABLES = [
+    "Orders", "OrderDetails", "Products", "Categories", "Customers",
+    "Employees", "Region", "Shippers", "Suppliers", "Territories"
+]
 
 # ----------------------------
 # SQL SERVER CONNECTION
@@ -21,34 +49,118 @@ def get_connection():
 # CLEANING FUNCTIONS
 # ----------------------------
 
+# Bump whenever the cleaning output changes: it is part of the parsed-workbook cache key
+CLEANING_RULES_VERSION = 4
+
+# Columns dropped before loading (long text the staging load does not need)
+DROP_COLUMNS = ["Notes", "PhotoPath"]
+
+DATE_COLUMNS = ["OrderDate", "RequiredDate", "ShippedDate",
+                "BirthDate", "HireDate"]
+
+# Low-cardinality text: cleaned once per distinct value and kept as categoricals
+CATEGORICAL_COLUMNS = ["Country", "City", "Region", "ShipCountry", "ShipCity",
+                       "ShipRegion", "Title", "TitleOfCourtesy", "ContactTitle"]
+
+DATE_PLACEHOLDERS = ["", "0", "0000-00-00", "NaT"]
+TEXT_PLACEHOLDERS = ["nan", "None"]
+
+
+def _float_to_text(series):
+    """Render floats like str() but without the ".0" tail of integral values; NaN becomes ""."""
+    out = pd.Series("", index=series.index, dtype=object)
+    present = series.notna()
+    integral = present & (series % 1 == 0) & (series.abs() < 2 ** 53)
+    out[integral] = series[integral].astype("int64").astype(str)
+    other = present & ~integral
+    out[other] = series[other].astype(str)
+    return out
+
+
+def clean_text_column(series):
+    """
+    Column-wise text normalization: missing values and "nan"/"None" become "",
+    float tails are removed from numeric values ("5.0" → "5"), everything else is str().
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return series.astype(str)
+    if pd.api.types.is_float_dtype(series):
+        return _float_to_text(series)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype(str).where(series.notna(), "")
+
+    values = series.astype(object)
+    missing = values.isna()
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        out = values.where(~missing, "")
+    else:
+        # Mixed cells (typical for hand-edited sheets): only the float cells need tail handling
+        out = values.astype(str)
+        is_float = values.map(lambda v: isinstance(v, float)) & ~missing
+        if is_float.any():
+            out[is_float] = _float_to_text(values[is_float].astype(float))
+        out[missing] = ""
+    return out.mask(out.isin(TEXT_PLACEHOLDERS), "")
+
+
+def clean_categorical_column(series):
+    """Clean each distinct value once and return a categorical column."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    categories = clean_text_column(pd.Series(uniques, dtype=object))
+    # Distinct raw values can clean to the same text, so re-factorize the cleaned categories
+    labels = pd.Series(list(categories) + [""]).take(codes).reset_index(drop=True)
+    return pd.Series(pd.Categorical(labels), index=series.index)
+
+
+def clean_date_column(series):
+    """
+    Vectorized clean_date(): every value becomes yyyy-mm-dd or "".
+    datetime64 columns are formatted directly; text takes an ISO fast path and only
+    the remaining values go through pd.to_datetime (format inferred per column).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d").where(series.notna(), "")
+
+    text = clean_text_column(series).str.strip()
+    out = pd.Series("", index=series.index, dtype=object)
+
+    # ISO dates, or ISO timestamps as produced by str(datetime)
+    iso = text.str.match(r"^\d{4}-\d{2}-\d{2}(?:$|[ T])")
+    out[iso] = text[iso].str.slice(0, 10)
+
+    rest = ~iso & ~text.isin(DATE_PLACEHOLDERS)
+    if rest.any():
+        parsed = pd.to_datetime(text[rest], errors="coerce")
+        unparsed = parsed.isna()
+        if unparsed.any():
+            # Values in a different format than the one inferred from the column
+            try:
+                parsed[unparsed] = pd.to_datetime(text[rest][unparsed], errors="coerce", format="mixed")
+            except (TypeError, ValueError):
+                parsed[unparsed] = text[rest][unparsed].map(lambda v: pd.to_datetime(v, errors="coerce"))
+        out[rest] = parsed.dt.strftime("%Y-%m-%d").where(parsed.notna(), "")
+    return out
+
+
 def clean_dataframe(df):
     """
     Force all columns to text, drop problematic columns, clean .0 floats,
-    clean dates, remove NaN.
+    clean dates, remove NaN. Works column by column, never cell by cell.
     """
 
-    # Convert everything to string
-    df = df.astype(str)
+    # Drop long-text columns first so they are never cleaned
+    df = df.drop(columns=DROP_COLUMNS, errors="ignore")
 
-    # Replace NaN/"nan"/"None" values with empty string
-    df = df.replace("nan", "").replace("None", "").fillna("")
-
-    # Remove pandas float tails:  "5.0" → "5"
+    cleaned = {}
     for col in df.columns:
-        df[col] = df[col].str.replace(r"\.0$", "", regex=True)
-
-    # Drop long-text columns
-    df = df.drop(columns=["Notes", "PhotoPath"], errors="ignore")
+        if col in DATE_COLUMNS:
+            cleaned[col] = clean_date_column(df[col])
+        elif col in CATEGORICAL_COLUMNS:
+            cleaned[col] = clean_categorical_column(df[col])
+        else:
+            cleaned[col] = clean_text_column(df[col])
 
-    # Clean date formats (optional)
-    date_cols = ["OrderDate", "RequiredDate", "ShippedDate", 
-                 "BirthDate", "HireDate"]
-
-    for col in date_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(clean_date)
-
-    return df
+    return pd.DataFrame(cleaned, index=df.index)
 
 
 def clean_date(value):
@@ -77,7 +189,89 @@ def clean_date(value):
 # LOAD A SINGLE SHEET INTO A STAGING TABLE
 # ----------------------------
 
-def load_sheet(cursor, df, sheet_name):
+# Column names, types and lengths of the staging tables, read from the catalog once per run
+CATALOG = CatalogCache()
+
+
+def _parameter_values(parsed, column):
+    """Python values a typed parameter of `column` binds without conversion (None for missing)."""
+    if column.type_name in DATE_TYPES:
+        convert = (lambda v: v.date()) if column.type_name == "date" else (lambda v: v.to_pydatetime())
+    elif column.type_name in DECIMAL_TYPES:
+        convert = lambda v: Decimal(str(v))
+    elif column.type_name in FLOAT_TYPES:
+        convert = float
+    elif column.type_name == "bit":
+        convert = bool
+    else:
+        convert = int
+    return pd.Series([None if pd.isna(v) else convert(v) for v in parsed], index=parsed.index, dtype=object)
+
+
+def conform_to_table(df, table):
+    """
+    Fit a cleaned DataFrame to its table's catalog metadata before anything is sent: columns
+    the table does not have are dropped (with a warning), values of non-text columns become
+    int/float/Decimal/date values, and over-long text or unconvertible values raise a
+    ValueError naming the column instead of failing the bulk insert half-way.
+    """
+    unknown = table.unknown_columns(df.columns)
+    if unknown:
+        print(f"   ⚠️ {table.qualified_name} has no column(s) {', '.join(unknown)} — dropped")
+        df = df.drop(columns=unknown)
+
+    problems = []
+    converted = {}
+    for name in df.columns:
+        column = table.column(name)
+        values = df[name]
+        if column.is_text:
+            if column.max_length:
+                too_long = values.astype(str).str.len() > column.max_length
+                if too_long.any():
+                    problems.append(f"{name}: {int(too_long.sum())} values longer than {column.max_length} "
+                                    f"characters (e.g. {values[too_long].iloc[0]!r})")
+            continue
+        text = values.astype(str).str.strip()
+        missing = values.isna() | text.isin(["", "nan", "None"])
+        if column.type_name in DATE_TYPES:
+            parsed = pd.to_datetime(text.where(~missing), errors="coerce")
+        else:
+            parsed = pd.to_numeric(text.where(~missing), errors="coerce")
+        bad = parsed.isna() & ~missing
+        if bad.any():
+            problems.append(f"{name}: {int(bad.sum())} values are not {column.type_name} (e.g. {values[bad].iloc[0]!r})")
+        else:
+            converted[name] = _parameter_values(parsed, column)
+
+    if problems:
+        raise ValueError(f"Rows do not fit {table.qualified_name}: " + "; ".join(problems))
+    return df.assign(**converted) if converted else df
+
+
+def insert_rows(cursor, df, staging_table, backend=DEFAULT_BACKEND, tuner=None):
+    """INSERT the rows of an already cleaned DataFrame in auto-sized, typed batches; returns the batch stats."""
+    table = CATALOG.table(cursor, staging_table)
+    if table is None:
+        raise ValueError(f"{staging_table} does not exist (run infrastructure_initiation/staging_raw_table_creation.sql)")
+    df = conform_to_table(df, table)
+    if backend == "tvp":
+        # A TVP row must carry every column of the table type, in table order
+        df = df.reindex(columns=table.writable_columns())
+        df = df.astype(object).where(df.notna(), None)
+
+    rows = df.itertuples(index=False, name=None)
+    return insert_batches(cursor, staging_table, list(df.columns), rows, backend=backend, tuner=tuner,
+                          input_sizes=table.input_sizes(df.columns))
+
+
+def _print_load_stats(staging_table, stats):
+    print(f"   ✔ Loaded {stats['rows']} rows into {staging_table} "
+          f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['batches']} batches, "
+          f"final batch size {stats['batch_size']})")
+
+
+def load_sheet(cursor, df, sheet_name, backend=DEFAULT_BACKEND, batch_size=DEFAULT_BATCH_SIZE, cleaned=False):
     staging_table = f"staging.{sheet_name}"
 
     print(f"➡️ Loading sheet '{sheet_name}' into {staging_table}...")
@@ -86,65 +280,554 @@ def load_sheet(cursor, df, sheet_name):
         print(f"⚠️ Sheet '{sheet_name}' is empty — skipping.")
         return
 
-    df = clean_dataframe(df)
+    if not cleaned:
+        df = clean_dataframe(df)
+    stats = insert_rows(cursor, df, staging_table, backend, BatchSizeTuner(batch_size))
+    _print_load_stats(staging_table, stats)
+    return stats
 
-    # Build INSERT SQL dynamically
-    cols = ", ".join(df.columns)
-    placeholders = ", ".join(["?"] * len(df.columns))
-    sql = f"INSERT INTO {staging_table} ({cols}) VALUES ({placeholders})"
 
-    # Convert dataframe rows to list of tuples
-    data = list(df.itertuples(index=False, name=None))
+# ----------------------------
+# PARSED-WORKBOOK CACHE
+# ----------------------------
 
-    try:
-        cursor.executemany(sql, data)
-        print(f"   ✔ Loaded {len(df)} rows into {staging_table}")
-    except Exception as e:
-        print("\n❌ SQL Insert Error!")
-        print("SQL:", sql)
-        print("Sample row:", data[0] if data else "NO DATA")
-        raise e
+def workbook_cache_entry(file_path, use_cache=True):
+    """Cache directory for this workbook, or None when caching is off or pyarrow is missing."""
+    if not use_cache:
+        return None
+    if not cache_available():
+        print("⚠️ pyarrow not installed — parsed-workbook cache disabled.")
+        return None
+    return cache_entry_dir(file_path, CLEANING_RULES_VERSION)
+
+
+def iter_clean_sheets(source, entry=None):
+    """
+    Yield (sheet_name, cleaned DataFrame) for every sheet (or per-table file) of `source`,
+    a StagingSource or the path of one. Only the staging columns are read.
+    With a cache `entry` (see workbook_cache_entry), an unchanged workbook is read
+    from the columnar cache instead of the Excel XML.
+    """
+    sheet_names = cached_sheet_names(entry) if entry else None
+    if sheet_names is not None:
+        print(f"⚡ Workbook unchanged — reading parsed sheets from cache ({entry})")
+        for sheet in sheet_names:
+            yield sheet, read_sheet(entry, sheet)
+        return
+
+    if not isinstance(source, StagingSource):
+        source = StagingSource(source)
+    sheet_names = source.table_names()
+    for sheet in sheet_names:
+        df = clean_dataframe(source.read(sheet, exclude=DROP_COLUMNS))
+        if entry:
+            write_sheet(entry, sheet, df)
+        yield sheet, df
+    if entry:
+        finalize_entry(entry, sheet_names)
 
 
 # ----------------------------
-# MAIN FUNCTION TO LOAD ALL SHEETS
+# STREAMING (CHUNKED) LOAD
 # ----------------------------
 
-def load_excel_to_staging(file_path):
+def iter_sheet_chunks(worksheet, chunk_size=CHUNK_SIZE):
+    """
+    Yield DataFrames of at most `chunk_size` rows from a read-only worksheet, with the
+    values a whole-sheet read gives (see staging_sources.excel_frame).
+    The first row is the header; fully empty rows are skipped.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    keep = [i for i, name in enumerate(header) if name is not None]
+    columns = [str(header[i]) for i in keep]
+
+    buffer = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        buffer.append([row[i] if i < len(row) else None for i in keep])
+        if len(buffer) >= chunk_size:
+            yield excel_frame(columns, buffer)
+            buffer = []
+    if buffer:
+        yield excel_frame(columns, buffer)
+
+
+def load_sheet_streaming(cursor, worksheet, chunk_size=CHUNK_SIZE, backend=DEFAULT_BACKEND, batch_size=DEFAULT_BATCH_SIZE):
+    """Read, clean and insert one sheet chunk by chunk so only one chunk is in memory at a time."""
+    return load_chunks_streaming(cursor, worksheet.title, iter_sheet_chunks(worksheet, chunk_size),
+                                 chunk_size, backend, batch_size)
+
+
+def load_chunks_streaming(cursor, sheet_name, chunks, chunk_size=CHUNK_SIZE, backend=DEFAULT_BACKEND,
+                          batch_size=DEFAULT_BATCH_SIZE):
+    """Clean and insert the DataFrame `chunks` of one sheet (or per-table file) as they are read."""
+    staging_table = f"staging.{sheet_name}"
 
-    if not os.path.exists(file_path):
-        print(f"❌ ERROR: File not found: {file_path}")
+    print(f"➡️ Streaming sheet '{sheet_name}' into {staging_table} (chunks of {chunk_size})...")
+
+    # One tuner per sheet so the batch size keeps improving across chunks
+    tuner = BatchSizeTuner(batch_size)
+    stats = {"rows": 0, "seconds": 0.0, "batches": 0, "batch_size": tuner.batch_size}
+    for chunk in chunks:
+        chunk_stats = insert_rows(cursor, clean_dataframe(chunk), staging_table, backend, tuner)
+        for key in ("rows", "seconds", "batches"):
+            stats[key] += chunk_stats[key]
+        stats["batch_size"] = chunk_stats["batch_size"]
+
+    if stats["rows"] == 0:
+        print(f"⚠️ Sheet '{sheet_name}' is empty — skipping.")
         return
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    _print_load_stats(staging_table, stats)
+    return stats
 
-    print(f"📄 Loading Excel file: {file_path}")
 
-    conn = get_connection()
-    cursor = conn.cursor()
+# ----------------------------
+# INCREMENTAL (ROW-FINGERPRINT) LOAD
+# ----------------------------
 
-    # Clear staging tables
-    staging_tables = [
-        "Orders", "OrderDetails", "Products", "Customers",
-        "Employees", "Region", "Shippers", "Suppliers", "Territories"
-    ]
+# Natural key of every staging table, used to match source rows across loads
+NATURAL_KEYS = {
+    "Categories": ["CategoryID"],
+    "Customers": ["CustomerID"],
+    "Employees": ["EmployeeID"],
+    "OrderDetails": ["OrderID", "ProductID"],
+    "Orders": ["OrderID"],
+    "Products": ["ProductID"],
+    "Region": ["RegionID"],
+    "Shippers": ["ShipperID"],
+    "Suppliers": ["SupplierID"],
+    "Territories": ["TerritoryID"],
+}
 
-    print("🧹 Clearing staging tables...")
-    for table in staging_tables:
-        cursor.execute(f"DELETE FROM staging.{table}")
-        conn.commit()
+FINGERPRINT_TABLE = "staging.row_fingerprint"
+KEY_SEPARATOR = "\x1f"
+
+
+def row_fingerprints(df, key_cols):
+    """Return a DataFrame (natural_key, row_hash) with one 64-bit content hash per cleaned row."""
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + KEY_SEPARATOR + df[col].astype(str)
+    hashes = pd.util.hash_pandas_object(df.astype(object), index=False).values.view(np.int64)
+    return pd.DataFrame({"natural_key": keys.values, "row_hash": hashes})
 
-    # Load Excel with all sheets
-    excel_file = pd.ExcelFile(file_path)
 
-    for sheet in excel_file.sheet_names:
-        df = excel_file.parse(sheet)
-        load_sheet(cursor, df, sheet)
+def _stored_fingerprints(cursor, sheet_name):
+    cursor.execute(f"SELECT natural_key, row_hash FROM {FINGERPRINT_TABLE} WHERE table_name = ?", (sheet_name,))
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=["natural_key", "row_hash"])
 
-    conn.commit()
-    conn.close()
 
-    print("\n✅ Excel data loaded successfully!")
+# Session temp table the stale natural keys are joined through
+STALE_KEYS_TABLE = "#stale_keys"
+
+
+def _delete_stale(cursor, sheet_name, staging_table, key_cols, natural_keys):
+    """
+    Delete the staging rows and fingerprints of `natural_keys` with one set-based DELETE each:
+    the keys are array-bound into a session temp table that both tables are joined to.
+    The cursor's fast_executemany setting is restored afterwards.
+    """
+    if not natural_keys:
+        return
+    columns = ", ".join(f"key{i} NVARCHAR(400) COLLATE DATABASE_DEFAULT NOT NULL" for i in range(len(key_cols)))
+    cursor.execute(f"DROP TABLE IF EXISTS {STALE_KEYS_TABLE}")
+    cursor.execute(f"CREATE TABLE {STALE_KEYS_TABLE} (natural_key NVARCHAR(400) COLLATE DATABASE_DEFAULT NOT NULL, {columns})")
+    fast = getattr(cursor, "fast_executemany", None)
+    try:
+        if fast is not None:
+            cursor.fast_executemany = True
+        cursor.executemany(
+            f"INSERT INTO {STALE_KEYS_TABLE} VALUES ({', '.join('?' * (len(key_cols) + 1))})",
+            [(key,) + tuple(key.split(KEY_SEPARATOR)) for key in natural_keys],
+        )
+    finally:
+        if fast is not None:
+            cursor.fast_executemany = fast
+    match = " AND ".join(f"k.key{i} = {staging_table}.{col}" for i, col in enumerate(key_cols))
+    cursor.execute(f"DELETE FROM {staging_table} WHERE EXISTS (SELECT 1 FROM {STALE_KEYS_TABLE} k WHERE {match})")
+    cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE table_name = ? "
+                   f"AND natural_key IN (SELECT natural_key FROM {STALE_KEYS_TABLE})", (sheet_name,))
+    cursor.execute(f"DROP TABLE {STALE_KEYS_TABLE}")
+
+
+def _insert_fingerprints(cursor, sheet_name, fingerprints, backend):
+    rows = ((sheet_name, key, int(h)) for key, h in fingerprints.itertuples(index=False, name=None))
+    # There is no table type for staging.row_fingerprint: the tvp backend binds these rows as arrays
+    insert_batches(cursor, FINGERPRINT_TABLE, ["table_name", "natural_key", "row_hash"], rows,
+                   backend="fast_executemany" if backend == "tvp" else backend)
+
+
+def _full_reload(cursor, df, sheet_name, fingerprints, backend, batch_size):
+    staging_table = f"staging.{sheet_name}"
+    cursor.execute(f"DELETE FROM {staging_table}")
+    cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE table_name = ?", (sheet_name,))
+    stats = insert_rows(cursor, df, staging_table, backend, BatchSizeTuner(batch_size))
+    _insert_fingerprints(cursor, sheet_name, fingerprints, backend)
+    return stats
+
+
+def sync_sheet_incremental(cursor, df, sheet_name, backend=DEFAULT_BACKEND, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Apply only the differences between a cleaned sheet and its staging table.
+
+    Rows are matched on NATURAL_KEYS and compared by content hash against the
+    fingerprints stored in staging.row_fingerprint. New rows are inserted, rows gone
+    from the source are deleted, and changed rows are replaced (delete + insert) so
+    they get a new staging_raw_id_sk that downstream id watermarks pick up.
+    Tables without stored fingerprints, or sheets with duplicate keys, are fully reloaded.
+    Returns the insert stats plus inserted/changed/deleted counts.
+    """
+    staging_table = f"staging.{sheet_name}"
+    key_cols = NATURAL_KEYS.get(sheet_name)
+    counts = {"inserted": 0, "changed": 0, "deleted": 0, "unchanged": 0}
+
+    current = row_fingerprints(df, key_cols) if key_cols else None
+    stored = _stored_fingerprints(cursor, sheet_name)
+    if key_cols is None or current["natural_key"].duplicated().any() or stored.empty:
+        reason = "no natural key" if key_cols is None else (
+            "duplicate natural keys" if current["natural_key"].duplicated().any() else "no stored fingerprints")
+        print(f"   ↻ Full reload of {staging_table} ({reason})")
+        if current is None:
+            current = pd.DataFrame({"natural_key": [], "row_hash": []})
+        stats = _full_reload(cursor, df, sheet_name, current, backend, batch_size)
+        counts["inserted"] = stats["rows"]
+        stats.update(counts)
+        return stats
+
+    merged = current.merge(stored, on="natural_key", how="outer", suffixes=("", "_stored"), indicator=True)
+    new_keys = merged.loc[merged["_merge"] == "left_only", "natural_key"]
+    gone_keys = merged.loc[merged["_merge"] == "right_only", "natural_key"]
+    both = merged[merged["_merge"] == "both"]
+    changed_keys = both.loc[both["row_hash"] != both["row_hash_stored"], "natural_key"]
+    counts.update(inserted=len(new_keys), changed=len(changed_keys), deleted=len(gone_keys),
+                  unchanged=len(both) - len(changed_keys))
+
+    # Rows of the staging table (and their fingerprints) that go away or get replaced
+    stale_keys = pd.concat([gone_keys, changed_keys]).tolist()
+    _delete_stale(cursor, sheet_name, staging_table, key_cols, stale_keys)
+
+    # New and changed source rows
+    upsert = current["natural_key"].isin(pd.concat([new_keys, changed_keys])).values
+    stats = insert_rows(cursor, df[upsert], staging_table, backend, BatchSizeTuner(batch_size))
+    _insert_fingerprints(cursor, sheet_name, current[upsert], backend)
+
+    print(f"   ✔ {staging_table}: {counts['inserted']} new, {counts['changed']} changed, "
+          f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+    stats.update(counts)
+    return stats
+
+
+# ----------------------------
+# PARALLEL LOAD (ONE SHEET PER WORKER)
+# ----------------------------
+
+def _parse_sheet(file_path, sheet_name, cache_entry=None):
+    """Process-pool worker: parse and clean one sheet (CPU-bound, so it runs outside the GIL)."""
+    if cache_entry:
+        # Cache entries are content-addressed, so a sheet left by an interrupted run is still valid
+        df = read_sheet(cache_entry, sheet_name)
+        if df is not None:
+            return df
+    df = clean_dataframe(StagingSource(file_path).read(sheet_name, exclude=DROP_COLUMNS))
+    if cache_entry:
+        write_sheet(cache_entry, sheet_name, df)
+    return df
+
+
+def _stream_sheet(pool, file_path, sheet_name, chunk_size, backend, batch_size):
+    """Thread worker for streaming mode: each worker reads its own sheet through its own read-only workbook (or its own file)."""
+    source = StagingSource(file_path)
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True) if source.format == "excel" else None
+    try:
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"DELETE FROM staging.{sheet_name}")
+                if workbook is not None:
+                    stats = load_sheet_streaming(cursor, workbook[sheet_name], chunk_size, backend, batch_size)
+                else:
+                    stats = load_chunks_streaming(cursor, sheet_name,
+                                                  source.iter_chunks(sheet_name, chunk_size, exclude=DROP_COLUMNS),
+                                                  chunk_size, backend, batch_size)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        if workbook is not None:
+            workbook.close()
+    return stats
+
+
+def _load_parsed_sheet(pool, parsed, sheet_name, backend, batch_size, incremental=False):
+    """Thread worker: wait for the parsed sheet, then replace (or sync) its staging table in one transaction."""
+    df = parsed.result()
+    staging_table = f"staging.{sheet_name}"
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            stats = None
+            if incremental:
+                stats = sync_sheet_incremental(cursor, df, sheet_name, backend, batch_size)
+                conn.commit()
+                return stats
+            cursor.execute(f"DELETE FROM {staging_table}")
+            if df.empty:
+                print(f"⚠️ Sheet '{sheet_name}' is empty — skipping.")
+            else:
+                stats = insert_rows(cursor, df, staging_table, backend, BatchSizeTuner(batch_size))
+                _print_load_stats(staging_table, stats)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return stats
+
+
+def load_sheets_parallel(file_path, sheet_names, workers, streaming=False, chunk_size=CHUNK_SIZE,
+                         backend=DEFAULT_BACKEND, batch_size=DEFAULT_BATCH_SIZE, incremental=False,
+                         cache_entry=None):
+    """
+    Load every sheet concurrently: sheets are parsed in a process pool and inserted over
+    a pool of `workers` connections, each sheet in its own DELETE + INSERT transaction.
+    Returns {sheet_name: {"success": bool, ...}}; one failing sheet does not stop the others.
+    """
+    pool = ConnectionPool(factory=lambda conn_str: get_connection(), size=workers, conn_str="")
+    procs = None if streaming else ProcessPoolExecutor(max_workers=workers)
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            futures = {}
+            if streaming:
+                for sheet in sheet_names:
+                    futures[threads.submit(_stream_sheet, pool, file_path, sheet, chunk_size, backend, batch_size)] = sheet
+            else:
+                for sheet in sheet_names:
+                    parsed = procs.submit(_parse_sheet, file_path, sheet, cache_entry)
+                    futures[threads.submit(_load_parsed_sheet, pool, parsed, sheet, backend, batch_size, incremental)] = sheet
+
+            for future in as_completed(futures):
+                sheet = futures[future]
+                try:
+                    stats = future.result() or {"rows": 0, "rows_per_sec": 0.0}
+                    results[sheet] = {"success": True, "rows": stats["rows"], "rows_per_sec": stats["rows_per_sec"]}
+                except Exception as e:
+                    results[sheet] = {"success": False, "error": str(e)}
+    finally:
+        if procs:
+            procs.shutdown()
+        pool.close()
+
+    if cache_entry and all(res["success"] for res in results.values()):
+        finalize_entry(cache_entry, sheet_names)
+
+    print("\n📊 Per-sheet results:")
+    for sheet in sheet_names:
+        res = results[sheet]
+        if res["success"]:
+            print(f"   ✔ {sheet}: {res['rows']} rows ({res['rows_per_sec']:,.0f} rows/sec)")
+        else:
+            print(f"   ❌ {sheet}: {res['error']}")
+    return results
+
+
+# ----------------------------
+# STAGING INDEXES
+# ----------------------------
+
+# Secondary indexes on the fact scripts' lookup paths. A full load drops them first (rows
+# then only go into the clustered identity key) and rebuilds them once all sheets are in.
+STAGING_INDEXES = {
+    "IX_Orders_OrderDate_dt": (
+        "staging.Orders",
+        "(OrderDate_dt) INCLUDE (OrderID, CustomerID, EmployeeID, ShipVia, TerritoryID, "
+        "RequiredDate, ShippedDate, Freight)",
+    ),
+    "IX_Orders_OrderID": ("staging.Orders", "(OrderID)"),
+    "IX_OrderDetails_OrderID": ("staging.OrderDetails", "(OrderID) INCLUDE (ProductID, UnitPrice, Quantity, Discount)"),
+}
+
+
+def drop_staging_indexes(cursor):
+    for name, (table, _) in STAGING_INDEXES.items():
+        cursor.execute(f"DROP INDEX IF EXISTS {name} ON {table}")
+
+
+def create_staging_indexes(cursor):
+    """Create every missing staging index (existing ones, e.g. after an incremental load, are kept)."""
+    print("🗂️ Building staging indexes...")
+    for name, (table, definition) in STAGING_INDEXES.items():
+        cursor.execute(
+            f"IF INDEXPROPERTY(OBJECT_ID('{table}'), '{name}', 'IndexID') IS NULL "
+            f"CREATE INDEX {name} ON {table} {definition}"
+        )
+
+
+# ----------------------------
+# TABLE FINGERPRINTS
+# ----------------------------
+
+# Staging sources of the dimension tasks: a dimension whose source fingerprint matches its
+# dbo.dim_refresh_state row is skipped by the pipeline
+FINGERPRINTED_TABLES = [
+    "Categories", "Customers", "Employees", "Products", "Region", "Shippers", "Suppliers", "Territories"
+]
+TABLE_FINGERPRINT_TABLE = "staging.table_fingerprint"
+
+
+def clear_table_fingerprints(cursor):
+    # Until the load is done the fingerprints would describe the old rows
+    cursor.execute(f"DELETE FROM {TABLE_FINGERPRINT_TABLE}")
+
+
+def write_table_fingerprints(cursor):
+    """Record row count + summed row_hash checksum of every dimension source, as loaded."""
+    for table in FINGERPRINTED_TABLES:
+        cursor.execute(
+            f"MERGE {TABLE_FINGERPRINT_TABLE} AS tgt "
+            f"USING (SELECT N'staging.{table}' AS table_name, COUNT_BIG(*) AS row_count, "
+            f"ISNULL(SUM(CAST(CHECKSUM(row_hash) AS BIGINT)), 0) AS content_checksum FROM staging.{table}) AS src "
+            "ON tgt.table_name = src.table_name "
+            "WHEN MATCHED THEN UPDATE SET row_count = src.row_count, content_checksum = src.content_checksum, "
+            "loaded_dt = SYSDATETIME() "
+            "WHEN NOT MATCHED THEN INSERT (table_name, row_count, content_checksum) "
+            "VALUES (src.table_name, src.row_count, src.content_checksum);"
+        )
+
+
+# ----------------------------
+# MAIN FUNCTION TO LOAD ALL SHEETS
+# ----------------------------
+
+def load_excel_to_staging(file_path, streaming=False, chunk_size=CHUNK_SIZE,
+                          backend=DEFAULT_BACKEND, batch_size=DEFAULT_BATCH_SIZE, workers=1, incremental=False,
+                          use_cache=True):
+
+    if not os.path.exists(file_path):
+        print(f"❌ ERROR: File not found: {file_path}")
+        return
+    try:
+        source = StagingSource(file_path)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return
+
+    if incremental and streaming:
+        # The diff needs every key of the sheet at once, which streaming deliberately avoids
+        print("❌ ERROR: --incremental cannot be combined with --streaming")
+        return
+
+    print(f"📄 Loading {source}")
+
+    # Streaming keeps memory bounded by never materializing a sheet, so it bypasses the cache;
+    # CSV/Parquet are cheap to read, the cache only saves re-parsing a workbook's XML
+    cache_entry = None if streaming or source.format != "excel" else workbook_cache_entry(file_path, use_cache)
+    # A workbook or directory is the whole staging area; a single file replaces only its own table
+    replaced_tables = STAGING_TABLES if source.format in ("excel", "directory") else source.table_names()
+
+    if workers > 1:
+        sheet_names = cached_sheet_names(cache_entry) if cache_entry else None
+        if sheet_names is None:
+            if source.format == "excel":
+                workbook = openpyxl.load_workbook(file_path, read_only=True)
+                sheet_names = workbook.sheetnames
+                workbook.close()
+            else:
+                sheet_names = source.table_names()
+
+        # Staging tables without a sheet are still cleared, as in the sequential load
+        missing = [t for t in replaced_tables if t not in sheet_names]
+        conn = get_connection()
+        cursor = conn.cursor()
+        clear_table_fingerprints(cursor)
+        if not incremental:
+            drop_staging_indexes(cursor)
+            for table in missing:
+                cursor.execute(f"DELETE FROM staging.{table}")
+            # Fingerprints no longer describe the staging rows; the next incremental run reloads fully
+            cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE}")
+        conn.commit()
+        conn.close()
+
+        print(f"⚡ Loading {len(sheet_names)} sheets with {workers} workers...")
+        results = None
+        try:
+            results = load_sheets_parallel(file_path, sheet_names, workers, streaming, chunk_size, backend,
+                                           batch_size, incremental, cache_entry)
+        finally:
+            # The indexes come back even when the load fails (failed sheets keep their previous rows)
+            conn = get_connection()
+            create_staging_indexes(conn.cursor())
+            if results is not None:
+                write_table_fingerprints(conn.cursor())
+            conn.commit()
+            conn.close()
+        failed = [sheet for sheet, res in results.items() if not res["success"]]
+        if failed:
+            print(f"\n❌ Failed sheets: {', '.join(failed)}")
+            return results
+    else:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        results = None
+        clear_table_fingerprints(cursor)
+        conn.commit()
+        if not incremental:
+            print("🧹 Clearing staging tables...")
+            drop_staging_indexes(cursor)
+            for table in replaced_tables:
+                cursor.execute(f"DELETE FROM staging.{table}")
+            # Fingerprints no longer describe the staging rows; the next incremental run reloads fully
+            cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE}")
+            conn.commit()
+
+        try:
+            if incremental:
+                print("🔍 Incremental load: applying only changed rows...")
+                for sheet, df in iter_clean_sheets(source, cache_entry):
+                    print(f"➡️ Syncing sheet '{sheet}' into staging.{sheet}...")
+                    sync_sheet_incremental(cursor, df, sheet, backend, batch_size)
+                    conn.commit()
+            elif streaming and source.format == "excel":
+                # Read-only workbook: rows are parsed lazily, peak memory is one chunk per sheet
+                workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+                try:
+                    for worksheet in workbook.worksheets:
+                        load_sheet_streaming(cursor, worksheet, chunk_size, backend, batch_size)
+                finally:
+                    workbook.close()
+            elif streaming:
+                for table in source.table_names():
+                    load_chunks_streaming(cursor, table, source.iter_chunks(table, chunk_size, exclude=DROP_COLUMNS),
+                                          chunk_size, backend, batch_size)
+            else:
+                # Load all sheets (parsed sheets come from the cache when the workbook is unchanged)
+                for sheet, df in iter_clean_sheets(source, cache_entry):
+                    load_sheet(cursor, df, sheet, backend, batch_size, cleaned=True)
+            conn.commit()
+        except Exception:
+            # Rebuild the dropped indexes over whatever did load; fingerprints stay cleared
+            conn.rollback()
+            create_staging_indexes(cursor)
+            conn.commit()
+            conn.close()
+            raise
+
+        create_staging_indexes(cursor)
+        write_table_fingerprints(cursor)
+        conn.commit()
+        conn.close()
+
+    print("\n✅ Staging data loaded successfully!")
     print("➡️ Next: run the pipeline:")
     print("   python main.py --start_date 1996-01-01 --end_date 1996-12-31")
+    return results
 
 
 # ----------------------------
@@ -152,8 +835,28 @@ def load_excel_to_staging(file_path):
 # ----------------------------
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Load Excel data into SQL staging tables.")
-    parser.add_argument("--excel_file", required=True, help="Path to Excel file")
+    parser = argparse.ArgumentParser(description="Load Excel, CSV or Parquet data into SQL staging tables.")
+    parser.add_argument("--input", "--excel_file", dest="input", required=True,
+                        help="Excel workbook, a <Table>.csv/.parquet file, or a directory of per-table CSV/Parquet files")
+    parser.add_argument("--streaming", action="store_true", help="Read and insert each sheet in fixed-size chunks")
+    parser.add_argument("--chunk_size", type=int, default=CHUNK_SIZE, help="Rows per chunk in streaming mode")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="Staging insert backend")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Initial insert batch size (tuned automatically from measured throughput)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Insert/replace/delete only rows whose content fingerprint changed")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="Always parse the workbook instead of reading the parsed-sheet cache")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Sheets parsed and loaded in parallel (each over its own connection)")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Write cProfile/tracemalloc reports of the load to {PROFILE_DIR}/")
     args = parser.parse_args()
 
-    load_excel_to_staging(args.excel_file)
+    # Sheets parsed in worker processes (--workers > 1) are not covered by the profile
+    with profiled(os.path.join(PROFILE_DIR, f"profile_staging_{time.strftime('%Y%m%d_%H%M%S')}")) if args.profile else nullcontext():
+        results = load_excel_to_staging(args.input, streaming=args.streaming, chunk_size=args.chunk_size,
+                                        backend=args.backend, batch_size=args.batch_size, workers=args.workers,
+                                        incremental=args.incremental, use_cache=args.use_cache)
+    if results and not all(res["success"] for res in results.values()):
+        raise SystemExit(1)
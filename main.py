@@ -1,4 +1,6 @@
 import argparse
+import os
+from contextlib import nullcontext
 
 # Import logging configuration first to set up logging
 # This file (logging.py) imports the standard library logging module
@@ -7,7 +9,10 @@ import logging
 # Now we can use the standard library logging functions
 from logging import getLogger
 
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import configure_pool
 from pipeline_dimensional_data.flow import DimensionalDataFlow
+from pipeline_dimensional_data.telemetry import profiled
 
 logger = getLogger(__name__)
 
@@ -16,13 +21,58 @@ def parse_args():
     parser.add_argument("--start_date", required=True, help="Start date in YYYY-MM-DD")
     parser.add_argument("--end_date", required=True, help="End date in YYYY-MM-DD")
     parser.add_argument("--execution_id", required=False, help="Optional execution id")
-    return parser.parse_args()
+    parser.add_argument("--max_workers", type=int, default=config.MAX_WORKERS, help="Max number of tasks running concurrently")
+    parser.add_argument("--param_mode", choices=["bound", "literal"], default=config.SQL_PARAM_MODE,
+                        help="Send date/execution tokens as bound parameters (plan reuse) or as SQL literals")
+    parser.add_argument("--report_plan_cache", action="store_true", default=config.REPORT_PLAN_CACHE,
+                        help="Report plan-cache reuse per task (needs VIEW SERVER STATE)")
+    parser.add_argument("--mode", choices=list(config.LOAD_MODES), default=config.LOAD_MODE,
+                        help="Fact load mode: rebuild the whole date window, or only orders staged since the last incremental run of the same window")
+    parser.add_argument("--slice_size", type=int, default=config.FACT_SLICE_SIZE,
+                        help="Load facts in OrderID slices of this size, committing (and resuming) per slice")
+    parser.add_argument("--fact_builder", choices=["single_pass", "two_pass"],
+                        default="single_pass" if config.FACT_SINGLE_PASS else "two_pass",
+                        help="Build FactOrders and fact_error in one pass over staging, or with one script each")
+    parser.add_argument("--resolver", choices=list(config.KEY_RESOLVERS), default=config.KEY_RESOLVER,
+                        help="Resolve fact surrogate keys with SQL joins or with in-memory key maps (needs numpy)")
+    parser.add_argument("--refresh_all", action="store_true",
+                        help="Run every dimension script, even when its staging source is unchanged since its last refresh")
+    parser.add_argument("--pool_size", type=int, default=config.POOL_SIZE, help="Max number of pooled SQL Server connections")
+    parser.add_argument("--metrics_file", default=config.METRICS_FILE,
+                        help="Append task and batch metrics to this JSON-lines file")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Write cProfile/tracemalloc reports of the run to {config.PROFILE_DIR}/")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip tasks that already succeeded for --execution_id with the same inputs")
+    args = parser.parse_args()
+    if args.resume and not args.execution_id:
+        parser.error("--resume needs the --execution_id of the run to resume")
+    return args
 
 def main():
     args = parse_args()
-    flow = DimensionalDataFlow(execution_id=args.execution_id)
-    logger.info(f"Starting pipeline execution_id={flow.execution_id} start_date={args.start_date} end_date={args.end_date}")
-    result = flow.exec(args.start_date, args.end_date)
+    # Every concurrently running task needs its own connection
+    pool = configure_pool(size=max(args.pool_size, args.max_workers))
+    flow = DimensionalDataFlow(
+        execution_id=args.execution_id,
+        pool=pool,
+        max_workers=args.max_workers,
+        param_mode=args.param_mode,
+        report_plan_cache=args.report_plan_cache,
+        load_mode=args.mode,
+        slice_size=args.slice_size,
+        single_pass=args.fact_builder == "single_pass",
+        resolver=args.resolver,
+        skip_unchanged=not args.refresh_all,
+        metrics_file=args.metrics_file,
+    )
+    profile_prefix = os.path.join(config.PROFILE_DIR, f"profile_pipeline_{flow.execution_id}")
+    logger.info(f"Starting pipeline execution_id={flow.execution_id} start_date={args.start_date} end_date={args.end_date} mode={args.mode}")
+    try:
+        with profiled(profile_prefix) if args.profile else nullcontext():
+            result = flow.exec(args.start_date, args.end_date, resume=args.resume)
+    finally:
+        pool.close()
     logger.info(f"Pipeline finished: {result}")
     failed_tasks = [k for k,v in result.get("tasks", {}).items() if not v.get("success")]
     if failed_tasks:
@@ -0,0 +1,130 @@
+"""
+Thin client of the resident pipeline service (pipeline_service.py): sends one run request and
+prints the per-task status as it streams back. Replaces a cold `python main.py ...` start:
+
+    python pipeline_client.py --start_date 1996-07-01 --end_date 1996-07-31
+
+Only the standard library is imported, so the client starts in a fraction of a second.
+Exits 1 when the run fails or the service rejects it.
+"""
+
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, Optional
+
+SERVICE_HOST = "127.0.0.1"  # keep in line with config.SERVICE_HOST / SERVICE_PORT
+SERVICE_PORT = 8765
+
+
+def run_remote(request: Dict, host: str = SERVICE_HOST, port: int = SERVICE_PORT,
+               on_event: Callable[[dict], None] = None, timeout: Optional[float] = None) -> dict:
+    """POST a run request and feed every streamed event to `on_event`; returns the run_finished event."""
+    req = urllib.request.Request(
+        f"http://{host}:{port}/runs", data=json.dumps(request).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    finished = None
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if on_event:
+                    on_event(event)
+                if event.get("event") == "run_finished":
+                    finished = event
+    except urllib.error.HTTPError as e:
+        # Rejected before the run was queued (400 invalid request, 503 queue full)
+        finished = {"event": "run_finished", "success": False, "error": json.loads(e.read() or b"{}").get("error", str(e))}
+    if finished is None:
+        finished = {"event": "run_finished", "success": False, "error": "the service closed the stream early"}
+    if finished.get("execution_id") is None and on_event:
+        on_event(finished)
+    return finished
+
+
+def health(host: str = SERVICE_HOST, port: int = SERVICE_PORT, timeout: float = 5) -> dict:
+    with urllib.request.urlopen(f"http://{host}:{port}/health", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def refresh_scripts(host: str = SERVICE_HOST, port: int = SERVICE_PORT, timeout: float = 5) -> dict:
+    """Make the service recompile edited SQL scripts now instead of at its next check."""
+    req = urllib.request.Request(f"http://{host}:{port}/scripts/refresh", data=b"", method="POST")
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def print_event(event: dict):
+    kind = event.get("event")
+    if kind == "queued":
+        print(f"queued ({event['runs_ahead']} runs ahead)")
+    elif kind == "run_started":
+        print(f"run started: execution_id={event['execution_id']}")
+    elif kind == "task_started":
+        print(f"  {event['task']}: started")
+    elif kind == "task_finished":
+        if event.get("resumed"):
+            status = "already done (resumed)"
+        elif event.get("skipped"):
+            status = "skipped (source unchanged)"
+        elif event.get("success"):
+            status = f"done in {event.get('wall_seconds', 0):.2f}s, rows affected: {event.get('rows_affected', 'n/a')}"
+        else:
+            status = f"FAILED: {event.get('error')}"
+        print(f"  {event['task']}: {status}")
+    elif kind == "run_finished":
+        print(f"run {'succeeded' if event.get('success') else 'failed'}" + (f": {event['error']}" if event.get("error") else ""))
+    sys.stdout.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the ORDER_DDS pipeline on the resident pipeline service")
+    parser.add_argument("--start_date", help="Start date in YYYY-MM-DD")
+    parser.add_argument("--end_date", help="End date in YYYY-MM-DD")
+    parser.add_argument("--execution_id", required=False, help="Optional execution id")
+    parser.add_argument("--mode", choices=["full", "incremental"], default=None,
+                        help="Fact load mode (default: the service's configured mode)")
+    parser.add_argument("--tasks", nargs="+", help="Run only these tasks")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip tasks that already succeeded for --execution_id with the same inputs")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Address of the pipeline service")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Port of the pipeline service")
+    parser.add_argument("--health", action="store_true", help="Print the service status and exit")
+    parser.add_argument("--refresh_scripts", action="store_true",
+                        help="Make the service recompile edited SQL scripts now, then exit")
+    args = parser.parse_args()
+    if not (args.health or args.refresh_scripts) and not (args.start_date and args.end_date):
+        parser.error("--start_date and --end_date are required")
+    if args.resume and not args.execution_id:
+        parser.error("--resume needs the --execution_id of the run to resume")
+    return args
+
+
+def main():
+    args = parse_args()
+    try:
+        if args.health:
+            print(json.dumps(health(args.host, args.port), indent=2))
+            return
+        if args.refresh_scripts:
+            print(json.dumps(refresh_scripts(args.host, args.port), indent=2))
+            return
+        request = {"start_date": args.start_date, "end_date": args.end_date, "execution_id": args.execution_id,
+                   "resume": args.resume, "tasks": args.tasks}
+        if args.mode:
+            request["mode"] = args.mode
+        finished = run_remote(request, args.host, args.port, on_event=print_event)
+    except urllib.error.URLError as e:
+        print(f"Pipeline service not reachable at {args.host}:{args.port}: {e.reason}", file=sys.stderr)
+        raise SystemExit(1)
+    if not finished.get("success"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ import os
 SQL_CFG_FILE = "sql_server_config.cfg"
 SQL_CFG_SECTION = "SQL_SERVER"
 
+# Connection pool shared by all pipeline tasks
+POOL_SIZE = 4
+POOL_CHECKOUT_TIMEOUT = 60
+POOL_HEALTH_CHECK_SQL = "SELECT 1"
+
 DB_NAME = "ORDER_DDS"
 SRC_SCHEMA = "staging"
 DEST_SCHEMA = "dbo"
@@ -11,6 +16,65 @@ DEST_SCHEMA = "dbo"
 # Log file path (folder creation handled in logging.py)
 LOG_FILE = os.path.join("logs", "logs_dimensional_data_pipeline.txt")
 QUERIES_DIR = os.path.join("pipeline_dimensional_data", "queries")
+# Task and batch metrics of every run, one JSON object per line (None: not written)
+METRICS_FILE = os.path.join("logs", "metrics_dimensional_data_pipeline.jsonl")
+# Where --profile writes its cProfile/tracemalloc reports
+PROFILE_DIR = "logs"
+# Task states per execution_id, read by --resume (None: no ledger)
+RUN_LEDGER_DIR = os.path.join("logs", "runs")
+
+# How {{START_DATE}}/{{END_DATE}}/{{EXECUTION_ID}} reach the server:
+#   "bound"   - sent as query parameters, so every run reuses the same cached plan
+#   "literal" - spliced into the SQL text (one compiled plan per distinct value)
+SQL_PARAM_MODE = "bound"
+# Report plan-cache reuse per task (reads sys.dm_exec_cached_plans, needs VIEW SERVER STATE)
+REPORT_PLAN_CACHE = False
+
+# Fact load mode:
+#   "full"        - rebuild every order in the date window
+#   "incremental" - only orders staged after the task's watermark for the same window in
+#                   dbo.pipeline_watermark; unchanged lines are carried forward from the
+#                   snapshot of the window's last incremental run (not for backfills)
+LOAD_MODE = "full"
+LOAD_MODES = ("full", "incremental")
+
+# Skip a dimension task when its staging source (staging.table_fingerprint) and SCD script
+# are unchanged since its last successful refresh (dbo.dim_refresh_state)
+SKIP_UNCHANGED_DIMENSIONS = True
+
+# Chunked fact loads: OrderIDs per slice, each slice committed separately and resumable
+# (None: the whole window in one transaction)
+FACT_SLICE_SIZE = None
+FACT_TASKS = ("fact_orders", "fact_error")
+
+# Build FactOrders and fact_error in one pass over staging (lookups resolved once):
+# fact_orders runs FACT_SINGLE_PASS_SCRIPT and fact_error only reports on it.
+# False: the two scripts of queries_map, each with its own lookups.
+FACT_SINGLE_PASS = True
+FACT_SINGLE_PASS_SCRIPT = "update_fact_single_pass.sql"
+
+# Surrogate-key resolution of the fact load:
+#   "sql"    - the fact scripts join staging to the dimensions on the server
+#   "python" - key maps are cached in memory (needs numpy) and resolved with interval
+#              indexes (key_resolver.py); full loads of the whole window only
+KEY_RESOLVER = "sql"
+KEY_RESOLVERS = ("sql", "python")
+
+# Snapshot retention (task snapshot_retention, after the fact tasks): every run stamps its fact
+# rows with the run date (snapshot_dt); keep the newest SNAPSHOT_KEEP_DAILY snapshots plus, with
+# SNAPSHOT_KEEP_MONTH_END, the last snapshot of every earlier month forever (None: keep everything).
+# Expired snapshots are dropped by partition truncation where the table is partitioned by
+# snapshot_dt (pf_snapshot_dt, see dimensional_db_table_creation.sql), otherwise by deletes of
+# SNAPSHOT_DELETE_BATCH_SIZE rows.
+SNAPSHOT_KEEP_DAILY = 30
+SNAPSHOT_KEEP_MONTH_END = True
+SNAPSHOT_DELETE_BATCH_SIZE = 50000
+MAINTENANCE_TASKS = ("snapshot_retention",)
+
+# Seconds between mtime checks of QUERIES_DIR (None: only re-check on an unknown script name).
+# A one-shot run compiles the scripts as they are on disk; the resident service outlives
+# script edits and re-checks every SERVICE_SCRIPT_CHECK_INTERVAL seconds instead
+SCRIPT_REGISTRY_CHECK_INTERVAL = None
 
 queries_map = {
     "dim_categories": "update_dim_categories.sql",
@@ -51,3 +115,32 @@ DIM_ORDER = [
     "dim_suppliers",
     "dim_territories",
 ]
+
+# Task dependency graph (DAG): a task starts once every task it lists has succeeded.
+# Independent dimensions run concurrently; facts wait for every dimension.
+TASK_DEPENDENCIES = {
+    "dim_categories": [],
+    "dim_customers": [],
+    "dim_employees": [],
+    "dim_products": ["dim_categories", "dim_suppliers"],
+    "dim_region": [],
+    "dim_shippers": [],
+    "dim_suppliers": [],
+    "dim_territories": ["dim_region"],
+    "fact_orders": list(DIM_ORDER),
+    # fact_error probes dbo.FactOrders, so it must see the finished fact load
+    "fact_error": ["fact_orders"],
+    # Prunes both fact tables, so it waits for both loads
+    "snapshot_retention": ["fact_error"],
+}
+
+# Upper bound on tasks running at the same time
+MAX_WORKERS = 4
+
+# Resident service (pipeline_service.py): local HTTP endpoint, runs executed at once
+# and runs allowed to wait for a slot before new requests are refused
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_MAX_CONCURRENT_RUNS = 1
+SERVICE_MAX_QUEUED_RUNS = 16
+SERVICE_SCRIPT_CHECK_INTERVAL = 5.0
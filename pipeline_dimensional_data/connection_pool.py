@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from logging import getLogger
+from typing import Any, Callable, Optional
+
+from pipeline_dimensional_data import config
+from utils import get_sql_config, create_connection_string
+
+logger = getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_connection_string(cfg_file: str = config.SQL_CFG_FILE, section: str = config.SQL_CFG_SECTION) -> str:
+    """Parse the `.cfg` file once per (file, section) and return the cached connection string."""
+    cfg = get_sql_config(cfg_file, section)
+    return create_connection_string(cfg)
+
+
+def pyodbc_factory(conn_str: str):
+    """Default DB-API factory: a pyodbc connection with manual commits."""
+    import pyodbc
+    return pyodbc.connect(conn_str, autocommit=False)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections shared by all pipeline tasks.
+
+    Connections are created lazily up to `size`, health-checked on checkout and
+    handed back to the pool after use instead of being closed. `factory` is any
+    callable taking a connection string and returning a DB-API connection, so a
+    local stand-in driver (e.g. sqlite3) can replace pyodbc in tests.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[str], Any]] = None,
+        size: int = config.POOL_SIZE,
+        conn_str: Optional[str] = None,
+        health_check_sql: Optional[str] = config.POOL_HEALTH_CHECK_SQL,
+        checkout_timeout: float = config.POOL_CHECKOUT_TIMEOUT,
+    ):
+        if size < 1:
+            raise ValueError(f"Pool size must be >= 1, got {size}")
+        self.factory = factory or pyodbc_factory
+        self.size = size
+        self.health_check_sql = health_check_sql
+        self.checkout_timeout = checkout_timeout
+        self._conn_str = conn_str
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    @property
+    def conn_str(self) -> str:
+        if self._conn_str is None:
+            self._conn_str = get_connection_string()
+        return self._conn_str
+
+    def _connect(self):
+        conn = self.factory(self.conn_str)
+        logger.debug(f"Opened pooled connection ({self._created}/{self.size})")
+        return conn
+
+    def _is_healthy(self, conn) -> bool:
+        if not self.health_check_sql:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_sql)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def acquire(self, timeout: Optional[float] = None, stats: Optional[dict] = None):
+        """
+        Check out a healthy connection, opening a new one if the pool is not full.
+        If `stats` is given, it receives checkout_seconds and checkout_retries
+        (unhealthy connections discarded before a good one was found).
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        retries = 0
+
+        def checked_out(conn):
+            if stats is not None:
+                stats["checkout_seconds"] = round(time.monotonic() - started, 6)
+                stats["checkout_retries"] = retries
+            return conn
+
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    can_open = self._created < self.size
+                    if can_open:
+                        self._created += 1
+                if can_open:
+                    try:
+                        return checked_out(self._connect())
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No pooled connection available within {timeout}s")
+                try:
+                    conn = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"No pooled connection available within {timeout}s")
+
+            if self._is_healthy(conn):
+                return checked_out(conn)
+            self._discard(conn)
+            retries += 1
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it if `discard` is set or the pool is closed."""
+        if discard or self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a `with` block. If the block raises, the open
+        transaction is rolled back before the connection goes back to the pool; a connection
+        that cannot roll back (or fails its health check) is discarded instead.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection that failed to roll back: {e}")
+                broken = True
+            else:
+                broken = not self._is_healthy(conn)
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def close(self):
+        """Close every idle connection; connections still checked out are closed on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "open": self._created, "idle": self._idle.qsize()}
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it from `config` on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._closed:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+def configure_pool(
+    factory: Optional[Callable[[str], Any]] = None,
+    size: int = config.POOL_SIZE,
+    conn_str: Optional[str] = None,
+) -> ConnectionPool:
+    """Replace the process-wide pool (closing the previous one) and return the new pool."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.close()
+        _default_pool = ConnectionPool(factory=factory, size=size, conn_str=conn_str)
+        return _default_pool
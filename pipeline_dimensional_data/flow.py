@@ -1,56 +1,300 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from datetime import date, timedelta
 from logging import getLogger
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from pipeline_dimensional_data import config
 from pipeline_dimensional_data import tasks
+from pipeline_dimensional_data import telemetry
+from pipeline_dimensional_data.connection_pool import ConnectionPool, get_pool
+from pipeline_dimensional_data.run_ledger import RunLedger, task_fingerprint
+from pipeline_dimensional_data.script_registry import get_registry
 
 logger = getLogger(__name__)
 
+
+def _topological_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """Return task names so that every task comes after its dependencies (declaration order kept otherwise)."""
+    order = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Cycle in task dependencies: {' -> '.join(path + [name])}")
+        if name not in dependencies:
+            raise ValueError(f"Unknown task in dependencies: {name}")
+        state[name] = "visiting"
+        for dep in dependencies[name]:
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in dependencies:
+        visit(name, [])
+    return order
+
+
+def _date_slices(start_date: str, end_date: str, granularity: str) -> List[Tuple[str, str]]:
+    """Split [start_date, end_date] into calendar month or quarter ranges ('YYYY-MM-DD' strings)."""
+    months = {"month": 1, "quarter": 3}.get(granularity)
+    if months is None:
+        raise ValueError(f"Unknown backfill granularity: {granularity} (expected month or quarter)")
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    if start > end:
+        raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+    slices = []
+    # Align to the first month of the period containing start_date
+    period_start = date(start.year, start.month - (start.month - 1) % months, 1)
+    while period_start <= end:
+        month = period_start.month - 1 + months
+        next_start = date(period_start.year + month // 12, month % 12 + 1, 1)
+        slices.append((max(period_start, start).isoformat(), min(next_start - timedelta(days=1), end).isoformat()))
+        period_start = next_start
+    return slices
+
+
+def _emit(on_event: Optional[Callable[[dict], None]], event: dict):
+    """Hand a task event to the caller's callback; a failing callback never fails the run."""
+    if on_event is None:
+        return
+    try:
+        on_event(event)
+    except Exception as e:
+        logger.warning(f"Task event callback failed: {e}")
+
+
+def _task_event(task_name: str, res: dict) -> dict:
+    metrics = res.get("metrics", {})
+    event = {"event": "task_finished", "task": task_name, "success": bool(res.get("success"))}
+    for key in ("skipped", "resumed", "error"):
+        if res.get(key):
+            event[key] = res[key]
+    for key in ("wall_seconds", "rows_affected"):
+        if key in metrics:
+            event[key] = metrics[key]
+    return event
+
+
+def _is_dimension_task(task_name: str) -> bool:
+    return task_name not in config.FACT_TASKS and task_name not in config.MAINTENANCE_TASKS
+
+
+def _get_task_fn(task_name: str) -> Callable:
+    task_fn = getattr(tasks, f"task_{task_name.split('dim_')[-1]}", None)
+    if not task_fn:
+        task_fn = getattr(tasks, f"task_{task_name}", None)
+    return task_fn
+
+
 class DimensionalDataFlow:
-    def __init__(self, execution_id: str = None):
+    def __init__(
+        self,
+        execution_id: str = None,
+        pool: ConnectionPool = None,
+        max_workers: int = config.MAX_WORKERS,
+        param_mode: str = config.SQL_PARAM_MODE,
+        report_plan_cache: bool = config.REPORT_PLAN_CACHE,
+        load_mode: str = config.LOAD_MODE,
+        slice_size: int = config.FACT_SLICE_SIZE,
+        single_pass: bool = config.FACT_SINGLE_PASS,
+        resolver: str = config.KEY_RESOLVER,
+        metrics_file: str = config.METRICS_FILE,
+        run_ledger_dir: str = config.RUN_LEDGER_DIR,
+        skip_unchanged: bool = config.SKIP_UNCHANGED_DIMENSIONS,
+        key_maps=None,
+    ):
         self.execution_id = execution_id or str(uuid.uuid4())
-        logger.info(f"Creating DimensionalDataFlow (execution_id={self.execution_id})")
+        # All tasks borrow from one pool so logins are paid once per process, not once per task
+        self.pool = pool or get_pool()
+        self.max_workers = max_workers
+        # Forwarded to every task (and from there to run_sql_script)
+        self.task_options = {"param_mode": param_mode, "report_plan_cache": report_plan_cache, "load_mode": load_mode}
+        # Only the fact tasks understand these
+        self.fact_options = {"slice_size": slice_size, "single_pass": single_pass, "resolver": resolver}
+        # ... and only the dimension tasks these
+        self.dim_options = {"skip_unchanged": skip_unchanged}
+        # In-memory key maps of the python resolver, shared by every fact task of this flow
+        # (and by every flow of a resident service, which passes its own cache in)
+        self.key_maps = None
+        if resolver == "python":
+            from pipeline_dimensional_data.key_resolver import KeyMapCache
+            self.key_maps = key_maps or KeyMapCache()
+            self.fact_options["key_maps"] = self.key_maps
+        self.metrics = telemetry.MetricsWriter(metrics_file) if metrics_file else None
+        self.ledger = RunLedger(run_ledger_dir) if run_ledger_dir else None
+        self.dependencies = config.TASK_DEPENDENCIES
+        self.task_order = _topological_order(self.dependencies)
+        # Load and split every SQL template up front
+        self.registry = get_registry()
+        logger.info(f"Creating DimensionalDataFlow (execution_id={self.execution_id}, max_workers={self.max_workers}, load_mode={load_mode})")
 
-    def exec(self, start_date: str, end_date: str) -> dict:
+    def exec(self, start_date: str, end_date: str, task_names: Iterable[str] = None, resume: bool = False,
+             on_event: Callable[[dict], None] = None) -> dict:
         """
-        Executes the pipeline sequentially.
+        Executes the pipeline as a DAG on a bounded worker pool.
         start_date, end_date: strings in 'YYYY-MM-DD' format expected by the SQL scripts.
+        task_names: run only these tasks (dependencies outside the subset count as done).
+        resume: skip tasks the run ledger shows as succeeded for this execution_id with the
+        same input fingerprint (reported with "resumed": True).
+        on_event: called with a task_started / task_finished dict as each task starts and ends.
+        A task starts as soon as all of its dependencies succeeded; once a task fails,
+        no new tasks are started and the running ones are allowed to finish.
         Returns a dict with overall status and per-task results.
         """
         results = {"execution_id": self.execution_id, "start_date": start_date, "end_date": end_date, "tasks": {}}
+        task_results = {}
+        task_order = self.task_order
+        if task_names is not None:
+            selected = set(task_names)
+            unknown = selected - set(self.task_order)
+            if unknown:
+                raise ValueError(f"Unknown tasks: {sorted(unknown)}")
+            task_order = [t for t in self.task_order if t in selected]
+        if self.key_maps is not None and any(_is_dimension_task(t) for t in task_order):
+            # Dimensions are about to change: reload the key maps on the next fact task
+            self.key_maps.invalidate()
 
-        for dim_task_key in config.DIM_ORDER:
-            task_name = dim_task_key
-            logger.info(f"[{self.execution_id}] Starting task: {task_name}")
-            task_fn = getattr(tasks, f"task_{task_name.split('dim_')[-1]}", None)
-            if not task_fn:
-                task_fn = getattr(tasks, f"task_{task_name}", None)
-            if not task_fn:
+        for task_name in task_order:
+            if not _get_task_fn(task_name):
                 logger.error(f"[{self.execution_id}] Task function not found for: {task_name}")
                 results["tasks"][task_name] = {"success": False, "error": "task function not found"}
                 return results
 
-            res = task_fn(start_date, end_date, self.execution_id)
-            results["tasks"][task_name] = res
-            if not res.get("success"):
-                logger.error(f"[{self.execution_id}] Task failed: {task_name} -> {res.get('error')}")
-                return results
-            logger.info(f"[{self.execution_id}] Task completed: {task_name}")
-
-        logger.info(f"[{self.execution_id}] Starting task: fact_orders")
-        res_fact = tasks.task_fact_orders(start_date, end_date, self.execution_id)
-        results["tasks"]["fact_orders"] = res_fact
-        if not res_fact.get("success"):
-            logger.error(f"[{self.execution_id}] Fact task failed -> {res_fact.get('error')}")
-            return results
-        logger.info(f"[{self.execution_id}] Fact task completed")
-
-        logger.info(f"[{self.execution_id}] Starting task: fact_error")
-        res_err = tasks.task_fact_error(start_date, end_date, self.execution_id)
-        results["tasks"]["fact_error"] = res_err
-        if not res_err.get("success"):
-            logger.error(f"[{self.execution_id}] Fact error task failed -> {res_err.get('error')}")
-            return results
-        logger.info(f"[{self.execution_id}] Fact error task completed")
+        pending = list(task_order)
+        running = {}
+        failed = False
 
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dds-task") as executor:
+            while pending or running:
+                if not failed:
+                    for task_name in list(pending):
+                        deps = [dep for dep in self.dependencies[task_name] if dep in task_order]
+                        if all(task_results.get(dep, {}).get("success") for dep in deps):
+                            pending.remove(task_name)
+                            options = dict(self.task_options)
+                            if task_name in config.FACT_TASKS:
+                                options.update(self.fact_options)
+                            elif _is_dimension_task(task_name):
+                                options.update(self.dim_options)
+                            fingerprint = task_fingerprint(task_name, start_date, end_date, options) if self.ledger else None
+                            done_before = resume and self.ledger.completed(
+                                self.execution_id, task_name, start_date, end_date, fingerprint)
+                            if done_before:
+                                logger.info(f"[{self.execution_id}] Resuming: {task_name} already succeeded at {done_before['finished']}")
+                                task_results[task_name] = {"success": True, "resumed": True, "finished": done_before["finished"]}
+                                _emit(on_event, _task_event(task_name, task_results[task_name]))
+                                continue
+                            logger.info(f"[{self.execution_id}] Starting task: {task_name}")
+                            _emit(on_event, {"event": "task_started", "task": task_name})
+                            future = executor.submit(self._run_task, task_name, start_date, end_date, options, fingerprint)
+                            running[future] = task_name
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_name = running.pop(future)
+                    try:
+                        res = future.result()
+                    except Exception as e:
+                        res = {"success": False, "error": str(e)}
+                    task_results[task_name] = res
+                    _emit(on_event, _task_event(task_name, res))
+                    if res.get("skipped"):
+                        logger.info(f"[{self.execution_id}] Task skipped: {task_name} ({res.get('reason')})")
+                    elif res.get("success"):
+                        metrics = res.get("metrics", {})
+                        logger.info(f"[{self.execution_id}] Task completed: {task_name} "
+                                    f"({metrics.get('wall_seconds', 0):.2f}s, rows affected: {metrics.get('rows_affected', 'n/a')})")
+                    else:
+                        logger.error(f"[{self.execution_id}] Task failed: {task_name} -> {res.get('error')}")
+                        failed = True
+
+        # Report tasks in dependency order regardless of completion order
+        for task_name in task_order:
+            if task_name in task_results:
+                results["tasks"][task_name] = task_results[task_name]
         return results
+
+    def _run_task(self, task_name: str, start_date: str, end_date: str, options: dict, fingerprint: str = None) -> dict:
+        """Run one task, add wall/CPU/memory usage to its metrics, export them and record the outcome in the ledger."""
+        if self.ledger:
+            self.ledger.record(self.execution_id, task_name, start_date, end_date, "running", fingerprint)
+        with telemetry.track() as usage:
+            try:
+                res = _get_task_fn(task_name)(start_date, end_date, self.execution_id, pool=self.pool, **options)
+            except Exception as e:
+                res = {"success": False, "error": str(e)}
+        res.setdefault("metrics", {}).update(usage)
+        if self.metrics:
+            self.metrics.write(telemetry.task_records(self.execution_id, task_name, res, start_date=start_date, end_date=end_date))
+        if self.ledger:
+            state = "succeeded" if res.get("success") else "failed"
+            self.ledger.record(self.execution_id, task_name, start_date, end_date, state, fingerprint, res)
+        return res
+
+    def backfill(self, start_date: str, end_date: str, granularity: str = "month", resume: bool = False) -> dict:
+        """
+        Rebuild a long history: the dimension tasks run once, then the fact tasks run per
+        month or quarter slice, up to `max_workers` slices at a time, then the maintenance
+        tasks (snapshot retention) run once if every slice succeeded.
+        Slices are independent, so a failed slice does not stop the others; with resume,
+        a rerun under the same execution_id only repeats what did not succeed.
+        Returns one report with the dimension results, every slice's fact results and the
+        maintenance results. Backfills are full loads: an incremental slice would only hold
+        the changed orders of its window in the new snapshot.
+        """
+        if self.task_options["load_mode"] != "full":
+            raise ValueError(f"backfill rebuilds every slice in full; load_mode={self.task_options['load_mode']!r} is not supported")
+        slices = _date_slices(start_date, end_date, granularity)
+        fact_tasks = [t for t in self.task_order if t in config.FACT_TASKS]
+        dim_tasks = [t for t in self.task_order if _is_dimension_task(t)]
+        maintenance_tasks = [t for t in self.task_order if t in config.MAINTENANCE_TASKS]
+        report = {
+            "execution_id": self.execution_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularity": granularity,
+            "dimensions": {},
+            "slices": [],
+            "failed_slices": [],
+            "maintenance": {},
+        }
+
+        logger.info(f"[{self.execution_id}] Backfill {start_date}..{end_date}: dimensions once, {len(slices)} {granularity} fact slices")
+        dims = self.exec(start_date, end_date, task_names=dim_tasks, resume=resume)
+        report["dimensions"] = dims["tasks"]
+        if len(dims["tasks"]) < len(dim_tasks) or not all(r.get("success") for r in dims["tasks"].values()):
+            logger.error(f"[{self.execution_id}] Backfill stopped: dimension load failed")
+            report["success"] = False
+            return report
+
+        # Each slice runs its own fact chain (fact_orders -> fact_error); one connection per running task
+        slice_results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dds-backfill") as executor:
+            futures = {
+                executor.submit(self.exec, slice_start, slice_end, fact_tasks, resume): (slice_start, slice_end)
+                for slice_start, slice_end in slices
+            }
+            for future in as_completed(futures):
+                slice_start, slice_end = futures[future]
+                try:
+                    tasks_res = future.result()["tasks"]
+                except Exception as e:
+                    tasks_res = {"error": {"success": False, "error": str(e)}}
+                ok = len(tasks_res) == len(fact_tasks) and all(r.get("success") for r in tasks_res.values())
+                slice_results[(slice_start, slice_end)] = {"start_date": slice_start, "end_date": slice_end, "success": ok, "tasks": tasks_res}
+                logger.info(f"[{self.execution_id}] Backfill slice {slice_start}..{slice_end}: {'ok' if ok else 'FAILED'}")
+
+        report["slices"] = [slice_results[s] for s in slices]
+        report["failed_slices"] = [[r["start_date"], r["end_date"]] for r in report["slices"] if not r["success"]]
+        report["success"] = not report["failed_slices"]
+        if report["success"] and maintenance_tasks:
+            maintenance = self.exec(start_date, end_date, task_names=maintenance_tasks, resume=resume)
+            report["maintenance"] = maintenance["tasks"]
+            report["success"] = len(maintenance["tasks"]) == len(maintenance_tasks) and all(
+                r.get("success") for r in maintenance["tasks"].values())
+        return report
@@ -0,0 +1,395 @@
+"""
+In-memory surrogate-key resolution for the fact load (config.KEY_RESOLVER = "python").
+
+The dimension key maps are read once per flow run and kept as sorted numpy arrays:
+    SCD1/SCD3 dimensions  - natural keys sorted with their surrogate keys (one binary search)
+    SCD2 dimensions       - versions sorted by (natural key, effective_start_dt); one binary
+                            search finds the last version starting on or before the order
+                            date, which is then checked against its effective_end_dt
+Every order line of the window is resolved with vectorized searchsorted calls, then the
+resolved lines are written to FactOrders and the unresolved ones to fact_error in batches,
+so the lookup CPU runs in the pipeline process instead of on SQL Server.
+
+Only DB-API calls are used, so a local stand-in database (e.g. sqlite3) can exercise it.
+numpy is optional: without it the SQL resolver is the only one available.
+"""
+
+import threading
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import ConnectionPool, get_pool
+from staging_bulk_load import DEFAULT_BACKEND, BatchSizeTuner, insert_batches
+
+logger = getLogger(__name__)
+
+# Days are packed below the natural-key code in one int64 search key
+_DAY_BITS = 24
+_DAY_OFFSET = 1 << (_DAY_BITS - 1)
+_SECONDS_PER_DAY = 86400
+
+_ORDER_LINES_SQL = (
+    "SELECT o.OrderID, od.ProductID, o.staging_raw_id_sk, od.staging_raw_id_sk, "
+    "o.CustomerID, o.EmployeeID, o.ShipVia, o.TerritoryID, "
+    "o.OrderDate_dt, o.RequiredDate, o.ShippedDate, "
+    "od.Quantity, od.UnitPrice, od.Discount, o.Freight "
+    f"FROM {config.SRC_SCHEMA}.Orders o "
+    f"JOIN {config.SRC_SCHEMA}.OrderDetails od ON od.OrderID = o.OrderID "
+    "WHERE o.OrderDate_dt >= ? AND o.OrderDate_dt <= ?"
+)
+
+FACT_COLUMNS = [
+    "snapshot_dt", "OrderID_nk", "ProductID_nk",
+    "Customer_SK", "Employee_SK", "Shipper_SK", "Territory_SK", "Product_SK",
+    "OrderDate", "RequiredDate", "ShippedDate",
+    "Quantity", "UnitPrice", "Discount", "Freight",
+]
+FACT_ERROR_COLUMNS = [
+    "snapshot_dt", "OrderID_nk", "ProductID_nk",
+    "Orders_staging_raw_id_nk", "OrderDetails_staging_raw_id_nk",
+    "CustomerID_nk", "EmployeeID_nk", "ShipperID_nk", "TerritoryID_nk",
+    "OrderDate", "RequiredDate", "ShippedDate",
+    "Quantity", "UnitPrice", "Discount", "Freight",
+    "error_reason",
+]
+
+
+def resolver_available() -> bool:
+    return np is not None
+
+
+def _parse_int(value) -> Optional[int]:
+    """Integer natural key from staging text, as SQL Server converts it (N'01581' -> 1581)."""
+    if value is None:
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _int_keys(values) -> Tuple["np.ndarray", "np.ndarray"]:
+    parsed = [_parse_int(v) for v in values]
+    valid = np.array([p is not None for p in parsed], dtype=bool)
+    keys = np.array([p if p is not None else 0 for p in parsed], dtype=np.int64)
+    return keys, valid
+
+
+def _text_keys(values) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Text natural keys compared like the default collation: case-insensitive, trailing spaces ignored."""
+    valid = np.array([v is not None for v in values], dtype=bool)
+    keys = np.array(["" if v is None else str(v).rstrip().upper() for v in values], dtype=str)
+    return keys, valid
+
+
+def _stamp(value) -> "np.datetime64":
+    try:
+        return np.datetime64(value, "s")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT")
+
+
+def _days(values, ceil: bool = False) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Day numbers (since 1970-01-01) of dates, datetimes or ISO strings; NULL/'' and text that
+    is not an ISO date -> invalid (like TRY_CONVERT, instead of failing the load).
+    With ceil, a timestamp after midnight counts as the next day, so `start <= order date`
+    keeps its meaning when compared in whole days.
+    """
+    values = list(values)
+    try:
+        stamps = np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        stamps = np.array([_stamp(v) for v in values], dtype="datetime64[s]")
+    valid = ~np.isnat(stamps)
+    seconds = np.where(valid, stamps.astype(np.int64), 0)
+    days = np.floor_divide(seconds, _SECONDS_PER_DAY)
+    if ceil:
+        days = days + (np.mod(seconds, _SECONDS_PER_DAY) > 0)
+    return days.astype(np.int64), valid
+
+
+def _given(values) -> "np.ndarray":
+    """Values that are neither NULL nor blank."""
+    return np.array([v is not None and str(v).strip() != "" for v in values], dtype=bool)
+
+
+def _to_dates(days, valid) -> List[Optional[date]]:
+    as_dates = days.astype("datetime64[D]").astype(object)
+    return [d if ok else None for d, ok in zip(as_dates, valid)]
+
+
+def _decimal(value, places: int) -> Optional[Decimal]:
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        return Decimal(str(value).strip()).quantize(Decimal(1).scaleb(-places))
+    except InvalidOperation:
+        return None
+
+
+class ExactIndex:
+    """Surrogate keys of a dimension with one row per natural key (SCD1/SCD3)."""
+
+    def __init__(self, nks, sks):
+        order = np.argsort(nks, kind="stable")
+        self.nks = nks[order]
+        self.sks = np.asarray(sks, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.nks)
+
+    def lookup(self, keys, valid) -> "np.ndarray":
+        """Surrogate key per query key, -1 where it does not resolve."""
+        out = np.full(len(keys), -1, dtype=np.int64)
+        if not len(self.nks) or not len(keys):
+            return out
+        pos = np.minimum(np.searchsorted(self.nks, keys), len(self.nks) - 1)
+        hit = valid & (self.nks[pos] == keys)
+        out[hit] = self.sks[pos[hit]]
+        return out
+
+
+class IntervalIndex:
+    """
+    Surrogate keys of an SCD2 dimension: every version of a natural key with its
+    [effective_start_dt, effective_end_dt] interval, answering "version in force on day d".
+    """
+
+    def __init__(self, nks, starts, ends, sks):
+        start_days, start_ok = _days(starts, ceil=True)
+        end_days, end_ok = _days(ends)
+        keep = start_ok & end_ok
+        nks, start_days, end_days = nks[keep], start_days[keep], end_days[keep]
+        sks = np.asarray(sks, dtype=np.int64)[keep]
+
+        self.domain = np.unique(nks)
+        codes = np.searchsorted(self.domain, nks).astype(np.int64)
+        order = np.lexsort((start_days, codes))
+        self.codes = codes[order]
+        self.end_days = end_days[order]
+        self.sks = sks[order]
+        # (natural key, start) sorted as one int64 key
+        self.search_keys = (self.codes << _DAY_BITS) + start_days[order] + _DAY_OFFSET
+
+    def __len__(self):
+        return len(self.sks)
+
+    def lookup(self, keys, valid, days, days_valid) -> "np.ndarray":
+        out = np.full(len(keys), -1, dtype=np.int64)
+        if not len(self.sks) or not len(keys):
+            return out
+        code = np.minimum(np.searchsorted(self.domain, keys), len(self.domain) - 1).astype(np.int64)
+        known = valid & days_valid & (self.domain[code] == keys)
+        query = (code << _DAY_BITS) + days + _DAY_OFFSET
+        idx = np.searchsorted(self.search_keys, query, side="right") - 1
+        pos = np.maximum(idx, 0)
+        hit = known & (idx >= 0) & (self.codes[pos] == code) & (self.end_days[pos] >= days)
+        out[hit] = self.sks[pos[hit]]
+        return out
+
+
+class KeyMaps:
+    """The five dimension key maps the fact load resolves against."""
+
+    def __init__(self, customers: IntervalIndex, products: IntervalIndex,
+                 employees: ExactIndex, shippers: ExactIndex, territories: ExactIndex):
+        self.customers = customers
+        self.products = products
+        self.employees = employees
+        self.shippers = shippers
+        self.territories = territories
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(cls, cursor) -> "KeyMaps":
+        def fetch(sql):
+            cursor.execute(sql)
+            rows = cursor.fetchall()
+            return [list(col) for col in zip(*rows)] if rows else None
+
+        dims = config.dim_tables
+        rows = fetch(f"SELECT CustomerID_nk, effective_start_dt, effective_end_dt, Customer_SK FROM {dims['DimCustomers']}")
+        customers = IntervalIndex(_text_keys(rows[0])[0], rows[1], rows[2], rows[3]) if rows else \
+            IntervalIndex(np.array([], dtype=str), [], [], [])
+
+        def interval_int(sql):
+            rows = fetch(sql)
+            if not rows:
+                return IntervalIndex(np.array([], dtype=np.int64), [], [], [])
+            return IntervalIndex(_int_keys(rows[0])[0], rows[1], rows[2], rows[3])
+
+        def exact_int(sql):
+            rows = fetch(sql)
+            if not rows:
+                return ExactIndex(np.array([], dtype=np.int64), [])
+            return ExactIndex(_int_keys(rows[0])[0], rows[1])
+
+        products = interval_int(
+            f"SELECT ProductID_nk, effective_start_dt, effective_end_dt, Product_SK FROM {dims['DimProducts']} "
+            "WHERE COALESCE(is_deleted, 0) = 0"
+        )
+        employees = exact_int(f"SELECT EmployeeID_nk, Employee_SK FROM {dims['DimEmployees']} WHERE COALESCE(is_deleted, 0) = 0")
+        shippers = exact_int(f"SELECT ShipperID_nk, Shipper_SK FROM {dims['DimShippers']}")
+        territories = exact_int(f"SELECT TerritoryID_nk, Territory_SK FROM {dims['DimTerritories']}")
+        maps = cls(customers, products, employees, shippers, territories)
+        logger.info(
+            f"Loaded key maps: {len(customers)} customer versions, {len(products)} product versions, "
+            f"{len(employees)} employees, {len(shippers)} shippers, {len(territories)} territories"
+        )
+        return maps
+
+    def resolve(self, lines: List[tuple]) -> Dict[str, Any]:
+        """Resolve order lines (rows of _ORDER_LINES_SQL); returns the surrogate-key arrays (-1: unresolved)."""
+        cols = [list(col) for col in zip(*lines)] if lines else [[] for _ in range(15)]
+        order_days, order_days_ok = _days(cols[8])
+        customer_keys, customer_ok = _text_keys(cols[4])
+        product_keys, product_ok = _int_keys(cols[1])
+        resolved = {
+            "Customer_SK": self.customers.lookup(customer_keys, customer_ok, order_days, order_days_ok),
+            "Employee_SK": self.employees.lookup(*_int_keys(cols[5])),
+            "Shipper_SK": self.shippers.lookup(*_int_keys(cols[6])),
+            "Territory_SK": self.territories.lookup(*_int_keys(cols[7])),
+            "Product_SK": self.products.lookup(product_keys, product_ok, order_days, order_days_ok),
+        }
+        reasons = np.full(len(lines), "", dtype=str)
+        for name, label in (("Customer_SK", "Customer"), ("Employee_SK", "Employee"), ("Shipper_SK", "Shipper"),
+                            ("Territory_SK", "Territory"), ("Product_SK", "Product")):
+            reasons = np.char.add(reasons, np.where(resolved[name] < 0, f"Missing {label}; ", ""))
+        resolved["OrderDate"] = _to_dates(order_days, order_days_ok)
+        for name, col in (("RequiredDate", 9), ("ShippedDate", 10)):
+            days, ok = _days(cols[col])
+            resolved[name] = _to_dates(days, ok)
+            reasons = np.char.add(reasons, np.where(_given(cols[col]) & ~ok, f"Invalid {name}; ", ""))
+        resolved["error_reason"] = reasons.tolist()
+        return resolved
+
+
+class KeyMapCache:
+    """
+    Key maps shared by all fact tasks of a flow. Loaded on first use and kept until
+    invalidate() - the flow invalidates it whenever it reruns dimension tasks, so
+    backfill slices after one dimension pass all reuse the same maps.
+    """
+
+    def __init__(self):
+        self._maps: Optional[KeyMaps] = None
+        self._lock = threading.Lock()
+
+    def get(self, cursor) -> KeyMaps:
+        with self._lock:
+            if self._maps is None:
+                self._maps = KeyMaps.load(cursor)
+            return self._maps
+
+    def invalidate(self):
+        with self._lock:
+            self._maps = None
+
+
+def build_facts(
+    start_date: str,
+    end_date: str,
+    execution_id: str,
+    pool: ConnectionPool = None,
+    key_maps: KeyMapCache = None,
+    backend: str = DEFAULT_BACKEND,
+) -> Dict[str, Any]:
+    """
+    Resolve the order lines of [start_date, end_date] in memory and write FactOrders and
+    fact_error in one transaction. The window's FactOrders rows of today's snapshot are
+    replaced; unresolved lines already in fact_error or FactOrders for the snapshot grain are
+    skipped, as in the SQL builders. Lines with an unreadable RequiredDate or ShippedDate
+    go to fact_error.
+    """
+    if np is None:
+        return {"success": False, "error": "The python key resolver needs numpy"}
+    pool = pool or get_pool()
+    key_maps = key_maps or KeyMapCache()
+    snapshot_dt = date.today()
+    metrics = {}
+    conn = None
+    broken = False
+    try:
+        conn = pool.acquire(stats=metrics)
+        cursor = conn.cursor()
+        maps = key_maps.get(cursor)
+
+        window = (date.fromisoformat(start_date), date.fromisoformat(end_date))
+        cursor.execute(_ORDER_LINES_SQL, window)
+        lines = cursor.fetchall()
+        started = time.perf_counter()
+        resolved = maps.resolve(lines)
+        resolve_seconds = time.perf_counter() - started
+
+        fact_rows, error_rows, skipped = [], [], 0
+        for i, line in enumerate(lines):
+            order_id, product_id = _parse_int(line[0]), _parse_int(line[1])
+            if order_id is None or product_id is None:
+                skipped += 1
+                continue
+            measures = (
+                resolved["OrderDate"][i], resolved["RequiredDate"][i], resolved["ShippedDate"][i],
+                _parse_int(line[11]), _decimal(line[12], 2), _decimal(line[13], 4), _decimal(line[14], 2),
+            )
+            if resolved["error_reason"][i]:
+                error_rows.append((
+                    snapshot_dt, order_id, product_id, line[2], line[3],
+                    line[4], _parse_int(line[5]), _parse_int(line[6]), _parse_int(line[7]),
+                ) + measures + (resolved["error_reason"][i],))
+            else:
+                sks = tuple(int(resolved[c][i]) for c in ("Customer_SK", "Employee_SK", "Shipper_SK", "Territory_SK", "Product_SK"))
+                fact_rows.append((snapshot_dt, order_id, product_id) + sks + measures)
+
+        # Replace the window of today's snapshot in one statement (the SQL builder's MERGE)
+        cursor.execute(
+            f"DELETE FROM {config.FACT_TABLE} WHERE snapshot_dt = ? AND OrderDate >= ? AND OrderDate <= ?",
+            (snapshot_dt,) + window,
+        )
+        fact_stats = insert_batches(cursor, config.FACT_TABLE, FACT_COLUMNS, fact_rows, backend=backend, tuner=BatchSizeTuner())
+
+        if error_rows:
+            # The grain of the window already reported for the snapshot (the SQL builders' NOT EXISTS)
+            reported = set()
+            for table in (config.FACT_ERROR_TABLE, config.FACT_TABLE):
+                cursor.execute(
+                    f"SELECT OrderID_nk, ProductID_nk FROM {table} WHERE snapshot_dt = ? AND OrderDate >= ? AND OrderDate <= ?",
+                    (snapshot_dt,) + window,
+                )
+                reported.update((int(r[0]), int(r[1])) for r in cursor.fetchall())
+            error_rows = [row for row in error_rows if (row[1], row[2]) not in reported]
+        error_stats = insert_batches(cursor, config.FACT_ERROR_TABLE, FACT_ERROR_COLUMNS, error_rows, backend=backend, tuner=BatchSizeTuner())
+
+        conn.commit()
+        metrics["rows_affected"] = fact_stats["rows"] + error_stats["rows"]
+        logger.info(f"[{execution_id}] Resolved {len(lines)} order lines in memory ({resolve_seconds:.3f}s): "
+                    f"{fact_stats['rows']} facts, {error_stats['rows']} errors")
+        return {
+            "success": True,
+            "resolver": "python",
+            "lines": len(lines),
+            "fact_rows": fact_stats["rows"],
+            "error_rows": error_stats["rows"],
+            "skipped_lines": skipped,
+            "resolve_seconds": resolve_seconds,
+            "metrics": metrics,
+        }
+    except Exception as e:
+        if conn:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        return {"success": False, "error": str(e), "metrics": metrics}
+    finally:
+        if conn:
+            pool.release(conn, discard=broken)
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 DECLARE @SOR_SK INT = (
@@ -9,7 +7,9 @@ DECLARE @SOR_SK INT = (
 );
 IF @SOR_SK IS NULL THROW 50000, 'Dim_SOR missing row for staging.Categories', 1;
 
--- Update existing (SCD1)
+-- Update existing (SCD1): changed or undeleted members only; staging_raw_id_nk is the
+-- staging row of the last change, so a reload of unchanged rows updates nothing
+-- (row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql)
 UPDATE d
 SET d.SOR_SK = @SOR_SK,
     d.staging_raw_id_nk = s.staging_raw_id_sk,
@@ -19,7 +19,9 @@ SET d.SOR_SK = @SOR_SK,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimCategories d
 JOIN staging.Categories s
-  ON s.CategoryID = d.CategoryID_nk;
+  ON s.CategoryID = d.CategoryID_nk
+WHERE d.row_hash <> s.row_hash
+   OR d.is_deleted = 1;
 
 -- Insert new
 INSERT INTO dbo.DimCategories (
@@ -37,7 +39,8 @@ UPDATE d
 SET d.is_deleted = 1,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimCategories d
-WHERE NOT EXISTS (
+WHERE d.is_deleted = 0
+  AND NOT EXISTS (
   SELECT 1 FROM staging.Categories s WHERE s.CategoryID = d.CategoryID_nk
 );
 GO
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 DECLARE @open_end DATETIME2(0) = '9999-12-31 00:00:00';
@@ -22,17 +20,11 @@ INTO #cust_changes
 FROM staging.Customers s
 LEFT JOIN dbo.DimCustomers c
   ON c.CustomerID_nk = s.CustomerID AND c.is_current = 1
+-- row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql.
+-- Unchanged members are left alone: staging_raw_id_nk stays the staging row of the
+-- version's change, so a reload of unchanged rows updates nothing
 WHERE c.Customer_SK IS NULL
-   OR ISNULL(c.CompanyName,'')  <> ISNULL(s.CompanyName,'')
-   OR ISNULL(c.ContactName,'')  <> ISNULL(s.ContactName,'')
-   OR ISNULL(c.ContactTitle,'') <> ISNULL(s.ContactTitle,'')
-   OR ISNULL(c.Address,'')      <> ISNULL(s.Address,'')
-   OR ISNULL(c.City,'')         <> ISNULL(s.City,'')
-   OR ISNULL(c.Region,'')       <> ISNULL(s.Region,'')
-   OR ISNULL(c.PostalCode,'')   <> ISNULL(s.PostalCode,'')
-   OR ISNULL(c.Country,'')      <> ISNULL(s.Country,'')
-   OR ISNULL(c.Phone,'')        <> ISNULL(s.Phone,'')
-   OR ISNULL(c.Fax,'')          <> ISNULL(s.Fax,'');
+   OR c.row_hash <> s.row_hash;
 
 -- Close current rows that changed
 UPDATE c
@@ -58,14 +50,4 @@ SELECT
 FROM #cust_changes ch
 JOIN staging.Customers s
   ON s.CustomerID = ch.CustomerID_nk;
-
--- Refresh traceability for unchanged current rows (optional but very useful)
-UPDATE c
-SET c.SOR_SK = @SOR_SK,
-    c.staging_raw_id_nk = s.staging_raw_id_sk
-FROM dbo.DimCustomers c
-JOIN staging.Customers s
-  ON s.CustomerID = c.CustomerID_nk
-WHERE c.is_current = 1
-  AND NOT EXISTS (SELECT 1 FROM #cust_changes ch WHERE ch.CustomerID_nk = c.CustomerID_nk);
 GO
\ No newline at end of file
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 DECLARE @SOR_SK INT = (
@@ -9,7 +7,9 @@ DECLARE @SOR_SK INT = (
 );
 IF @SOR_SK IS NULL THROW 50000, 'Dim_SOR missing row for staging.Employees', 1;
 
--- Update existing
+-- Update existing: changed or undeleted members only; staging_raw_id_nk is the
+-- staging row of the last change, so a reload of unchanged rows updates nothing
+-- (row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql)
 UPDATE d
 SET d.SOR_SK = @SOR_SK,
     d.staging_raw_id_nk = s.staging_raw_id_sk,
@@ -17,23 +17,25 @@ SET d.SOR_SK = @SOR_SK,
     d.FirstName = s.FirstName,
     d.Title = s.Title,
     d.TitleOfCourtesy = s.TitleOfCourtesy,
-    d.BirthDate = s.BirthDate,
-    d.HireDate  = s.HireDate,
+    d.BirthDate = NULLIF(s.BirthDate, ''),
+    d.HireDate  = NULLIF(s.HireDate, ''),
     d.Address   = s.Address,
     d.City      = s.City,
     d.Region    = s.Region,
     d.PostalCode = s.PostalCode,
     d.Country   = s.Country,
     d.HomePhone = s.HomePhone,
-    d.Extension = s.Extension,
+    d.Extension = NULLIF(s.Extension, ''),
     d.Notes     = s.Notes,
-    d.ReportsTo_EmployeeID_nk = s.ReportsTo,
+    d.ReportsTo_EmployeeID_nk = NULLIF(s.ReportsTo, ''),
     d.PhotoPath = s.PhotoPath,
     d.is_deleted = 0,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimEmployees d
 JOIN staging.Employees s
-  ON s.EmployeeID = d.EmployeeID_nk;
+  ON s.EmployeeID = d.EmployeeID_nk
+WHERE d.row_hash <> s.row_hash
+   OR d.is_deleted = 1;
 
 -- Insert new
 INSERT INTO dbo.DimEmployees (
@@ -45,9 +47,9 @@ INSERT INTO dbo.DimEmployees (
 )
 SELECT
   @SOR_SK, s.staging_raw_id_sk, s.EmployeeID,
-  s.LastName, s.FirstName, s.Title, s.TitleOfCourtesy, s.BirthDate, s.HireDate,
+  s.LastName, s.FirstName, s.Title, s.TitleOfCourtesy, NULLIF(s.BirthDate, ''), NULLIF(s.HireDate, ''),
   s.Address, s.City, s.Region, s.PostalCode, s.Country,
-  s.HomePhone, s.Extension, s.Notes, s.ReportsTo, s.PhotoPath,
+  s.HomePhone, NULLIF(s.Extension, ''), s.Notes, NULLIF(s.ReportsTo, ''), s.PhotoPath,
   0, @as_of_dt
 FROM staging.Employees s
 WHERE NOT EXISTS (
@@ -59,7 +61,8 @@ UPDATE d
 SET d.is_deleted = 1,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimEmployees d
-WHERE NOT EXISTS (
+WHERE d.is_deleted = 0
+  AND NOT EXISTS (
   SELECT 1 FROM staging.Employees s WHERE s.EmployeeID = d.EmployeeID_nk
 );
 GO
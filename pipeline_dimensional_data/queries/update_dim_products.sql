@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 DECLARE @open_end DATETIME2(0) = '9999-12-31 00:00:00';
@@ -22,16 +20,9 @@ INTO #prod_changes
 FROM staging.Products s
 LEFT JOIN dbo.DimProducts p
   ON p.ProductID_nk = s.ProductID AND p.is_current = 1
+-- row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql
 WHERE p.Product_SK IS NULL
-   OR ISNULL(p.ProductName,'')     <> ISNULL(s.ProductName,'')
-   OR ISNULL(p.SupplierID_nk,-1)   <> ISNULL(s.SupplierID,-1)
-   OR ISNULL(p.CategoryID_nk,-1)   <> ISNULL(s.CategoryID,-1)
-   OR ISNULL(p.QuantityPerUnit,'') <> ISNULL(s.QuantityPerUnit,'')
-   OR ISNULL(p.UnitPrice,0)        <> ISNULL(s.UnitPrice,0)
-   OR ISNULL(p.UnitsInStock,-1)    <> ISNULL(s.UnitsInStock,-1)
-   OR ISNULL(p.UnitsOnOrder,-1)    <> ISNULL(s.UnitsOnOrder,-1)
-   OR ISNULL(p.ReorderLevel,-1)    <> ISNULL(s.ReorderLevel,-1)
-   OR ISNULL(p.Discontinued,0)     <> ISNULL(s.Discontinued,0)
+   OR p.row_hash <> s.row_hash
    OR p.is_deleted = 1;
 
 -- Close changed current rows
@@ -52,8 +43,8 @@ INSERT INTO dbo.DimProducts (
 )
 SELECT
   @SOR_SK, s.staging_raw_id_sk, s.ProductID,
-  s.ProductName, s.SupplierID, s.CategoryID, s.QuantityPerUnit, s.UnitPrice,
-  s.UnitsInStock, s.UnitsOnOrder, s.ReorderLevel, s.Discontinued,
+  s.ProductName, NULLIF(s.SupplierID, ''), NULLIF(s.CategoryID, ''), s.QuantityPerUnit, NULLIF(s.UnitPrice, ''),
+  NULLIF(s.UnitsInStock, ''), NULLIF(s.UnitsOnOrder, ''), NULLIF(s.ReorderLevel, ''), NULLIF(s.Discontinued, ''),
   @as_of_dt, @open_end, 1, ch.new_version_num, 0
 FROM #prod_changes ch
 JOIN staging.Products s
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 DECLARE @SOR_SK INT = (
@@ -9,7 +7,9 @@ DECLARE @SOR_SK INT = (
 );
 IF @SOR_SK IS NULL THROW 50000, 'Dim_SOR missing row for staging.Shippers', 1;
 
--- Update existing
+-- Update existing: changed members only; staging_raw_id_nk is the staging row of the
+-- last change, so a reload of unchanged rows updates nothing
+-- (row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql)
 UPDATE d
 SET d.SOR_SK = @SOR_SK,
     d.staging_raw_id_nk = s.staging_raw_id_sk,
@@ -18,7 +18,8 @@ SET d.SOR_SK = @SOR_SK,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimShippers d
 JOIN staging.Shippers s
-  ON s.ShipperID = d.ShipperID_nk;
+  ON s.ShipperID = d.ShipperID_nk
+WHERE d.row_hash <> s.row_hash;
 
 -- Insert new
 INSERT INTO dbo.DimShippers (
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 
@@ -18,17 +16,8 @@ INTO #supp_changed
 FROM dbo.DimSuppliers d
 JOIN staging.Suppliers s
   ON s.SupplierID = d.SupplierID_nk
-WHERE ISNULL(d.CompanyName,'')  <> ISNULL(s.CompanyName,'')
-   OR ISNULL(d.ContactName,'')  <> ISNULL(s.ContactName,'')
-   OR ISNULL(d.ContactTitle,'') <> ISNULL(s.ContactTitle,'')
-   OR ISNULL(d.Address,'')      <> ISNULL(s.Address,'')
-   OR ISNULL(d.City,'')         <> ISNULL(s.City,'')
-   OR ISNULL(d.Region,'')       <> ISNULL(s.Region,'')
-   OR ISNULL(d.PostalCode,'')   <> ISNULL(s.PostalCode,'')
-   OR ISNULL(d.Country,'')      <> ISNULL(s.Country,'')
-   OR ISNULL(d.Phone,'')        <> ISNULL(s.Phone,'')
-   OR ISNULL(d.Fax,'')          <> ISNULL(s.Fax,'')
-   OR ISNULL(d.HomePage,'')     <> ISNULL(s.HomePage,'');
+-- row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql
+WHERE d.row_hash <> s.row_hash;
 
 -- 1) Write OLD current values to history (with a reasonable period)
 INSERT INTO dbo.DimSuppliers_History (
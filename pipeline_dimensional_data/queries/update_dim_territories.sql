@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 DECLARE @as_of_dt DATETIME2(0) = SYSDATETIME();
 
@@ -16,18 +14,20 @@ INSERT INTO dbo.DimTerritories (
   TerritoryDescription_Current, TerritoryDescription_Prior, last_updated_dt
 )
 SELECT
-  @SOR_SK, s.staging_raw_id_sk, s.TerritoryID, s.RegionID, s.TerritoryCode,
+  @SOR_SK, s.staging_raw_id_sk, s.TerritoryID, NULLIF(s.RegionID, ''), s.TerritoryCode,
   s.TerritoryDescription, NULL, @as_of_dt
 FROM staging.Territories s
 WHERE NOT EXISTS (
   SELECT 1 FROM dbo.DimTerritories d WHERE d.TerritoryID_nk = s.TerritoryID
 );
 
--- Update existing (shift current->prior only if changed)
+-- Update existing changed members (shift current->prior only if the description changed);
+-- staging_raw_id_nk is the staging row of the last change, so a reload of unchanged rows updates nothing
+-- (row_hash: tracked attributes, see infrastructure_initiation/row_hash_definitions.sql)
 UPDATE d
 SET d.SOR_SK = @SOR_SK,
     d.staging_raw_id_nk = s.staging_raw_id_sk,
-    d.RegionID_nk = s.RegionID,
+    d.RegionID_nk = NULLIF(s.RegionID, ''),
     d.TerritoryCode = s.TerritoryCode,
     d.TerritoryDescription_Prior =
       CASE WHEN ISNULL(d.TerritoryDescription_Current,'') <> ISNULL(s.TerritoryDescription,'')
@@ -42,5 +42,6 @@ SET d.SOR_SK = @SOR_SK,
     d.last_updated_dt = @as_of_dt
 FROM dbo.DimTerritories d
 JOIN staging.Territories s
-  ON s.TerritoryID = d.TerritoryID_nk;
+  ON s.TerritoryID = d.TerritoryID_nk
+WHERE d.row_hash <> s.row_hash;
 GO
@@ -1,7 +1,5 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 /* =========================
    PARAMETERS (set these)
@@ -9,8 +7,58 @@ GO
 DECLARE @start_date DATE = '{{START_DATE}}';
 DECLARE @end_date   DATE = '{{END_DATE}}';
 
--- Snapshot date (the day you run the load)
-DECLARE @snapshot_dt DATE = CAST(SYSDATETIME() AS DATE);
+-- Snapshot date (the day of the run; tasks.run_sql_script passes it, the same for every slice)
+DECLARE @snapshot_dt DATE = '{{SNAPSHOT_DT}}';
+
+/* =========================
+   LOAD MODE
+   'full'        : every order in the date window
+   'incremental' : only orders whose header or lines were staged after this task's
+                   watermark for the window in dbo.pipeline_watermark (changed rows get new
+                   staging ids); lines of unchanged orders that are still staged are carried
+                   forward from the snapshot of the window's last incremental run, so the
+                   new snapshot is complete
+   ========================= */
+DECLARE @load_mode    NVARCHAR(20)  = '{{LOAD_MODE}}';
+DECLARE @execution_id NVARCHAR(100) = '{{EXECUTION_ID}}';
+
+/* =========================
+   ORDER SLICE (chunked mode, see tasks.run_fact_script_sliced)
+   NULL bounds: the whole window in one transaction.
+   Non-numeric OrderIDs are picked up by the final slice.
+   ========================= */
+DECLARE @order_id_lo INT = {{ORDER_ID_LO}};
+DECLARE @order_id_hi INT = {{ORDER_ID_HI}};
+DECLARE @is_final_slice INT = {{IS_FINAL_SLICE}};
+
+-- This task's watermarks for the window (0 in full mode): tasks.run_sql_script reads them from
+-- dbo.pipeline_watermark and advances them to the high-water marks in this transaction
+DECLARE @wm_orders INT = {{WM_ORDERS}};
+DECLARE @wm_order_details INT = {{WM_ORDER_DETAILS}};
+
+-- The snapshot the run that set these watermarks wrote, recorded with them: the last one known
+-- to hold every line of this window. NULL when none is recorded (the watermarks are then 0)
+DECLARE @prev_snapshot_dt DATE = NULLIF('{{PREV_SNAPSHOT_DT}}', '');
+
+-- Upper bounds fixed up front (or by the first slice of a chunked run): rows staged
+-- while this runs are left for the next run
+DECLARE @hw_orders INT = {{HW_ORDERS}};
+DECLARE @hw_order_details INT = {{HW_ORDER_DETAILS}};
+IF @hw_orders IS NULL
+    SET @hw_orders = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.Orders);
+IF @hw_order_details IS NULL
+    SET @hw_order_details = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.OrderDetails);
+
+IF OBJECT_ID('tempdb..#changed_orders') IS NOT NULL DROP TABLE #changed_orders;
+CREATE TABLE #changed_orders (OrderID NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);
+
+IF @load_mode = N'incremental'
+    INSERT INTO #changed_orders (OrderID)
+    SELECT OrderID FROM staging.Orders
+    WHERE staging_raw_id_sk > @wm_orders AND staging_raw_id_sk <= @hw_orders
+    UNION
+    SELECT OrderID FROM staging.OrderDetails
+    WHERE staging_raw_id_sk > @wm_order_details AND staging_raw_id_sk <= @hw_order_details;
 
 ;WITH src AS (
     SELECT
@@ -24,7 +72,7 @@ DECLARE @snapshot_dt DATE = CAST(SYSDATETIME() AS DATE);
         t.Territory_SK AS Territory_SK,
         p.Product_SK   AS Product_SK,
 
-        CAST(o.OrderDate AS DATE)    AS OrderDate,
+        o.OrderDate_dt               AS OrderDate,
         CAST(o.RequiredDate AS DATE) AS RequiredDate,
         CAST(o.ShippedDate AS DATE)  AS ShippedDate,
 
@@ -39,8 +87,8 @@ DECLARE @snapshot_dt DATE = CAST(SYSDATETIME() AS DATE);
     -- Customer is SCD2: choose version valid at OrderDate
     JOIN dbo.DimCustomers c
       ON c.CustomerID_nk = o.CustomerID
-     AND c.effective_start_dt <= o.OrderDate
-     AND c.effective_end_dt   >= o.OrderDate
+     AND c.effective_start_dt <= o.OrderDate_dt
+     AND c.effective_end_dt   >= o.OrderDate_dt
 
     -- Employee is SCD1 (+delete), use current row by NK
     JOIN dbo.DimEmployees e
@@ -58,12 +106,17 @@ DECLARE @snapshot_dt DATE = CAST(SYSDATETIME() AS DATE);
     -- Product is SCD2 (+delete closing): choose version valid at OrderDate
     JOIN dbo.DimProducts p
       ON p.ProductID_nk = od.ProductID
-     AND p.effective_start_dt <= o.OrderDate
-     AND p.effective_end_dt   >= o.OrderDate
+     AND p.effective_start_dt <= o.OrderDate_dt
+     AND p.effective_end_dt   >= o.OrderDate_dt
      AND ISNULL(p.is_deleted, 0) = 0
 
-    WHERE CAST(o.OrderDate AS DATE) >= @start_date
-      AND CAST(o.OrderDate AS DATE) <= @end_date
+    -- OrderDate_dt is a persisted DATE column of staging.Orders, so the range can seek IX_Orders_OrderDate_dt
+    WHERE o.OrderDate_dt >= @start_date
+      AND o.OrderDate_dt <= @end_date
+      AND (@load_mode <> N'incremental' OR o.OrderID IN (SELECT OrderID FROM #changed_orders))
+      AND (@order_id_lo IS NULL
+           OR TRY_CONVERT(INT, o.OrderID) BETWEEN @order_id_lo AND @order_id_hi
+           OR (@is_final_slice = 1 AND TRY_CONVERT(INT, o.OrderID) IS NULL))
 )
 
 MERGE dbo.FactOrders AS tgt
@@ -100,6 +153,65 @@ WHEN NOT MATCHED BY TARGET THEN
     src.OrderDate, src.RequiredDate, src.ShippedDate,
     src.Quantity, src.UnitPrice, src.Discount, src.Freight
   );
+
+/* =========================
+   CARRY FORWARD (incremental): a snapshot holds the whole window, so the lines of
+   unchanged orders are copied from @prev_snapshot_dt. Only lines still in staging are
+   copied: an order or line deleted from the source leaves the snapshot
+   ========================= */
+IF @load_mode = N'incremental' AND @prev_snapshot_dt < @snapshot_dt
+BEGIN
+    INSERT INTO dbo.FactOrders (
+        snapshot_dt, OrderID_nk, ProductID_nk,
+        Customer_SK, Employee_SK, Shipper_SK, Territory_SK, Product_SK,
+        OrderDate, RequiredDate, ShippedDate,
+        Quantity, UnitPrice, Discount, Freight
+    )
+    SELECT
+        @snapshot_dt, f.OrderID_nk, f.ProductID_nk,
+        f.Customer_SK, f.Employee_SK, f.Shipper_SK, f.Territory_SK, f.Product_SK,
+        f.OrderDate, f.RequiredDate, f.ShippedDate,
+        f.Quantity, f.UnitPrice, f.Discount, f.Freight
+    FROM dbo.FactOrders f
+    WHERE f.snapshot_dt = @prev_snapshot_dt
+      AND f.OrderDate >= @start_date
+      AND f.OrderDate <= @end_date
+      AND (@order_id_lo IS NULL
+           OR TRY_CONVERT(INT, f.OrderID_nk) BETWEEN @order_id_lo AND @order_id_hi
+           OR (@is_final_slice = 1 AND TRY_CONVERT(INT, f.OrderID_nk) IS NULL))
+      AND NOT EXISTS (SELECT 1 FROM #changed_orders c WHERE c.OrderID = CAST(f.OrderID_nk AS NVARCHAR(100)))
+      AND EXISTS (
+          SELECT 1
+          FROM staging.Orders so
+          JOIN staging.OrderDetails sod
+            ON sod.OrderID = so.OrderID
+          WHERE so.OrderID = CAST(f.OrderID_nk AS NVARCHAR(100))
+            AND sod.ProductID = CAST(f.ProductID_nk AS NVARCHAR(100))
+      )
+      AND NOT EXISTS (
+          SELECT 1
+          FROM dbo.FactOrders cur
+          WHERE cur.snapshot_dt = @snapshot_dt
+            AND cur.OrderID_nk = f.OrderID_nk
+            AND cur.ProductID_nk = f.ProductID_nk
+      );
+END;
+
+/* =========================
+   SLICE PROGRESS (chunked mode): a completed slice is skipped when the run is resumed;
+   the final slice clears the progress of this window
+   ========================= */
+IF @order_id_lo IS NOT NULL
+BEGIN
+    IF @is_final_slice = 1
+        DELETE FROM dbo.pipeline_fact_progress
+        WHERE consumer = N'fact_orders' AND start_date = @start_date AND end_date = @end_date AND load_mode = @load_mode;
+    ELSE
+        INSERT INTO dbo.pipeline_fact_progress
+            (consumer, start_date, end_date, load_mode, slice_lo, slice_hi, hw_orders, hw_order_details, execution_id)
+        VALUES
+            (N'fact_orders', @start_date, @end_date, @load_mode, @order_id_lo, @order_id_hi, @hw_orders, @hw_order_details, @execution_id);
+END;
 GO
 
 
@@ -1,14 +1,63 @@
 USE ORDER_DDS;
 GO
-SET NOCOUNT ON;
-GO
 
 /* =========================
    PARAMETERS (set these)
    ========================= */
 DECLARE @start_date DATE = '{{START_DATE}}';
 DECLARE @end_date   DATE = '{{END_DATE}}';
-DECLARE @snapshot_dt DATE = CAST(SYSDATETIME() AS DATE);
+-- Snapshot date (the day of the run; tasks.run_sql_script passes it, the same for every slice)
+DECLARE @snapshot_dt DATE = '{{SNAPSHOT_DT}}';
+
+/* =========================
+   LOAD MODE
+   'full'        : every order in the date window
+   'incremental' : only orders whose header or lines were staged after this task's
+                   watermark for the window in dbo.pipeline_watermark (changed rows get new
+                   staging ids); lines of unchanged orders that are still staged are carried
+                   forward from the snapshot of the window's last incremental run, so the
+                   new snapshot is complete
+   ========================= */
+DECLARE @load_mode    NVARCHAR(20)  = '{{LOAD_MODE}}';
+DECLARE @execution_id NVARCHAR(100) = '{{EXECUTION_ID}}';
+
+/* =========================
+   ORDER SLICE (chunked mode, see tasks.run_fact_script_sliced)
+   NULL bounds: the whole window in one transaction.
+   Non-numeric OrderIDs are picked up by the final slice.
+   ========================= */
+DECLARE @order_id_lo INT = {{ORDER_ID_LO}};
+DECLARE @order_id_hi INT = {{ORDER_ID_HI}};
+DECLARE @is_final_slice INT = {{IS_FINAL_SLICE}};
+
+-- This task's watermarks for the window (0 in full mode): tasks.run_sql_script reads them from
+-- dbo.pipeline_watermark and advances them to the high-water marks in this transaction
+DECLARE @wm_orders INT = {{WM_ORDERS}};
+DECLARE @wm_order_details INT = {{WM_ORDER_DETAILS}};
+
+-- The snapshot the run that set these watermarks wrote, recorded with them: the last one known
+-- to hold every line of this window. NULL when none is recorded (the watermarks are then 0)
+DECLARE @prev_snapshot_dt DATE = NULLIF('{{PREV_SNAPSHOT_DT}}', '');
+
+-- Upper bounds fixed up front (or by the first slice of a chunked run): rows staged
+-- while this runs are left for the next run
+DECLARE @hw_orders INT = {{HW_ORDERS}};
+DECLARE @hw_order_details INT = {{HW_ORDER_DETAILS}};
+IF @hw_orders IS NULL
+    SET @hw_orders = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.Orders);
+IF @hw_order_details IS NULL
+    SET @hw_order_details = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.OrderDetails);
+
+IF OBJECT_ID('tempdb..#changed_orders') IS NOT NULL DROP TABLE #changed_orders;
+CREATE TABLE #changed_orders (OrderID NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);
+
+IF @load_mode = N'incremental'
+    INSERT INTO #changed_orders (OrderID)
+    SELECT OrderID FROM staging.Orders
+    WHERE staging_raw_id_sk > @wm_orders AND staging_raw_id_sk <= @hw_orders
+    UNION
+    SELECT OrderID FROM staging.OrderDetails
+    WHERE staging_raw_id_sk > @wm_order_details AND staging_raw_id_sk <= @hw_order_details;
 
 /* Optional: capture SOR_SK for the staging tables (if your fact_error table has these columns) */
 DECLARE @Orders_SOR_SK INT = (SELECT SOR_SK FROM dbo.Dim_SOR WHERE staging_raw_table_name = 'staging.Orders');
@@ -37,7 +86,7 @@ IF OBJECT_ID('tempdb..#err') IS NOT NULL DROP TABLE #err;
         o.ShipVia     AS ShipperID_nk,
         o.TerritoryID AS TerritoryID_nk,
 
-        CAST(o.OrderDate AS DATE)    AS OrderDate,
+        o.OrderDate_dt               AS OrderDate,
         CAST(o.RequiredDate AS DATE) AS RequiredDate,
         CAST(o.ShippedDate AS DATE)  AS ShippedDate,
 
@@ -48,8 +97,13 @@ IF OBJECT_ID('tempdb..#err') IS NOT NULL DROP TABLE #err;
     FROM staging.Orders o
     JOIN staging.OrderDetails od
       ON od.OrderID = o.OrderID
-    WHERE CAST(o.OrderDate AS DATE) >= @start_date
-      AND CAST(o.OrderDate AS DATE) <= @end_date
+    -- OrderDate_dt is a persisted DATE column of staging.Orders, so the range can seek IX_Orders_OrderDate_dt
+    WHERE o.OrderDate_dt >= @start_date
+      AND o.OrderDate_dt <= @end_date
+      AND (@load_mode <> N'incremental' OR o.OrderID IN (SELECT OrderID FROM #changed_orders))
+      AND (@order_id_lo IS NULL
+           OR TRY_CONVERT(INT, o.OrderID) BETWEEN @order_id_lo AND @order_id_hi
+           OR (@is_final_slice = 1 AND TRY_CONVERT(INT, o.OrderID) IS NULL))
 ),
 lkp AS (
     SELECT
@@ -118,6 +172,14 @@ FROM lkp
 WHERE
     -- any required dimension lookup failed
     (Customer_SK IS NULL OR Employee_SK IS NULL OR Shipper_SK IS NULL OR Territory_SK IS NULL OR Product_SK IS NULL)
+    -- not already reported for this snapshot grain (a same-day rerun adds no duplicates)
+    AND NOT EXISTS (
+        SELECT 1
+        FROM dbo.fact_error fe
+        WHERE fe.snapshot_dt = lkp.snapshot_dt
+          AND fe.OrderID_nk = lkp.OrderID_nk
+          AND fe.ProductID_nk = lkp.ProductID_nk
+    )
     -- and therefore it should NOT exist in the fact for this snapshot grain
     AND NOT EXISTS (
         SELECT 1
@@ -149,5 +211,68 @@ N'INSERT INTO dbo.fact_error (' + @cols + N')
   SELECT ' + @cols + N' FROM #err;';
 
 EXEC sp_executesql @sql;
+
+/* =========================
+   CARRY FORWARD (incremental): the error lines of unchanged orders that are still in
+   staging are copied from @prev_snapshot_dt (same columns as the table, whatever they are)
+   ========================= */
+IF @load_mode = N'incremental' AND @prev_snapshot_dt < @snapshot_dt
+BEGIN
+    DECLARE @carry_cols NVARCHAR(MAX) =
+    (
+        SELECT STRING_AGG(QUOTENAME(name), ',')
+        FROM sys.columns
+        WHERE object_id = OBJECT_ID('dbo.fact_error')
+          AND is_identity = 0 AND is_computed = 0
+          AND name NOT IN ('snapshot_dt', 'created_dt')
+    );
+
+    DECLARE @carry_sql NVARCHAR(MAX) =
+    N'INSERT INTO dbo.fact_error (snapshot_dt,' + @carry_cols + N')
+      SELECT @snapshot_dt,' + @carry_cols + N'
+      FROM dbo.fact_error fe
+      WHERE fe.snapshot_dt = @prev_snapshot_dt
+        AND fe.OrderDate >= @start_date
+        AND fe.OrderDate <= @end_date
+        AND (@order_id_lo IS NULL
+             OR TRY_CONVERT(INT, fe.OrderID_nk) BETWEEN @order_id_lo AND @order_id_hi
+             OR (@is_final_slice = 1 AND TRY_CONVERT(INT, fe.OrderID_nk) IS NULL))
+        AND NOT EXISTS (SELECT 1 FROM #changed_orders c WHERE c.OrderID = CAST(fe.OrderID_nk AS NVARCHAR(100)))
+        AND EXISTS (
+            SELECT 1
+            FROM staging.Orders so
+            JOIN staging.OrderDetails sod
+              ON sod.OrderID = so.OrderID
+            WHERE so.OrderID = CAST(fe.OrderID_nk AS NVARCHAR(100))
+              AND sod.ProductID = CAST(fe.ProductID_nk AS NVARCHAR(100))
+        )
+        AND NOT EXISTS (
+            SELECT 1
+            FROM dbo.fact_error cur
+            WHERE cur.snapshot_dt = @snapshot_dt
+              AND cur.OrderID_nk = fe.OrderID_nk
+              AND cur.ProductID_nk = fe.ProductID_nk
+        );';
+
+    EXEC sp_executesql @carry_sql,
+        N'@snapshot_dt DATE, @prev_snapshot_dt DATE, @start_date DATE, @end_date DATE, @order_id_lo INT, @order_id_hi INT, @is_final_slice INT',
+        @snapshot_dt, @prev_snapshot_dt, @start_date, @end_date, @order_id_lo, @order_id_hi, @is_final_slice;
+END;
+
+/* =========================
+   SLICE PROGRESS (chunked mode): a completed slice is skipped when the run is resumed;
+   the final slice clears the progress of this window
+   ========================= */
+IF @order_id_lo IS NOT NULL
+BEGIN
+    IF @is_final_slice = 1
+        DELETE FROM dbo.pipeline_fact_progress
+        WHERE consumer = N'fact_error' AND start_date = @start_date AND end_date = @end_date AND load_mode = @load_mode;
+    ELSE
+        INSERT INTO dbo.pipeline_fact_progress
+            (consumer, start_date, end_date, load_mode, slice_lo, slice_hi, hw_orders, hw_order_details, execution_id)
+        VALUES
+            (N'fact_error', @start_date, @end_date, @load_mode, @order_id_lo, @order_id_hi, @hw_orders, @hw_order_details, @execution_id);
+END;
 GO
 
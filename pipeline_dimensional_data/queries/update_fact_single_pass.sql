@@ -0,0 +1,349 @@
+USE ORDER_DDS;
+GO
+
+/* Single-pass fact builder (config.FACT_SINGLE_PASS):
+   resolves every dimension lookup once into #resolved, then
+   - MERGEs the fully resolved lines into dbo.FactOrders
+   - inserts the unresolved lines, with error_reason, into dbo.fact_error
+   Same inputs and results as update_fact.sql followed by update_fact_error.sql. */
+
+/* =========================
+   PARAMETERS (set these)
+   ========================= */
+DECLARE @start_date DATE = '{{START_DATE}}';
+DECLARE @end_date   DATE = '{{END_DATE}}';
+
+-- Snapshot date (the day of the run; tasks.run_sql_script passes it, the same for every slice)
+DECLARE @snapshot_dt DATE = '{{SNAPSHOT_DT}}';
+
+/* =========================
+   LOAD MODE
+   'full'        : every order in the date window
+   'incremental' : only orders whose header or lines were staged after the fact_orders
+                   watermark for the window in dbo.pipeline_watermark (changed rows get new
+                   staging ids); lines of unchanged orders that are still staged are carried
+                   forward from the snapshot of the window's last incremental run, so the
+                   new snapshot is complete
+   ========================= */
+DECLARE @load_mode    NVARCHAR(20)  = '{{LOAD_MODE}}';
+DECLARE @execution_id NVARCHAR(100) = '{{EXECUTION_ID}}';
+
+/* =========================
+   ORDER SLICE (chunked mode, see tasks.run_fact_script_sliced)
+   NULL bounds: the whole window in one transaction.
+   Non-numeric OrderIDs are picked up by the final slice.
+   ========================= */
+DECLARE @order_id_lo INT = {{ORDER_ID_LO}};
+DECLARE @order_id_hi INT = {{ORDER_ID_HI}};
+DECLARE @is_final_slice INT = {{IS_FINAL_SLICE}};
+
+-- The fact_orders watermarks for the window (0 in full mode): tasks.run_sql_script reads them from
+-- dbo.pipeline_watermark and advances them to the high-water marks in this transaction
+DECLARE @wm_orders INT = {{WM_ORDERS}};
+DECLARE @wm_order_details INT = {{WM_ORDER_DETAILS}};
+
+-- The snapshot the run that set these watermarks wrote, recorded with them: the last one known
+-- to hold every line of this window. NULL when none is recorded (the watermarks are then 0)
+DECLARE @prev_snapshot_dt DATE = NULLIF('{{PREV_SNAPSHOT_DT}}', '');
+
+-- Upper bounds fixed up front (or by the first slice of a chunked run): rows staged
+-- while this runs are left for the next run
+DECLARE @hw_orders INT = {{HW_ORDERS}};
+DECLARE @hw_order_details INT = {{HW_ORDER_DETAILS}};
+IF @hw_orders IS NULL
+    SET @hw_orders = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.Orders);
+IF @hw_order_details IS NULL
+    SET @hw_order_details = (SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.OrderDetails);
+
+IF OBJECT_ID('tempdb..#changed_orders') IS NOT NULL DROP TABLE #changed_orders;
+CREATE TABLE #changed_orders (OrderID NVARCHAR(100) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);
+
+IF @load_mode = N'incremental'
+    INSERT INTO #changed_orders (OrderID)
+    SELECT OrderID FROM staging.Orders
+    WHERE staging_raw_id_sk > @wm_orders AND staging_raw_id_sk <= @hw_orders
+    UNION
+    SELECT OrderID FROM staging.OrderDetails
+    WHERE staging_raw_id_sk > @wm_order_details AND staging_raw_id_sk <= @hw_order_details;
+
+/* Optional: capture SOR_SK for the staging tables (if your fact_error table has these columns) */
+DECLARE @Orders_SOR_SK INT = (SELECT SOR_SK FROM dbo.Dim_SOR WHERE staging_raw_table_name = 'staging.Orders');
+DECLARE @OrderDetails_SOR_SK INT = (SELECT SOR_SK FROM dbo.Dim_SOR WHERE staging_raw_table_name = 'staging.OrderDetails');
+
+/* =========================
+   RESOLVE (one scan of staging, one pass over the dimensions)
+   ========================= */
+IF OBJECT_ID('tempdb..#resolved') IS NOT NULL DROP TABLE #resolved;
+
+SELECT
+    @snapshot_dt AS snapshot_dt,
+
+    o.OrderID      AS OrderID_nk,
+    od.ProductID   AS ProductID_nk,
+
+    -- staging row ids (traceability)
+    o.staging_raw_id_sk  AS Orders_staging_raw_id_nk,
+    od.staging_raw_id_sk AS OrderDetails_staging_raw_id_nk,
+
+    -- optional SOR keys (traceability)
+    @Orders_SOR_SK       AS Orders_SOR_SK,
+    @OrderDetails_SOR_SK AS OrderDetails_SOR_SK,
+
+    -- helpful NKs for debugging
+    o.CustomerID  AS CustomerID_nk,
+    o.EmployeeID  AS EmployeeID_nk,
+    o.ShipVia     AS ShipperID_nk,
+    o.TerritoryID AS TerritoryID_nk,
+
+    c.Customer_SK,
+    e.Employee_SK,
+    sh.Shipper_SK,
+    t.Territory_SK,
+    p.Product_SK,
+
+    o.OrderDate_dt               AS OrderDate,
+    CAST(o.RequiredDate AS DATE) AS RequiredDate,
+    CAST(o.ShippedDate AS DATE)  AS ShippedDate,
+
+    od.Quantity   AS Quantity,
+    CAST(od.UnitPrice AS DECIMAL(18,2)) AS UnitPrice,
+    CAST(od.Discount  AS DECIMAL(5,4))  AS Discount,
+    CAST(o.Freight    AS DECIMAL(18,2)) AS Freight,
+
+    -- one text field explaining WHY it failed ('' when every lookup resolved)
+    CONCAT(
+      CASE WHEN c.Customer_SK IS NULL THEN 'Missing Customer; ' ELSE '' END,
+      CASE WHEN e.Employee_SK IS NULL THEN 'Missing Employee; ' ELSE '' END,
+      CASE WHEN sh.Shipper_SK IS NULL THEN 'Missing Shipper; ' ELSE '' END,
+      CASE WHEN t.Territory_SK IS NULL THEN 'Missing Territory; ' ELSE '' END,
+      CASE WHEN p.Product_SK IS NULL THEN 'Missing Product; ' ELSE '' END
+    ) AS error_reason
+INTO #resolved
+FROM staging.Orders o
+JOIN staging.OrderDetails od
+  ON od.OrderID = o.OrderID
+
+-- Customers (SCD2 as-of OrderDate)
+LEFT JOIN dbo.DimCustomers c
+  ON c.CustomerID_nk = o.CustomerID
+ AND c.effective_start_dt <= o.OrderDate_dt
+ AND c.effective_end_dt   >= o.OrderDate_dt
+
+-- Employees (SCD1 with delete)
+LEFT JOIN dbo.DimEmployees e
+  ON e.EmployeeID_nk = o.EmployeeID
+ AND ISNULL(e.is_deleted, 0) = 0
+
+-- Shippers (SCD1)
+LEFT JOIN dbo.DimShippers sh
+  ON sh.ShipperID_nk = o.ShipVia
+
+-- Territories (SCD3, still 1 row per NK)
+LEFT JOIN dbo.DimTerritories t
+  ON t.TerritoryID_nk = o.TerritoryID
+
+-- Products (SCD2 with delete closing, as-of OrderDate)
+LEFT JOIN dbo.DimProducts p
+  ON p.ProductID_nk = od.ProductID
+ AND p.effective_start_dt <= o.OrderDate_dt
+ AND p.effective_end_dt   >= o.OrderDate_dt
+ AND ISNULL(p.is_deleted, 0) = 0
+
+-- OrderDate_dt is a persisted DATE column of staging.Orders, so the range can seek IX_Orders_OrderDate_dt
+WHERE o.OrderDate_dt >= @start_date
+  AND o.OrderDate_dt <= @end_date
+  AND (@load_mode <> N'incremental' OR o.OrderID IN (SELECT OrderID FROM #changed_orders))
+  AND (@order_id_lo IS NULL
+       OR TRY_CONVERT(INT, o.OrderID) BETWEEN @order_id_lo AND @order_id_hi
+       OR (@is_final_slice = 1 AND TRY_CONVERT(INT, o.OrderID) IS NULL));
+
+/* =========================
+   RESOLVED -> dbo.FactOrders
+   ========================= */
+MERGE dbo.FactOrders AS tgt
+USING (SELECT * FROM #resolved WHERE error_reason = '') AS src
+ON  tgt.snapshot_dt  = src.snapshot_dt
+AND tgt.OrderID_nk   = src.OrderID_nk
+AND tgt.ProductID_nk = src.ProductID_nk
+
+WHEN MATCHED THEN
+  UPDATE SET
+    tgt.Customer_SK  = src.Customer_SK,
+    tgt.Employee_SK  = src.Employee_SK,
+    tgt.Shipper_SK   = src.Shipper_SK,
+    tgt.Territory_SK = src.Territory_SK,
+    tgt.Product_SK   = src.Product_SK,
+    tgt.OrderDate    = src.OrderDate,
+    tgt.RequiredDate = src.RequiredDate,
+    tgt.ShippedDate  = src.ShippedDate,
+    tgt.Quantity     = src.Quantity,
+    tgt.UnitPrice    = src.UnitPrice,
+    tgt.Discount     = src.Discount,
+    tgt.Freight      = src.Freight
+
+WHEN NOT MATCHED BY TARGET THEN
+  INSERT (
+    snapshot_dt, OrderID_nk, ProductID_nk,
+    Customer_SK, Employee_SK, Shipper_SK, Territory_SK, Product_SK,
+    OrderDate, RequiredDate, ShippedDate,
+    Quantity, UnitPrice, Discount, Freight
+  )
+  VALUES (
+    src.snapshot_dt, src.OrderID_nk, src.ProductID_nk,
+    src.Customer_SK, src.Employee_SK, src.Shipper_SK, src.Territory_SK, src.Product_SK,
+    src.OrderDate, src.RequiredDate, src.ShippedDate,
+    src.Quantity, src.UnitPrice, src.Discount, src.Freight
+  );
+
+/* =========================
+   UNRESOLVED -> dbo.fact_error
+   (dynamic: only columns that exist in dbo.fact_error will be inserted)
+   ========================= */
+IF OBJECT_ID('tempdb..#err') IS NOT NULL DROP TABLE #err;
+
+SELECT r.*
+INTO #err
+FROM #resolved r
+WHERE r.error_reason <> ''
+  -- not already reported for this snapshot grain
+  AND NOT EXISTS (
+      SELECT 1
+      FROM dbo.fact_error fe
+      WHERE fe.snapshot_dt = r.snapshot_dt
+        AND fe.OrderID_nk = r.OrderID_nk
+        AND fe.ProductID_nk = r.ProductID_nk
+  )
+  -- and not loaded into the fact for this snapshot by an earlier run
+  AND NOT EXISTS (
+      SELECT 1
+      FROM dbo.FactOrders f
+      WHERE f.snapshot_dt = r.snapshot_dt
+        AND f.OrderID_nk = r.OrderID_nk
+        AND f.ProductID_nk = r.ProductID_nk
+  );
+
+DECLARE @cols NVARCHAR(MAX) =
+(
+    SELECT STRING_AGG(QUOTENAME(fe.name), ',')
+    FROM sys.columns fe
+    JOIN tempdb.sys.columns te
+      ON te.object_id = OBJECT_ID('tempdb..#err')
+     AND te.name = fe.name
+    WHERE fe.object_id = OBJECT_ID('dbo.fact_error')
+);
+
+IF @cols IS NULL
+    THROW 50001, 'No matching columns between #err and dbo.fact_error. Check dbo.fact_error schema/column names.', 1;
+
+DECLARE @sql NVARCHAR(MAX) =
+N'INSERT INTO dbo.fact_error (' + @cols + N')
+  SELECT ' + @cols + N' FROM #err;';
+
+EXEC sp_executesql @sql;
+
+/* =========================
+   CARRY FORWARD (incremental): a snapshot holds the whole window, so the lines of
+   unchanged orders are copied from @prev_snapshot_dt. Only lines still in staging are
+   copied: an order or line deleted from the source leaves the snapshot
+   ========================= */
+IF @load_mode = N'incremental' AND @prev_snapshot_dt < @snapshot_dt
+BEGIN
+    INSERT INTO dbo.FactOrders (
+        snapshot_dt, OrderID_nk, ProductID_nk,
+        Customer_SK, Employee_SK, Shipper_SK, Territory_SK, Product_SK,
+        OrderDate, RequiredDate, ShippedDate,
+        Quantity, UnitPrice, Discount, Freight
+    )
+    SELECT
+        @snapshot_dt, f.OrderID_nk, f.ProductID_nk,
+        f.Customer_SK, f.Employee_SK, f.Shipper_SK, f.Territory_SK, f.Product_SK,
+        f.OrderDate, f.RequiredDate, f.ShippedDate,
+        f.Quantity, f.UnitPrice, f.Discount, f.Freight
+    FROM dbo.FactOrders f
+    WHERE f.snapshot_dt = @prev_snapshot_dt
+      AND f.OrderDate >= @start_date
+      AND f.OrderDate <= @end_date
+      AND (@order_id_lo IS NULL
+           OR TRY_CONVERT(INT, f.OrderID_nk) BETWEEN @order_id_lo AND @order_id_hi
+           OR (@is_final_slice = 1 AND TRY_CONVERT(INT, f.OrderID_nk) IS NULL))
+      AND NOT EXISTS (SELECT 1 FROM #changed_orders c WHERE c.OrderID = CAST(f.OrderID_nk AS NVARCHAR(100)))
+      AND EXISTS (
+          SELECT 1
+          FROM staging.Orders so
+          JOIN staging.OrderDetails sod
+            ON sod.OrderID = so.OrderID
+          WHERE so.OrderID = CAST(f.OrderID_nk AS NVARCHAR(100))
+            AND sod.ProductID = CAST(f.ProductID_nk AS NVARCHAR(100))
+      )
+      AND NOT EXISTS (
+          SELECT 1
+          FROM dbo.FactOrders cur
+          WHERE cur.snapshot_dt = @snapshot_dt
+            AND cur.OrderID_nk = f.OrderID_nk
+            AND cur.ProductID_nk = f.ProductID_nk
+      );
+END;
+
+/* =========================
+   CARRY FORWARD (incremental): the error lines of unchanged orders that are still in
+   staging are copied from @prev_snapshot_dt (same columns as the table, whatever they are)
+   ========================= */
+IF @load_mode = N'incremental' AND @prev_snapshot_dt < @snapshot_dt
+BEGIN
+    DECLARE @carry_cols NVARCHAR(MAX) =
+    (
+        SELECT STRING_AGG(QUOTENAME(name), ',')
+        FROM sys.columns
+        WHERE object_id = OBJECT_ID('dbo.fact_error')
+          AND is_identity = 0 AND is_computed = 0
+          AND name NOT IN ('snapshot_dt', 'created_dt')
+    );
+
+    DECLARE @carry_sql NVARCHAR(MAX) =
+    N'INSERT INTO dbo.fact_error (snapshot_dt,' + @carry_cols + N')
+      SELECT @snapshot_dt,' + @carry_cols + N'
+      FROM dbo.fact_error fe
+      WHERE fe.snapshot_dt = @prev_snapshot_dt
+        AND fe.OrderDate >= @start_date
+        AND fe.OrderDate <= @end_date
+        AND (@order_id_lo IS NULL
+             OR TRY_CONVERT(INT, fe.OrderID_nk) BETWEEN @order_id_lo AND @order_id_hi
+             OR (@is_final_slice = 1 AND TRY_CONVERT(INT, fe.OrderID_nk) IS NULL))
+        AND NOT EXISTS (SELECT 1 FROM #changed_orders c WHERE c.OrderID = CAST(fe.OrderID_nk AS NVARCHAR(100)))
+        AND EXISTS (
+            SELECT 1
+            FROM staging.Orders so
+            JOIN staging.OrderDetails sod
+              ON sod.OrderID = so.OrderID
+            WHERE so.OrderID = CAST(fe.OrderID_nk AS NVARCHAR(100))
+              AND sod.ProductID = CAST(fe.ProductID_nk AS NVARCHAR(100))
+        )
+        AND NOT EXISTS (
+            SELECT 1
+            FROM dbo.fact_error cur
+            WHERE cur.snapshot_dt = @snapshot_dt
+              AND cur.OrderID_nk = fe.OrderID_nk
+              AND cur.ProductID_nk = fe.ProductID_nk
+        );';
+
+    EXEC sp_executesql @carry_sql,
+        N'@snapshot_dt DATE, @prev_snapshot_dt DATE, @start_date DATE, @end_date DATE, @order_id_lo INT, @order_id_hi INT, @is_final_slice INT',
+        @snapshot_dt, @prev_snapshot_dt, @start_date, @end_date, @order_id_lo, @order_id_hi, @is_final_slice;
+END;
+
+/* =========================
+   SLICE PROGRESS (chunked mode): a completed slice is skipped when the run is resumed;
+   the final slice clears the progress of this window
+   ========================= */
+IF @order_id_lo IS NOT NULL
+BEGIN
+    IF @is_final_slice = 1
+        DELETE FROM dbo.pipeline_fact_progress
+        WHERE consumer = N'fact_orders' AND start_date = @start_date AND end_date = @end_date AND load_mode = @load_mode;
+    ELSE
+        INSERT INTO dbo.pipeline_fact_progress
+            (consumer, start_date, end_date, load_mode, slice_lo, slice_hi, hw_orders, hw_order_details, execution_id)
+        VALUES
+            (N'fact_orders', @start_date, @end_date, @load_mode, @order_id_lo, @order_id_hi, @hw_orders, @hw_order_details, @execution_id);
+END;
+GO
@@ -0,0 +1,112 @@
+"""
+Run ledger: the state of every task of an execution_id, kept in a local JSON file store
+(config.RUN_LEDGER_DIR/<execution_id>.json) so a failed run can be resumed.
+
+An entry is keyed by task and date window and records state (running/succeeded/failed),
+timings, the error and the task's input fingerprint. The fingerprint hashes the window,
+the task options and the text of the SQL scripts the task runs; a resumed run only skips a
+task whose earlier success had the same fingerprint. Staging contents are not part of it:
+resume is meant for retrying the same run, not for picking up a new staging load.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.script_registry import get_registry
+
+logger = getLogger(__name__)
+
+
+def _scripts_of(task_name: str, options: Dict[str, Any]) -> list:
+    # Maintenance tasks are Python-driven and run no script
+    scripts = [config.queries_map[task_name]] if task_name in config.queries_map else []
+    if task_name in config.FACT_TASKS and options.get("single_pass"):
+        scripts.append(config.FACT_SINGLE_PASS_SCRIPT)
+    return scripts
+
+
+def task_fingerprint(task_name: str, start_date: str, end_date: str, options: Dict[str, Any]) -> str:
+    """Hash of everything a task's run depends on besides the data: window, options and SQL text."""
+    registry = get_registry()
+    scripts = {}
+    for name in _scripts_of(task_name, options):
+        script = registry.get(name)
+        scripts[name] = script.digest if script else None
+    # Live objects (the key-map cache) are not inputs
+    plain = {k: v for k, v in options.items() if isinstance(v, (str, int, float, bool, type(None)))}
+    payload = json.dumps(
+        {"task": task_name, "start_date": start_date, "end_date": end_date, "options": plain, "scripts": scripts},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_key(task_name: str, start_date: str, end_date: str) -> str:
+    # Backfill runs the fact tasks once per slice under one execution_id
+    return f"{task_name}:{start_date}:{end_date}"
+
+
+class RunLedger:
+    """Thread-safe file store of task states per execution_id."""
+
+    def __init__(self, directory: str = config.RUN_LEDGER_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, execution_id: str) -> str:
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in execution_id)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def load(self, execution_id: str) -> Dict[str, Any]:
+        path = self._path(execution_id)
+        if not os.path.exists(path):
+            return {"execution_id": execution_id, "tasks": {}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, ledger: Dict[str, Any]):
+        path = self._path(ledger["execution_id"])
+        # Write-then-rename so a crash never leaves a truncated ledger behind
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, indent=2, default=str)
+        os.replace(tmp, path)
+
+    def completed(self, execution_id: str, task_name: str, start_date: str, end_date: str,
+                  fingerprint: str) -> Optional[Dict[str, Any]]:
+        """The ledger entry of an earlier success with the same inputs, else None."""
+        with self._lock:
+            entry = self.load(execution_id)["tasks"].get(_entry_key(task_name, start_date, end_date))
+        if entry and entry.get("state") == "succeeded" and entry.get("fingerprint") == fingerprint:
+            return entry
+        return None
+
+    def record(self, execution_id: str, task_name: str, start_date: str, end_date: str, state: str,
+               fingerprint: str, result: Optional[Dict[str, Any]] = None):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            try:
+                ledger = self.load(execution_id)
+                key = _entry_key(task_name, start_date, end_date)
+                entry = ledger["tasks"].get(key, {})
+                entry.update({"task": task_name, "start_date": start_date, "end_date": end_date,
+                              "state": state, "fingerprint": fingerprint})
+                if state == "running":
+                    entry.update({"started": now, "finished": None, "error": None})
+                else:
+                    result = result or {}
+                    entry.update({"finished": now, "error": result.get("error"),
+                                  "wall_seconds": result.get("metrics", {}).get("wall_seconds")})
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                ledger["tasks"][key] = entry
+                self._save(ledger)
+            except OSError as e:
+                # The ledger must never fail the run it is recording
+                logger.warning(f"Could not update the run ledger of {execution_id}: {e}")
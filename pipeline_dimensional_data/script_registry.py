@@ -0,0 +1,244 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from logging import getLogger
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pipeline_dimensional_data import config
+
+logger = getLogger(__name__)
+
+_GO_LINE = re.compile(r"^\s*GO(?:\s+(\d+))?\s*(?:--.*)?$", re.IGNORECASE)
+# A {{TOKEN}} placeholder in code, and a string literal that is nothing but a placeholder
+_TOKEN = re.compile(r"\{\{(\w+)\}\}")
+_QUOTED_TOKEN = re.compile(r"'\{\{(\w+)\}\}'")
+# The N of an N'...' literal, left at the end of the code before it
+_UNICODE_PREFIX = re.compile(r"(?<!\w)N$", re.IGNORECASE)
+
+
+class Batch(NamedTuple):
+    text: str
+    repeat: int = 1
+    # `text` with every {{TOKEN}} replaced by a `?` marker, and the token bound to each marker
+    bound_text: str = ""
+    bound_tokens: Tuple[str, ...] = ()
+
+
+def _make_batch(text: str, repeat: int) -> Batch:
+    """
+    Compile a batch and its parameterized form. Only placeholders in code and literals that
+    consist of a single placeholder ('{{X}}' / N'{{X}}') become markers; comments are left
+    alone. A placeholder elsewhere inside a string or quoted identifier cannot be bound, so
+    such a batch gets no parameterized form and always runs with the values substituted.
+    """
+    names = []
+
+    def to_marker(match):
+        names.append(match.group(1))
+        return "?"
+
+    lines = []
+    state, depth = "code", 0
+    for line in text.split("\n"):
+        segments = []
+        state, depth = _scan_line(line, state, depth, segments)
+        pieces = []
+        for kind, start, end in segments:
+            piece = line[start:end]
+            if kind == "code":
+                piece = _TOKEN.sub(to_marker, piece)
+            elif kind not in ("comment", "block") and "{{" in piece:
+                match = _QUOTED_TOKEN.fullmatch(piece) if kind == "string" else None
+                if match is None:
+                    return Batch(text, repeat)
+                if pieces:
+                    pieces[-1] = _UNICODE_PREFIX.sub("", pieces[-1])
+                piece = to_marker(match)
+            pieces.append(piece)
+        lines.append("".join(pieces))
+    return Batch(text, repeat, "\n".join(lines), tuple(names))
+
+
+class CompiledScript(NamedTuple):
+    name: str
+    path: str
+    mtime: float
+    batches: List[Batch]
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the batch texts: changes whenever the SQL itself changes."""
+        text = "\n".join(batch.text for batch in self.batches)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _scan_line(line: str, state: str, depth: int, segments: Optional[list] = None):
+    """
+    Advance the lexer state over one line.
+    state is one of: "code", "string", "bracket", "quoted", "block" (depth = nested /* */ level).
+    When `segments` is given, the line is cut into (kind, start, end) pieces appended to it;
+    kind is the state the piece was scanned in, or "comment" for a -- comment. A string,
+    identifier or comment piece includes its delimiters.
+    """
+    i = 0
+    n = len(line)
+    start = 0
+
+    def cut(end, kind):
+        nonlocal start
+        if segments is not None and end > start:
+            segments.append((kind, start, end))
+        start = end
+
+    while i < n:
+        ch = line[i]
+        nxt = line[i + 1] if i + 1 < n else ""
+        if state == "code":
+            if ch == "-" and nxt == "-":
+                cut(i, "code")
+                cut(n, "comment")
+                break  # rest of the line is a comment
+            if ch == "/" and nxt == "*":
+                cut(i, "code")
+                state, depth = "block", 1
+                i += 2
+                continue
+            if ch in "'[\"":
+                cut(i, "code")
+                state = {"'": "string", "[": "bracket", '"': "quoted"}[ch]
+        elif state == "block":
+            if ch == "/" and nxt == "*":
+                depth += 1
+                i += 2
+                continue
+            if ch == "*" and nxt == "/":
+                depth -= 1
+                i += 2
+                if depth == 0:
+                    cut(i, "block")
+                    state = "code"
+                continue
+        elif state == "string":
+            if ch == "'":
+                if nxt == "'":
+                    i += 2
+                    continue
+                cut(i + 1, "string")
+                state = "code"
+        elif state == "bracket":
+            if ch == "]":
+                if nxt == "]":
+                    i += 2
+                    continue
+                cut(i + 1, "bracket")
+                state = "code"
+        elif state == "quoted":
+            if ch == '"':
+                if nxt == '"':
+                    i += 2
+                    continue
+                cut(i + 1, "quoted")
+                state = "code"
+        i += 1
+    cut(n, state)
+    return state, depth
+
+
+def split_batches(sql_text: str) -> List[Batch]:
+    """
+    Split a T-SQL script into batches on `GO [n]` separator lines.
+
+    A separator only counts when it starts outside of comments, string literals and
+    quoted identifiers, so `GO` inside `/* ... */` or `'...'` is left alone.
+    `GO n` runs the preceding batch n times. Empty batches are dropped.
+    Each batch also carries a parameterized form for bound execution.
+    """
+    batches = []
+    current = []
+    state, depth = "code", 0
+    for line in sql_text.splitlines():
+        if state == "code":
+            match = _GO_LINE.match(line)
+            if match:
+                text = "\n".join(current)
+                if text.strip():
+                    batches.append(_make_batch(text, int(match.group(1) or 1)))
+                current = []
+                continue
+        current.append(line)
+        state, depth = _scan_line(line, state, depth)
+    text = "\n".join(current)
+    if text.strip():
+        batches.append(_make_batch(text, 1))
+    return batches
+
+
+class ScriptRegistry:
+    """
+    In-memory registry of the pre-split SQL templates in `queries_dir`.
+
+    Every script is read and split once; lookups afterwards are pure dictionary reads.
+    `refresh()` re-stats the files and recompiles only those whose mtime changed. It runs
+    on a lookup miss and, when `check_interval` is set, at most once per interval.
+    """
+
+    def __init__(self, queries_dir: str = config.QUERIES_DIR, check_interval: Optional[float] = config.SCRIPT_REGISTRY_CHECK_INTERVAL):
+        self.queries_dir = queries_dir
+        self.check_interval = check_interval
+        self._scripts: Dict[str, CompiledScript] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.refresh()
+
+    def _compile(self, name: str, path: str, mtime: float) -> CompiledScript:
+        with open(path, "r", encoding="utf-8") as f:
+            sql_text = f.read()
+        return CompiledScript(name, path, mtime, split_batches(sql_text))
+
+    def refresh(self) -> List[str]:
+        """Load new or modified scripts, drop deleted ones; returns the names that were (re)compiled."""
+        with self._lock:
+            reloaded = []
+            seen = set()
+            for entry in os.scandir(self.queries_dir):
+                if not entry.is_file() or not entry.name.lower().endswith(".sql"):
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime
+                cached = self._scripts.get(entry.name)
+                if cached is None or cached.mtime != mtime:
+                    self._scripts[entry.name] = self._compile(entry.name, entry.path, mtime)
+                    reloaded.append(entry.name)
+            for name in set(self._scripts) - seen:
+                del self._scripts[name]
+            self._last_check = time.monotonic()
+            if reloaded:
+                logger.debug(f"Script registry compiled: {reloaded}")
+            return reloaded
+
+    def get(self, script_name: str) -> Optional[CompiledScript]:
+        if self.check_interval is not None and time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh()
+        script = self._scripts.get(script_name)
+        if script is None:
+            self.refresh()
+            script = self._scripts.get(script_name)
+        return script
+
+    def names(self) -> List[str]:
+        return sorted(self._scripts)
+
+
+_default_registry: Optional[ScriptRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> ScriptRegistry:
+    """Return the process-wide registry, loading every script in `config.QUERIES_DIR` on first use."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ScriptRegistry()
+        return _default_registry
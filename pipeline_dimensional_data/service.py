@@ -0,0 +1,239 @@
+"""
+Resident pipeline service: one warm process (imports, pooled connections, compiled SQL
+templates) that runs DimensionalDataFlow for requests arriving over a local HTTP endpoint.
+
+    GET  /health   service status, queue depth and pool statistics (JSON)
+    POST /runs     {"start_date": "1996-07-01", "end_date": "1996-07-31", "execution_id": ...,
+                    "mode": "full" | "incremental", "resume": false, "tasks": [...]}
+                   answered with a stream of JSON lines (application/x-ndjson):
+                   queued -> run_started -> task_started / task_finished ... -> run_finished
+    POST /scripts/refresh
+                   recompile edited SQL scripts now: {"reloaded": ["update_fact.sql", ...]}
+
+At most `max_concurrent_runs` runs execute at once; further requests wait in FIFO order,
+and beyond `max_queued_runs` waiting requests the service answers 503.
+
+The compiled SQL scripts stay in memory for the life of the service. An edited script is
+picked up by the first run that starts after `script_check_interval` seconds (the registry
+compares file mtimes), or right away after POST /scripts/refresh.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import ConnectionPool, get_pool
+from pipeline_dimensional_data.flow import DimensionalDataFlow
+from pipeline_dimensional_data.script_registry import get_registry
+
+logger = getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class RunQueue:
+    """FIFO admission of runs: `max_concurrent` execute, up to `max_queued` wait their turn."""
+
+    def __init__(self, max_concurrent: int = config.SERVICE_MAX_CONCURRENT_RUNS,
+                 max_queued: int = config.SERVICE_MAX_QUEUED_RUNS):
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be >= 1, got {max_concurrent}")
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._cond = threading.Condition()
+        self._waiting = deque()
+        self._running = 0
+
+    def admit(self) -> Tuple[object, int]:
+        """Take a place in the queue; returns the ticket and the number of runs ahead of it."""
+        with self._cond:
+            if len(self._waiting) >= self.max_queued:
+                raise QueueFull(f"{len(self._waiting)} runs already waiting")
+            ticket = object()
+            self._waiting.append(ticket)
+            return ticket, len(self._waiting) - 1 + self._running
+
+    def wait_turn(self, ticket: object):
+        with self._cond:
+            while self._waiting[0] is not ticket or self._running >= self.max_concurrent:
+                self._cond.wait()
+            self._waiting.popleft()
+            self._running += 1
+            self._cond.notify_all()
+
+    def done(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"running": self._running, "queued": len(self._waiting)}
+
+
+class PipelineService:
+    """Runs flows on a shared warm pool; every request gets its own flow (and execution_id)."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool = None,
+        max_concurrent_runs: int = config.SERVICE_MAX_CONCURRENT_RUNS,
+        max_queued_runs: int = config.SERVICE_MAX_QUEUED_RUNS,
+        script_check_interval: Optional[float] = config.SERVICE_SCRIPT_CHECK_INTERVAL,
+        **flow_options,
+    ):
+        self.pool = pool or get_pool()
+        # max_workers, param_mode, slice_size, ... as for DimensionalDataFlow (load_mode comes per request)
+        self.flow_options = flow_options
+        self.queue = RunQueue(max_concurrent_runs, max_queued_runs)
+        self.started = time.time()
+        self.runs_finished = 0
+        # Key maps of the python resolver outlive a run; a run that refreshes dimensions invalidates them
+        self.key_maps = None
+        if flow_options.get("resolver") == "python":
+            from pipeline_dimensional_data.key_resolver import KeyMapCache
+            self.key_maps = KeyMapCache()
+        # Compile every SQL template now rather than in the first request; edits on disk are
+        # picked up at most `script_check_interval` seconds later
+        get_registry().check_interval = script_check_interval
+
+    def refresh_scripts(self) -> List[str]:
+        """Recompile the SQL scripts edited since they were loaded; returns their names."""
+        reloaded = get_registry().refresh()
+        if reloaded:
+            logger.info(f"Reloaded SQL scripts: {reloaded}")
+        return reloaded
+
+    def validate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized run request; raises ValueError for anything the flow would reject."""
+        if not isinstance(request, dict):
+            raise ValueError("Run request must be a JSON object")
+        for key in ("start_date", "end_date"):
+            try:
+                date.fromisoformat(str(request.get(key)))
+            except ValueError:
+                raise ValueError(f"{key} must be a YYYY-MM-DD date, got {request.get(key)!r}")
+        mode = request.get("mode", config.LOAD_MODE)
+        if mode not in config.LOAD_MODES:
+            raise ValueError(f"Unknown mode: {mode} (expected one of {config.LOAD_MODES})")
+        tasks = request.get("tasks")
+        if tasks is not None:
+            unknown = set(tasks) - set(config.TASK_DEPENDENCIES)
+            if unknown:
+                raise ValueError(f"Unknown tasks: {sorted(unknown)}")
+        if request.get("resume") and not request.get("execution_id"):
+            raise ValueError("resume needs the execution_id of the run to resume")
+        return {
+            "start_date": request["start_date"],
+            "end_date": request["end_date"],
+            "execution_id": request.get("execution_id"),
+            "mode": mode,
+            "resume": bool(request.get("resume")),
+            "tasks": tasks,
+        }
+
+    def run(self, request: Dict[str, Any], emit: Callable[[dict], None]) -> dict:
+        """Execute a validated request, streaming its events through `emit`."""
+        flow = DimensionalDataFlow(
+            execution_id=request["execution_id"], pool=self.pool, load_mode=request["mode"],
+            key_maps=self.key_maps, **self.flow_options
+        )
+        emit({"event": "run_started", "execution_id": flow.execution_id})
+        try:
+            result = flow.exec(request["start_date"], request["end_date"], task_names=request["tasks"],
+                               resume=request["resume"], on_event=emit)
+            expected = len(request["tasks"]) if request["tasks"] is not None else len(flow.task_order)
+            success = len(result["tasks"]) == expected and all(r.get("success") for r in result["tasks"].values())
+        except Exception as e:
+            result, success = {"error": str(e)}, False
+        self.runs_finished += 1
+        emit({"event": "run_finished", "execution_id": flow.execution_id, "success": success, "result": result})
+        return result
+
+    def health(self) -> Dict[str, Any]:
+        return dict(
+            self.queue.stats(),
+            status="ok",
+            uptime_seconds=round(time.time() - self.started),
+            runs_finished=self.runs_finished,
+            pool=self.pool.stats(),
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ORDER_DDS-pipeline/1.0"
+
+    @property
+    def service(self) -> PipelineService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send_json(404, {"error": f"Unknown path: {self.path}"})
+        self._send_json(200, self.service.health())
+
+    def do_POST(self):
+        if self.path == "/scripts/refresh":
+            return self._send_json(200, {"reloaded": self.service.refresh_scripts()})
+        if self.path != "/runs":
+            return self._send_json(404, {"error": f"Unknown path: {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = self.service.validate(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:  # includes malformed JSON
+            return self._send_json(400, {"error": str(e)})
+        try:
+            ticket, ahead = self.service.queue.admit()
+        except QueueFull as e:
+            return self._send_json(503, {"error": f"Run queue is full: {e}"})
+
+        # No Content-Length: the stream ends when the connection closes (HTTP/1.0)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        lock = threading.Lock()
+
+        def emit(event: dict):
+            line = (json.dumps(event, default=str) + "\n").encode("utf-8")
+            with lock:
+                try:
+                    self.wfile.write(line)
+                    self.wfile.flush()
+                except OSError:
+                    # The client went away; the run still finishes and is in the ledger and metrics
+                    pass
+
+        emit({"event": "queued", "runs_ahead": ahead})
+        self.service.queue.wait_turn(ticket)
+        try:
+            self.service.run(request, emit)
+        finally:
+            self.service.queue.done()
+
+
+def make_server(service: PipelineService, host: str = config.SERVICE_HOST,
+                port: int = config.SERVICE_PORT) -> ThreadingHTTPServer:
+    """HTTP server bound to host:port (port 0: any free port); call serve_forever() to run it."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,198 @@
+"""
+Snapshot retention for dbo.FactOrders and dbo.fact_error.
+
+Every fact load stamps its rows with the run date (snapshot_dt), so both tables gain a full
+copy of the window per day. The retention policy keeps the newest `keep_daily` snapshots and,
+with `keep_month_end`, the last snapshot of every earlier month; all other snapshots expire.
+
+An expired snapshot is removed from each table by
+    - TRUNCATE TABLE ... WITH (PARTITIONS (n)) when the table is partitioned by snapshot_dt
+      (RANGE RIGHT, see dimensional_db_table_creation.sql) and partition n holds no other
+      snapshot; its now empty boundary is then merged away, or
+    - DELETE TOP (batch_size) ... WHERE snapshot_dt = ? in a loop, one commit per batch, so
+      neither the log nor the locks grow with the snapshot size.
+On partitioned tables the boundary of the next day is split ahead of its load, so each
+snapshot lands in its own partition.
+"""
+
+from datetime import date
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import ConnectionPool, get_pool
+
+logger = getLogger(__name__)
+
+SNAPSHOT_TABLES = (config.FACT_TABLE, config.FACT_ERROR_TABLE)
+
+_PARTITIONING_SQL = (
+    "SELECT pf.function_id, pf.name, pf.boundary_value_on_right "
+    "FROM sys.indexes AS i "
+    "JOIN sys.partition_schemes AS ps ON ps.data_space_id = i.data_space_id "
+    "JOIN sys.partition_functions AS pf ON pf.function_id = ps.function_id "
+    "WHERE i.object_id = OBJECT_ID(?) AND i.index_id IN (0, 1)"
+)
+_BOUNDARIES_SQL = (
+    "SELECT CAST(value AS DATE) FROM sys.partition_range_values WHERE function_id = ? ORDER BY boundary_id"
+)
+
+
+def expired_snapshots(snapshot_dates: Iterable[date], keep_daily: int, keep_month_end: bool = True) -> List[date]:
+    """
+    The snapshot dates the policy drops, oldest first. "Month-end" is the last snapshot of a
+    calendar month before the newest snapshot's month (the current month has no month-end yet).
+    """
+    if keep_daily < 1:
+        raise ValueError(f"keep_daily must be >= 1, got {keep_daily}")
+    newest_first = sorted(set(snapshot_dates), reverse=True)
+    keep = set(newest_first[:keep_daily])
+    if keep_month_end and newest_first:
+        current_month = (newest_first[0].year, newest_first[0].month)
+        month_end = {}
+        for day in newest_first:
+            month_end.setdefault((day.year, day.month), day)
+        keep.update(day for month, day in month_end.items() if month != current_month)
+    return sorted(day for day in newest_first if day not in keep)
+
+
+def _partitioning(cursor, table: str) -> Optional[Tuple[str, List[date]]]:
+    """(partition function, boundaries) of a table partitioned RANGE RIGHT on a date, else None."""
+    cursor.execute(_PARTITIONING_SQL, (table,))
+    row = cursor.fetchone()
+    if row is None or not row[2]:
+        return None
+    cursor.execute(_BOUNDARIES_SQL, (row[0],))
+    return row[1], [r[0] for r in cursor.fetchall()]
+
+
+def _own_partition(boundaries: List[date], day: date, snapshot_dates: List[date]) -> Optional[int]:
+    """
+    Number of the RANGE RIGHT partition holding `day` when it holds no other snapshot and is
+    closed above by a boundary no later than the newest snapshot (so no new load can reach it).
+    """
+    below = [b for b in boundaries if b <= day]
+    lower = below[-1] if below else None
+    upper = boundaries[len(below)] if len(below) < len(boundaries) else None
+    if upper is None or upper > max(snapshot_dates):
+        return None
+    if any(d != day and (lower is None or d >= lower) and d < upper for d in snapshot_dates):
+        return None
+    return len(below) + 1
+
+
+def _delete_snapshot(conn, table: str, day: date, batch_size: int) -> int:
+    cursor = conn.cursor()
+    deleted = 0
+    while True:
+        cursor.execute(f"DELETE TOP (?) FROM {table} WHERE snapshot_dt = ?", (batch_size, day))
+        rows = cursor.rowcount
+        conn.commit()
+        deleted += max(rows, 0)
+        if rows < batch_size:
+            return deleted
+
+
+def _split_next_day(conn, function: str):
+    """Add the boundary of tomorrow's snapshot, if missing (an empty range: metadata only)."""
+    conn.cursor().execute(
+        "DECLARE @next DATE = CAST(DATEADD(DAY, 1, SYSDATETIME()) AS DATE); "
+        "IF NOT EXISTS (SELECT 1 FROM sys.partition_range_values AS rv "
+        "JOIN sys.partition_functions AS pf ON pf.function_id = rv.function_id "
+        "WHERE pf.name = ? AND CAST(rv.value AS DATE) = @next) "
+        f"ALTER PARTITION FUNCTION {function}() SPLIT RANGE (@next);",
+        (function,),
+    )
+    conn.commit()
+
+
+def prune_snapshots(
+    execution_id: str,
+    pool: ConnectionPool = None,
+    tables: Tuple[str, ...] = SNAPSHOT_TABLES,
+    keep_daily: Optional[int] = config.SNAPSHOT_KEEP_DAILY,
+    keep_month_end: bool = config.SNAPSHOT_KEEP_MONTH_END,
+    batch_size: int = config.SNAPSHOT_DELETE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Apply the retention policy to `tables`. The snapshot calendar is the union of their
+    snapshot dates, so both tables keep the same days. Returns the expired dates and what
+    was truncated, deleted and merged.
+    """
+    if keep_daily is None:
+        return {"success": True, "skipped": True, "reason": "retention disabled"}
+    pool = pool or get_pool()
+    result = {"expired": [], "truncated_partitions": 0, "deleted_rows": 0, "merged_boundaries": 0}
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        snapshot_dates = set()
+        for table in tables:
+            cursor.execute(f"SELECT DISTINCT snapshot_dt FROM {table}")
+            snapshot_dates.update(row[0] for row in cursor.fetchall())
+        conn.commit()
+        snapshot_dates = sorted(snapshot_dates)
+        expired = expired_snapshots(snapshot_dates, keep_daily, keep_month_end)
+        result["expired"] = [day.isoformat() for day in expired]
+
+        layouts = {}
+        for table in tables:
+            try:
+                layouts[table] = _partitioning(cursor, table)
+                conn.commit()
+            except Exception as e:
+                # No partition catalog (or no permission to read it): batched deletes
+                logger.warning(f"[{execution_id}] Partition layout of {table} unavailable ({e}); deleting in batches")
+                conn.rollback()
+                layouts[table] = None
+
+        partitioned = {table for table, layout in layouts.items() if layout}
+        for day in expired:
+            truncated = set()
+            for table in tables:
+                layout = layouts[table]
+                partition = _own_partition(layout[1], day, snapshot_dates) if layout else None
+                if partition is not None:
+                    try:
+                        cursor.execute(f"TRUNCATE TABLE {table} WITH (PARTITIONS ({int(partition)}))")
+                        conn.commit()
+                        result["truncated_partitions"] += 1
+                        truncated.add(table)
+                        continue
+                    except Exception as e:
+                        # e.g. a non-aligned index on the table
+                        logger.warning(f"[{execution_id}] Could not truncate {table} partition {partition} ({e}); deleting")
+                        conn.rollback()
+                result["deleted_rows"] += _delete_snapshot(conn, table, day, batch_size)
+            # Only an emptied partition merges without moving rows
+            if partitioned and truncated == partitioned:
+                result["merged_boundaries"] += _merge_boundary(conn, layouts, day, execution_id)
+
+        # Partitioned tables: make sure the next snapshot gets a partition of its own
+        for function in {layout[0] for layout in layouts.values() if layout}:
+            try:
+                _split_next_day(conn, function)
+            except Exception as e:
+                logger.warning(f"[{execution_id}] Could not split the next snapshot boundary of {function}: {e}")
+                conn.rollback()
+
+    logger.info(f"[{execution_id}] Snapshot retention: {len(expired)} expired snapshots, "
+                f"{result['truncated_partitions']} partitions truncated, {result['deleted_rows']} rows deleted")
+    result.update(success=True, metrics={"rows_affected": result["deleted_rows"]})
+    return result
+
+
+def _merge_boundary(conn, layouts: Dict[str, Optional[Tuple[str, List[date]]]], day: date, execution_id: str) -> int:
+    """Drop the boundary `day` of every partition function once its partitions are truncated in all tables."""
+    merged = 0
+    for function, boundaries in {layout[0]: layout[1] for layout in layouts.values() if layout}.items():
+        if day not in boundaries:
+            continue
+        try:
+            conn.cursor().execute(f"ALTER PARTITION FUNCTION {function}() MERGE RANGE (?)", (day,))
+            conn.commit()
+            boundaries.remove(day)
+            merged += 1
+        except Exception as e:
+            logger.warning(f"[{execution_id}] Could not merge boundary {day} of {function}: {e}")
+            conn.rollback()
+    return merged
@@ -1,16 +1,14 @@
 import os
-import pyodbc
-from typing import Dict, Any
+import time
+from datetime import date
+from logging import getLogger
+from typing import Dict, Any, List, Tuple
 
 from pipeline_dimensional_data import config
-from utils import get_sql_config, create_connection_string, load_query
+from pipeline_dimensional_data.connection_pool import ConnectionPool, get_pool
+from pipeline_dimensional_data.script_registry import Batch, get_registry
 
-
-def _open_connection():
-    cfg = get_sql_config(config.SQL_CFG_FILE, config.SQL_CFG_SECTION)
-    conn_str = create_connection_string(cfg)
-    conn = pyodbc.connect(conn_str, autocommit=False)
-    return conn
+logger = getLogger(__name__)
 
 
 def _prepare_sql(sql_text: str, tokens: Dict[str, str]) -> str:
@@ -18,10 +16,120 @@ def _prepare_sql(sql_text: str, tokens: Dict[str, str]) -> str:
     for k, v in tokens.items():
         placeholder = "{{" + k + "}}"
         if placeholder in sql_text:
-            sql_text = sql_text.replace(placeholder, str(v))
+            sql_text = sql_text.replace(placeholder, "NULL" if v is None else str(v))
     return sql_text
 
 
+_DATE_TOKENS = ("START_DATE", "END_DATE", "SNAPSHOT_DT", "PREV_SNAPSHOT_DT")
+
+
+def _bind_value(token: str, value: Any) -> Any:
+    """Typed value for a bound token, so the server sees DATE parameters instead of NVARCHAR."""
+    if token in _DATE_TOKENS and isinstance(value, str):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _plan_cache_usage(cursor, batches: List[Batch]) -> Dict[str, Any]:
+    """
+    Look up the cached plans of the parameterized batches in sys.dm_exec_cached_plans.
+    A batch counts as reused when its prepared plan has been used more than once.
+    Needs VIEW SERVER STATE; without it the error is reported instead.
+    """
+    use_counts = []
+    try:
+        for batch in batches:
+            # The longest marker-free fragment identifies the statement in the cache
+            fragment = max(batch.bound_text.split("?"), key=len).strip()[:200]
+            cursor.execute(
+                "SELECT ISNULL(MAX(cp.usecounts), 0) "
+                "FROM sys.dm_exec_cached_plans cp "
+                "CROSS APPLY sys.dm_exec_sql_text(cp.plan_handle) st "
+                "WHERE cp.objtype = 'Prepared' AND CHARINDEX(?, st.text) > 0",
+                (fragment,),
+            )
+            use_counts.append(cursor.fetchone()[0])
+    except Exception as e:
+        return {"error": str(e)}
+    return {
+        "parameterized_batches": len(batches),
+        "reused_batches": sum(1 for c in use_counts if c > 1),
+        "use_counts": use_counts,
+    }
+
+
+def _rows_affected(cursor) -> int:
+    """
+    Sum the row counts of every statement of the batch just executed, moving through all
+    of its result sets (which also surfaces errors raised by statements after the first).
+    """
+    rows = 0
+    while True:
+        if cursor.rowcount is not None and cursor.rowcount > 0:
+            rows += cursor.rowcount
+        if not hasattr(cursor, "nextset") or not cursor.nextset():
+            return rows
+
+
+# Incremental fact loads: a watermark per (consumer task, staging table, date window), read
+# before the fact script and advanced in its transaction. Keying by window means a run only
+# marks as processed the changes it could see; changes outside its window wait for a run of theirs.
+# The watermark also records the snapshot that run wrote: it is the only snapshot known to hold
+# every line of the window, so the next run carries its unchanged lines forward from it.
+_WATERMARK_SQL = (
+    "SELECT source_table, last_staging_raw_id_sk, last_snapshot_dt FROM dbo.pipeline_watermark "
+    "WHERE consumer = ? AND start_date = ? AND end_date = ?"
+)
+_HIGH_WATER_SQL = (
+    "SELECT (SELECT COALESCE(MAX(staging_raw_id_sk), 0) FROM staging.Orders), "
+    "(SELECT COALESCE(MAX(staging_raw_id_sk), 0) FROM staging.OrderDetails)"
+)
+_UPDATE_WATERMARK_SQL = (
+    "UPDATE dbo.pipeline_watermark SET last_staging_raw_id_sk = ?, last_snapshot_dt = ?, last_execution_id = ?, "
+    "updated_dt = CURRENT_TIMESTAMP "
+    "WHERE consumer = ? AND source_table = ? AND start_date = ? AND end_date = ?"
+)
+_INSERT_WATERMARK_SQL = (
+    "INSERT INTO dbo.pipeline_watermark "
+    "(last_staging_raw_id_sk, last_snapshot_dt, last_execution_id, consumer, source_table, start_date, end_date) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_WATERMARK_SOURCES = (("staging.Orders", "WM_ORDERS", "HW_ORDERS"), ("staging.OrderDetails", "WM_ORDER_DETAILS", "HW_ORDER_DETAILS"))
+
+
+def _read_watermarks(cursor, consumer: str, tokens: Dict[str, Any]):
+    """
+    Fill the WM_* tokens and PREV_SNAPSHOT_DT from the consumer's watermark of this window, and
+    HW_* unless fixed by the caller. Without a recorded snapshot there is nothing to carry
+    forward from, so the watermarks stay at 0 and every order of the window is rebuilt.
+    """
+    window = (_bind_value("START_DATE", tokens["START_DATE"]), _bind_value("END_DATE", tokens["END_DATE"]))
+    cursor.execute(_WATERMARK_SQL, (consumer,) + window)
+    marks = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    snapshots = {marks.get(source_table, (0, None))[1] for source_table, _, _ in _WATERMARK_SOURCES}
+    if None not in snapshots and len(snapshots) == 1:
+        tokens["PREV_SNAPSHOT_DT"] = str(snapshots.pop())
+        for source_table, wm_token, _ in _WATERMARK_SOURCES:
+            tokens[wm_token] = marks[source_table][0]
+    if tokens["HW_ORDERS"] is None or tokens["HW_ORDER_DETAILS"] is None:
+        cursor.execute(_HIGH_WATER_SQL)
+        tokens["HW_ORDERS"], tokens["HW_ORDER_DETAILS"] = cursor.fetchone()
+
+
+def _advance_watermarks(cursor, consumers: Tuple[str, ...], tokens: Dict[str, Any], execution_id: str):
+    window = (_bind_value("START_DATE", tokens["START_DATE"]), _bind_value("END_DATE", tokens["END_DATE"]))
+    snapshot_dt = _bind_value("SNAPSHOT_DT", tokens["SNAPSHOT_DT"])
+    for consumer in consumers:
+        for source_table, _, hw_token in _WATERMARK_SOURCES:
+            values = (tokens[hw_token], snapshot_dt, execution_id, consumer, source_table) + window
+            cursor.execute(_UPDATE_WATERMARK_SQL, values)
+            if cursor.rowcount == 0:
+                cursor.execute(_INSERT_WATERMARK_SQL, values)
+
+
 def _get_script_name(task_name: str) -> str:
     """
     Get SQL script filename for a given task/table name.
@@ -38,158 +146,401 @@ def _get_script_name(task_name: str) -> str:
     return f"update_{task_name}.sql"
 
 
-def run_sql_script(script_name: str, params: Dict[str, Any], execution_id: str) -> Dict[str, Any]:
-    sql_path = os.path.join(config.QUERIES_DIR, script_name)
-    if not os.path.exists(sql_path):
-        return {"success": False, "error": f"SQL script not found: {sql_path}"}
+# Session options every script relies on, set once per run instead of in each script:
+# the row counts of the batches feed the task telemetry
+_SESSION_SQL = "SET NOCOUNT OFF;"
+
 
-    raw_sql = load_query(script_name, config.QUERIES_DIR)
-    if raw_sql is None:
-        with open(sql_path, "r", encoding="utf-8") as f:
-            raw_sql = f.read()
+def run_sql_script(
+    script_name: str,
+    params: Dict[str, Any],
+    execution_id: str,
+    pool: ConnectionPool = None,
+    param_mode: str = config.SQL_PARAM_MODE,
+    report_plan_cache: bool = config.REPORT_PLAN_CACHE,
+    load_mode: str = config.LOAD_MODE,
+    watermarks: Tuple[str, ...] = (),
+) -> Dict[str, Any]:
+    """
+    Run every batch of a registered SQL script in one transaction on a pooled connection,
+    after setting the session options (_SESSION_SQL) the scripts rely on.
+
+    param_mode "literal" splices the tokens into the SQL text; "bound" sends them as
+    parameters so the statement text (and its cached plan) is the same for every run.
+    load_mode fills {{LOAD_MODE}}; only the fact scripts read it. {{SNAPSHOT_DT}} is the
+    snapshot the fact scripts write (params["SNAPSHOT_DT"], default today). In incremental
+    mode the fact scripts also get {{WM_*}} and {{PREV_SNAPSHOT_DT}} from the watermark of
+    `watermarks[0]` for this window, and the final slice advances the watermarks of every
+    consumer in `watermarks` to {{HW_*}} and records {{SNAPSHOT_DT}} with them.
+
+    The result carries "metrics" (rows_affected, checkout_seconds, checkout_retries) and
+    "batches": wall time and rows affected of every GO batch.
+    """
+    if param_mode not in ("literal", "bound"):
+        return {"success": False, "error": f"Unknown param_mode: {param_mode}"}
+    if load_mode not in config.LOAD_MODES:
+        return {"success": False, "error": f"Unknown load_mode: {load_mode}"}
+
+    # Pre-split templates come from the in-memory registry; no file I/O or re-parsing per run
+    script = get_registry().get(script_name)
+    if script is None:
+        sql_path = os.path.join(config.QUERIES_DIR, script_name)
+        return {"success": False, "error": f"SQL script not found: {sql_path}"}
 
-    # Only tokenize START_DATE, END_DATE, and EXECUTION_ID
+    # Only tokenize START_DATE, END_DATE, EXECUTION_ID, LOAD_MODE, the fact snapshots, slice bounds and watermarks
     tokens = {
         "START_DATE": params.get("START_DATE", ""),
         "END_DATE": params.get("END_DATE", ""),
+        "SNAPSHOT_DT": params.get("SNAPSHOT_DT") or date.today().isoformat(),
+        "PREV_SNAPSHOT_DT": "",
         "EXECUTION_ID": execution_id,
+        "LOAD_MODE": load_mode,
+        "ORDER_ID_LO": params.get("ORDER_ID_LO"),
+        "ORDER_ID_HI": params.get("ORDER_ID_HI"),
+        "IS_FINAL_SLICE": params.get("IS_FINAL_SLICE", 1),
+        "HW_ORDERS": params.get("HW_ORDERS"),
+        "HW_ORDER_DETAILS": params.get("HW_ORDER_DETAILS"),
+        "WM_ORDERS": 0,
+        "WM_ORDER_DETAILS": 0,
     }
-    sql_to_run = _prepare_sql(raw_sql, tokens)
+    incremental = load_mode == "incremental" and bool(watermarks)
 
+    pool = pool or get_pool()
     conn = None
+    broken = False
+    metrics = {}
+    batch_metrics = []
     try:
-        conn = _open_connection()
+        conn = pool.acquire(stats=metrics)
         cursor = conn.cursor()
-        batches = []
-        current = []
-        for line in sql_to_run.splitlines():
-            if line.strip().upper() == "GO":
-                if current:
-                    batches.append("\n".join(current))
-                    current = []
+        cursor.execute(_SESSION_SQL)
+        if incremental:
+            _read_watermarks(cursor, watermarks[0], tokens)
+        bound_batches = []
+        for i, batch in enumerate(script.batches):
+            started = time.perf_counter()
+            rows = 0
+            if param_mode == "bound" and batch.bound_tokens:
+                values = [_bind_value(t, tokens.get(t, "")) for t in batch.bound_tokens]
+                for _ in range(batch.repeat):
+                    cursor.execute(batch.bound_text, values)
+                    rows += _rows_affected(cursor)
+                bound_batches.append(batch)
             else:
-                current.append(line)
-        if current:
-            batches.append("\n".join(current))
-
-        for batch in batches:
-            if not batch.strip():
-                continue
-            cursor.execute(batch)
+                sql_to_run = _prepare_sql(batch.text, tokens)
+                for _ in range(batch.repeat):
+                    cursor.execute(sql_to_run)
+                    rows += _rows_affected(cursor)
+            batch_metrics.append({"batch": i, "seconds": round(time.perf_counter() - started, 6), "rows": rows})
+        if incremental and tokens["IS_FINAL_SLICE"]:
+            # Same transaction as the load: a failed run leaves the watermark where it was
+            _advance_watermarks(cursor, watermarks, tokens, execution_id)
+        metrics["rows_affected"] = sum(b["rows"] for b in batch_metrics)
+        result = {"success": True, "metrics": metrics, "batches": batch_metrics}
+        if report_plan_cache and bound_batches:
+            result["plan_cache"] = _plan_cache_usage(cursor, bound_batches)
         conn.commit()
-        return {"success": True}
+        return result
     except Exception as e:
         if conn:
             try:
                 conn.rollback()
             except:
-                pass
-        return {"success": False, "error": str(e)}
+                broken = True
+        return {"success": False, "error": str(e), "metrics": metrics, "batches": batch_metrics}
     finally:
         if conn:
-            conn.close()
+            pool.release(conn, discard=broken)
+
+
+def _add_metrics(total: Dict[str, Any], result: Dict[str, Any]):
+    """Accumulate the run_sql_script metrics of one slice into the task totals."""
+    for key in ("rows_affected", "checkout_seconds", "checkout_retries"):
+        total[key] = total.get(key, 0) + result.get("metrics", {}).get(key, 0)
+
+
+_SLICE_PLAN_SQL = (
+    "SELECT MIN(TRY_CONVERT(INT, o.OrderID)), MAX(TRY_CONVERT(INT, o.OrderID)), "
+    "(SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.Orders), "
+    "(SELECT ISNULL(MAX(staging_raw_id_sk), 0) FROM staging.OrderDetails) "
+    "FROM staging.Orders o "
+    "WHERE o.OrderDate_dt >= ? AND o.OrderDate_dt <= ?"
+)
+_SLICE_PROGRESS_SQL = (
+    "SELECT slice_lo, slice_hi, hw_orders, hw_order_details "
+    "FROM dbo.pipeline_fact_progress "
+    "WHERE consumer = ? AND start_date = ? AND end_date = ? AND load_mode = ?"
+)
+
+
+def _order_slices(lo: int, hi: int, slice_size: int) -> List[Tuple[int, int]]:
+    """Split the OrderID range [lo, hi] into consecutive inclusive slices of `slice_size` ids."""
+    if slice_size < 1:
+        raise ValueError(f"slice_size must be >= 1, got {slice_size}")
+    return [(s, min(s + slice_size - 1, hi)) for s in range(lo, hi + 1, slice_size)]
+
+
+def run_fact_script_sliced(
+    task_name: str,
+    script_name: str,
+    params: Dict[str, Any],
+    execution_id: str,
+    pool: ConnectionPool = None,
+    slice_size: int = config.FACT_SLICE_SIZE,
+    **options,
+) -> Dict[str, Any]:
+    """
+    Run a fact script one OrderID slice at a time, each slice in its own transaction.
 
+    Every committed slice is recorded in dbo.pipeline_fact_progress, so rerunning the same
+    window and load mode skips the slices that already committed. The staging high-water
+    marks are fixed by the first slice and reused on resume, and every slice writes the same
+    snapshot date; the final slice advances the incremental watermark and clears the progress rows.
+    """
+    pool = pool or get_pool()
+    params = dict(params, SNAPSHOT_DT=params.get("SNAPSHOT_DT") or date.today().isoformat())
+    load_mode = options.get("load_mode", config.LOAD_MODE)
+    start_date = _bind_value("START_DATE", params.get("START_DATE", ""))
+    end_date = _bind_value("END_DATE", params.get("END_DATE", ""))
+    try:
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SLICE_PLAN_SQL, (start_date, end_date))
+            lo, hi, hw_orders, hw_order_details = cursor.fetchone()
+            cursor.execute(_SLICE_PROGRESS_SQL, (task_name, start_date, end_date, load_mode))
+            progress = cursor.fetchall()
+            conn.commit()
+    except Exception as e:
+        return {"success": False, "error": f"Could not plan fact slices: {e}"}
+
+    if lo is None:
+        # No numeric OrderIDs in the window: nothing worth slicing
+        return run_sql_script(script_name, params, execution_id, pool=pool, **options)
+
+    done = {(row[0], row[1]) for row in progress}
+    if progress:
+        hw_orders, hw_order_details = progress[0][2], progress[0][3]
+        logger.info(f"[{execution_id}] {task_name}: resuming after {len(done)} completed slices")
+
+    slices = _order_slices(lo, hi, slice_size)
+    skipped = 0
+    metrics = {}
+    for i, (slice_lo, slice_hi) in enumerate(slices):
+        if (slice_lo, slice_hi) in done:
+            skipped += 1
+            continue
+        slice_params = dict(
+            params,
+            ORDER_ID_LO=slice_lo,
+            ORDER_ID_HI=slice_hi,
+            IS_FINAL_SLICE=int(i == len(slices) - 1),
+            HW_ORDERS=hw_orders,
+            HW_ORDER_DETAILS=hw_order_details,
+        )
+        res = run_sql_script(script_name, slice_params, execution_id, pool=pool, **options)
+        _add_metrics(metrics, res)
+        if not res.get("success"):
+            res.update({"failed_slice": [slice_lo, slice_hi], "completed_slices": i, "slices": len(slices), "metrics": metrics})
+            return res
+    # Per-batch timings of every slice would swamp the result; the totals are kept
+    return {"success": True, "slices": len(slices), "skipped_slices": skipped, "slice_size": slice_size, "metrics": metrics}
+
+
+_SOURCE_FINGERPRINT_SQL = "SELECT row_count, content_checksum FROM staging.table_fingerprint WHERE table_name = ?"
+_REFRESH_STATE_SQL = (
+    "SELECT row_count, content_checksum, script_checksum FROM dbo.dim_refresh_state WHERE dimension = ?"
+)
+_SAVE_REFRESH_STATE_SQL = (
+    "MERGE dbo.dim_refresh_state AS tgt "
+    "USING (SELECT ? AS dimension, ? AS source_table, ? AS row_count, ? AS content_checksum, "
+    "? AS script_checksum, ? AS last_execution_id) AS src "
+    "ON tgt.dimension = src.dimension "
+    "WHEN MATCHED THEN UPDATE SET source_table = src.source_table, row_count = src.row_count, "
+    "content_checksum = src.content_checksum, script_checksum = src.script_checksum, "
+    "last_execution_id = src.last_execution_id, refreshed_dt = SYSDATETIME() "
+    "WHEN NOT MATCHED THEN INSERT (dimension, source_table, row_count, content_checksum, script_checksum, last_execution_id) "
+    "VALUES (src.dimension, src.source_table, src.row_count, src.content_checksum, src.script_checksum, src.last_execution_id);"
+)
+
+
+def run_dimension_script(
+    task_name: str,
+    params: Dict[str, Any],
+    execution_id: str,
+    pool: ConnectionPool = None,
+    skip_unchanged: bool = config.SKIP_UNCHANGED_DIMENSIONS,
+    **options,
+) -> Dict[str, Any]:
+    """
+    Run a dimension's SCD script unless neither its staging source nor the script changed
+    since its last successful refresh.
 
-def task_dim_categories(start_date: str, end_date: str, execution_id: str):
+    The source fingerprint (row count + row_hash checksum) is written by the loader into
+    staging.table_fingerprint, so the check is two key lookups. The fingerprint read before
+    the refresh is the one recorded after it: a load racing the refresh only causes another
+    refresh next time. A skipped dimension keeps the staging_raw_id_nk values of its last refresh.
+    """
+    script_name = _get_script_name(task_name)
+    if not skip_unchanged:
+        return run_sql_script(script_name, params, execution_id, pool=pool, **options)
+    script = get_registry().get(script_name)
+    if script is None:
+        return run_sql_script(script_name, params, execution_id, pool=pool, **options)
+
+    pool = pool or get_pool()
+    source_table = params["SRC_TABLE"]
+    try:
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SOURCE_FINGERPRINT_SQL, (source_table,))
+            source = cursor.fetchone()
+            cursor.execute(_REFRESH_STATE_SQL, (task_name,))
+            state = cursor.fetchone()
+            conn.commit()
+    except Exception as e:
+        # Without the bookkeeping tables the dimension is simply refreshed
+        logger.warning(f"[{execution_id}] {task_name}: change check unavailable ({e}); refreshing")
+        source = state = None
+
+    if source is not None and state is not None and tuple(state) == (source[0], source[1], script.digest):
+        logger.info(f"[{execution_id}] {task_name}: {source_table} unchanged since the last refresh; skipped")
+        return {"success": True, "skipped": True, "reason": "source unchanged"}
+
+    result = run_sql_script(script_name, params, execution_id, pool=pool, **options)
+    if result.get("success") and source is not None:
+        try:
+            with pool.connection() as conn:
+                conn.cursor().execute(_SAVE_REFRESH_STATE_SQL, (
+                    task_name, source_table, source[0], source[1], script.digest, execution_id))
+                conn.commit()
+        except Exception as e:
+            # The refresh itself committed; the next run just refreshes again
+            logger.warning(f"[{execution_id}] {task_name}: could not record the refresh state: {e}")
+    return result
+
+
+def task_dim_categories(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Categories",
         "DEST_TABLE": config.dim_tables["DimCategories"],
     }
-    script_name = _get_script_name("dim_categories")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_categories", params, execution_id, pool=pool, **options)
 
 
-def task_dim_customers(start_date: str, end_date: str, execution_id: str):
+def task_dim_customers(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Customers",
         "DEST_TABLE": config.dim_tables["DimCustomers"],
     }
-    script_name = _get_script_name("dim_customers")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_customers", params, execution_id, pool=pool, **options)
 
 
-def task_dim_employees(start_date: str, end_date: str, execution_id: str):
+def task_dim_employees(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Employees",
         "DEST_TABLE": config.dim_tables["DimEmployees"],
     }
-    script_name = _get_script_name("dim_employees")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_employees", params, execution_id, pool=pool, **options)
 
 
-def task_dim_products(start_date: str, end_date: str, execution_id: str):
+def task_dim_products(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Products",
         "DEST_TABLE": config.dim_tables["DimProducts"],
     }
-    script_name = _get_script_name("dim_products")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_products", params, execution_id, pool=pool, **options)
 
 
-def task_dim_region(start_date: str, end_date: str, execution_id: str):
+def task_dim_region(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Region",
         "DEST_TABLE": config.dim_tables["DimRegion"],
     }
-    script_name = _get_script_name("dim_region")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_region", params, execution_id, pool=pool, **options)
 
 
-def task_dim_shippers(start_date: str, end_date: str, execution_id: str):
+def task_dim_shippers(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Shippers",
         "DEST_TABLE": config.dim_tables["DimShippers"],
     }
-    script_name = _get_script_name("dim_shippers")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_shippers", params, execution_id, pool=pool, **options)
 
 
-def task_dim_suppliers(start_date: str, end_date: str, execution_id: str):
+def task_dim_suppliers(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Suppliers",
         "DEST_TABLE": config.dim_tables["DimSuppliers"],
     }
-    script_name = _get_script_name("dim_suppliers")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_suppliers", params, execution_id, pool=pool, **options)
 
 
-def task_dim_territories(start_date: str, end_date: str, execution_id: str):
+def task_dim_territories(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Territories",
         "DEST_TABLE": config.dim_tables["DimTerritories"],
     }
-    script_name = _get_script_name("dim_territories")
-    return run_sql_script(script_name, params, execution_id)
+    return run_dimension_script("dim_territories", params, execution_id, pool=pool, **options)
+
+
+def _run_python_resolver(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool,
+                         key_maps, slice_size: int, load_mode: str = config.LOAD_MODE, **options) -> Dict[str, Any]:
+    # Imported here so numpy stays optional for the SQL resolver
+    from pipeline_dimensional_data import key_resolver
+
+    if load_mode != "full" or slice_size:
+        return {"success": False, "error": "The python key resolver only supports full, unsliced fact loads"}
+    if not key_resolver.resolver_available():
+        return {"success": False, "error": "The python key resolver needs numpy"}
+    return key_resolver.build_facts(start_date, end_date, execution_id, pool=pool, key_maps=key_maps)
 
 
-def task_fact_orders(start_date: str, end_date: str, execution_id: str):
+def task_fact_orders(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None,
+                     slice_size: int = config.FACT_SLICE_SIZE, single_pass: bool = config.FACT_SINGLE_PASS,
+                     resolver: str = config.KEY_RESOLVER, key_maps=None, **options):
+    if resolver not in config.KEY_RESOLVERS:
+        return {"success": False, "error": f"Unknown key resolver: {resolver} (expected one of {config.KEY_RESOLVERS})"}
+    if resolver == "python":
+        # Writes FactOrders and fact_error in one go, like the single-pass script
+        return _run_python_resolver(start_date, end_date, execution_id, pool, key_maps, slice_size, **options)
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
         "SRC_TABLE": f"{config.SRC_SCHEMA}.Orders",
         "DEST_TABLE": config.FACT_TABLE,
     }
-    script_name = _get_script_name("fact_orders")
-    return run_sql_script(script_name, params, execution_id)
-
-
-def task_fact_error(start_date: str, end_date: str, execution_id: str):
+    # The single-pass script also writes fact_error, so it moves both watermarks
+    script_name = config.FACT_SINGLE_PASS_SCRIPT if single_pass else _get_script_name("fact_orders")
+    options["watermarks"] = ("fact_orders", "fact_error") if single_pass else ("fact_orders",)
+    if slice_size:
+        return run_fact_script_sliced("fact_orders", script_name, params, execution_id, pool=pool, slice_size=slice_size, **options)
+    return run_sql_script(script_name, params, execution_id, pool=pool, **options)
+
+
+def task_fact_error(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None,
+                    slice_size: int = config.FACT_SLICE_SIZE, single_pass: bool = config.FACT_SINGLE_PASS,
+                    resolver: str = config.KEY_RESOLVER, key_maps=None, **options):
+    if resolver == "python":
+        return {"success": True, "built_by": "fact_orders"}
+    if single_pass:
+        # Rows were written by task_fact_orders; the DAG only starts this task once that succeeded
+        return {"success": True, "built_by": "fact_orders"}
     params = {
         "START_DATE": start_date,
         "END_DATE": end_date,
@@ -197,4 +548,14 @@ def task_fact_error(start_date: str, end_date: str, execution_id: str):
         "DEST_TABLE": config.FACT_ERROR_TABLE,
     }
     script_name = _get_script_name("fact_error")
-    return run_sql_script(script_name, params, execution_id)
+    options["watermarks"] = ("fact_error",)
+    if slice_size:
+        return run_fact_script_sliced("fact_error", script_name, params, execution_id, pool=pool, slice_size=slice_size, **options)
+    return run_sql_script(script_name, params, execution_id, pool=pool, **options)
+
+
+def task_snapshot_retention(start_date: str, end_date: str, execution_id: str, pool: ConnectionPool = None, **options):
+    # The policy is over snapshot dates, not the run's order window
+    from pipeline_dimensional_data.snapshot_retention import prune_snapshots
+
+    return prune_snapshots(execution_id, pool=pool)
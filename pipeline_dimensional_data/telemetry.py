@@ -0,0 +1,157 @@
+"""
+Run telemetry: task/batch metrics exported as JSON lines, plus optional cProfile/tracemalloc reports.
+
+Every record written by MetricsWriter is one JSON object per line, e.g.
+    {"type": "task", "execution_id": ..., "task": "dim_customers", "wall_seconds": 1.8, "rows_affected": 91, ...}
+    {"type": "batch", "execution_id": ..., "task": "dim_customers", "batch": 3, "seconds": 0.4, "rows": 12}
+so a run can be loaded into pandas or a spreadsheet to see which task or batch dominates.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from logging import getLogger
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = getLogger(__name__)
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of the process in KiB (None where the platform does not report it)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@contextmanager
+def track() -> Iterator[Dict[str, Any]]:
+    """
+    Measure the enclosed block; the yielded dict is filled on exit with wall_seconds,
+    cpu_seconds and peak_rss_kb. CPU time is the whole process's, so with concurrent
+    tasks it includes the work of the other threads.
+    """
+    metrics: Dict[str, Any] = {}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield metrics
+    finally:
+        metrics["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+        metrics["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+        metrics["peak_rss_kb"] = peak_rss_kb()
+
+
+class MetricsWriter:
+    """Thread-safe appender of JSON-lines metric records."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        stamp = datetime.now().isoformat(timespec="milliseconds")
+        lines = "".join(json.dumps(dict(record, ts=stamp), default=str) + "\n" for record in records)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            # Telemetry must never fail the run it is measuring
+            logger.warning(f"Could not write metrics to {self.path}: {e}")
+
+
+def task_records(execution_id: str, task_name: str, result: Dict[str, Any], **fields) -> List[Dict[str, Any]]:
+    """The task record and its per-batch records for one task result."""
+    metrics = result.get("metrics", {})
+    task = {"type": "task", "execution_id": execution_id, "task": task_name, "success": bool(result.get("success"))}
+    task.update(fields)
+    task.update(metrics)
+    records = [task]
+    for batch in result.get("batches", []):
+        records.append(dict({"type": "batch", "execution_id": execution_id, "task": task_name}, **batch))
+    return records
+
+
+class _ThreadProfiler:
+    """cProfile for every thread started while it is active (worker threads included)."""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def _start_in_thread(self, *args):
+        # Called on the first profile event of a new thread: replace this hook with a real profiler
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def __enter__(self):
+        threading.setprofile(self._start_in_thread)
+        self._start_in_thread()
+        return self
+
+    def __exit__(self, *exc):
+        threading.setprofile(None)
+        # The profiler of this thread is the first one; the worker threads have finished by now
+        self.profiles[0].disable()
+
+    def stats(self, stream) -> pstats.Stats:
+        stats = pstats.Stats(self.profiles[0], stream=stream)
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+@contextmanager
+def profiled(prefix: str, top: int = 40):
+    """
+    Profile the enclosed block and write three reports next to `prefix`:
+        <prefix>.prof          pstats dump (snakeviz, `python -m pstats`)
+        <prefix>_cpu.txt       top functions by cumulative time, all threads merged
+        <prefix>_memory.txt    top allocation sites by size (tracemalloc)
+    """
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tracemalloc.start()
+    profiler = _ThreadProfiler()
+    try:
+        with profiler:
+            yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        report = io.StringIO()
+        stats = profiler.stats(report)
+        stats.dump_stats(f"{prefix}.prof")
+        stats.sort_stats("cumulative").print_stats(top)
+        with open(f"{prefix}_cpu.txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+
+        with open(f"{prefix}_memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {traced_peak / 1024:,.0f} KiB\n\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
+        logger.info(f"Profile written to {prefix}.prof, {prefix}_cpu.txt and {prefix}_memory.txt")
@@ -0,0 +1,74 @@
+import argparse
+
+# Import the logging configuration first: log.py sets up the file and console handlers
+import log  # noqa: F401
+from logging import getLogger
+
+from pipeline_dimensional_data import config
+from pipeline_dimensional_data.connection_pool import configure_pool
+from pipeline_dimensional_data.service import PipelineService, make_server
+
+logger = getLogger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Resident ORDER_DDS pipeline service: keeps imports, connections and SQL templates warm "
+                    "and runs the pipeline for requests sent with pipeline_client.py")
+    parser.add_argument("--host", default=config.SERVICE_HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT, help="Port to listen on")
+    parser.add_argument("--max_concurrent_runs", type=int, default=config.SERVICE_MAX_CONCURRENT_RUNS,
+                        help="Runs executing at the same time; further requests wait in FIFO order")
+    parser.add_argument("--max_queued_runs", type=int, default=config.SERVICE_MAX_QUEUED_RUNS,
+                        help="Requests allowed to wait; beyond this the service answers 503")
+    parser.add_argument("--script_check_interval", type=float, default=config.SERVICE_SCRIPT_CHECK_INTERVAL,
+                        help="Seconds between checks for edited SQL scripts (0: before every script lookup)")
+    parser.add_argument("--max_workers", type=int, default=config.MAX_WORKERS, help="Max number of tasks running concurrently per run")
+    parser.add_argument("--param_mode", choices=["bound", "literal"], default=config.SQL_PARAM_MODE,
+                        help="Send date/execution tokens as bound parameters (plan reuse) or as SQL literals")
+    parser.add_argument("--report_plan_cache", action="store_true", default=config.REPORT_PLAN_CACHE,
+                        help="Report plan-cache reuse per task (needs VIEW SERVER STATE)")
+    parser.add_argument("--slice_size", type=int, default=config.FACT_SLICE_SIZE,
+                        help="Load facts in OrderID slices of this size, committing (and resuming) per slice")
+    parser.add_argument("--fact_builder", choices=["single_pass", "two_pass"],
+                        default="single_pass" if config.FACT_SINGLE_PASS else "two_pass",
+                        help="Build FactOrders and fact_error in one pass over staging, or with one script each")
+    parser.add_argument("--resolver", choices=list(config.KEY_RESOLVERS), default=config.KEY_RESOLVER,
+                        help="Resolve fact surrogate keys with SQL joins or with in-memory key maps kept across runs (needs numpy)")
+    parser.add_argument("--refresh_all", action="store_true",
+                        help="Run every dimension script, even when its staging source is unchanged since its last refresh")
+    parser.add_argument("--pool_size", type=int, default=config.POOL_SIZE, help="Max number of pooled SQL Server connections")
+    parser.add_argument("--metrics_file", default=config.METRICS_FILE,
+                        help="Append task and batch metrics to this JSON-lines file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # Every task of every concurrently executing run needs its own connection
+    pool = configure_pool(size=max(args.pool_size, args.max_workers * args.max_concurrent_runs))
+    service = PipelineService(
+        pool=pool,
+        max_concurrent_runs=args.max_concurrent_runs,
+        max_queued_runs=args.max_queued_runs,
+        script_check_interval=args.script_check_interval,
+        max_workers=args.max_workers,
+        param_mode=args.param_mode,
+        report_plan_cache=args.report_plan_cache,
+        slice_size=args.slice_size,
+        single_pass=args.fact_builder == "single_pass",
+        resolver=args.resolver,
+        skip_unchanged=not args.refresh_all,
+        metrics_file=args.metrics_file,
+    )
+    server = make_server(service, args.host, args.port)
+    logger.info(f"Pipeline service listening on http://{args.host}:{server.server_address[1]} "
+                f"(max_concurrent_runs={args.max_concurrent_runs}, max_workers={args.max_workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down the pipeline service")
+    finally:
+        server.server_close()
+        pool.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Bulk-load backends for the staging loader.
+
+Rows are sent to SQL Server in batches through one of three backends:
+    executemany       - plain DB-API executemany (one round trip per row with pyodbc defaults)
+    fast_executemany  - pyodbc array binding: one round trip per batch
+    tvp               - one table-valued parameter per batch (needs the staging.<Table>_tvp
+                        types from infrastructure_initiation/staging_tvp_types_creation.sql)
+
+Batch sizes are tuned from the measured rows/sec of the previous batches. The module only
+needs a DB-API cursor, so a stand-in driver such as sqlite3 can exercise the batching.
+"""
+
+import time
+from itertools import islice
+
+BACKENDS = ("executemany", "fast_executemany", "tvp")
+DEFAULT_BACKEND = "fast_executemany"
+
+DEFAULT_BATCH_SIZE = 5000
+MIN_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 100000
+
+
+class BatchSizeTuner:
+    """
+    Hill-climbing batch size tuner.
+
+    After every batch the observed throughput is compared with the best one so far:
+    while it keeps up (within `tolerance`) the batch size doubles, once it drops the
+    tuner falls back to the best size seen and stays there.
+    """
+
+    def __init__(self, initial=DEFAULT_BATCH_SIZE, minimum=MIN_BATCH_SIZE, maximum=MAX_BATCH_SIZE, tolerance=0.95):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.batch_size = max(minimum, min(initial, maximum))
+        self.best_size = self.batch_size
+        self.best_rate = 0.0
+        self.settled = False
+
+    def record(self, rows, seconds):
+        """Feed the result of one batch and return the size to use for the next one."""
+        # A short final batch says nothing about the current size
+        if rows < self.batch_size or seconds <= 0:
+            return self.batch_size
+        rate = rows / seconds
+        if rate >= self.best_rate * self.tolerance:
+            if rate > self.best_rate:
+                self.best_rate, self.best_size = rate, self.batch_size
+            if not self.settled:
+                self.batch_size = min(self.batch_size * 2, self.maximum)
+        else:
+            self.batch_size = self.best_size
+            self.settled = True
+        return self.batch_size
+
+
+def _batches(rows, tuner):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, tuner.batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_batches(cursor, staging_table, columns, rows, backend=DEFAULT_BACKEND, tuner=None, tvp_type=None,
+                   input_sizes=None):
+    """
+    Insert `rows` (an iterable of tuples ordered like `columns`) into `staging_table`.
+    `input_sizes` ((sql_type, size, decimal_digits) per column, see catalog_cache) binds the
+    parameters with the table's own types instead of types guessed from the first row.
+
+    Returns a stats dict: rows, seconds, rows_per_sec, batches and the final batch_size.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown bulk-load backend: {backend} (expected one of {BACKENDS})")
+    tuner = tuner or BatchSizeTuner()
+    cols = ", ".join(columns)
+
+    if backend == "tvp":
+        schema, table = staging_table.split(".", 1)
+        type_name = tvp_type or f"{table}_tvp"
+        sql = f"INSERT INTO {staging_table} ({cols}) SELECT {cols} FROM ?"
+    else:
+        placeholders = ", ".join(["?"] * len(columns))
+        sql = f"INSERT INTO {staging_table} ({cols}) VALUES ({placeholders})"
+        # Array binding is a pyodbc cursor attribute; other drivers fall back to plain executemany
+        if hasattr(cursor, "fast_executemany"):
+            cursor.fast_executemany = backend == "fast_executemany"
+
+    total_rows = 0
+    total_seconds = 0.0
+    n_batches = 0
+    for batch in _batches(rows, tuner):
+        started = time.perf_counter()
+        try:
+            if backend == "tvp":
+                # pyodbc TVP: type name and schema first, then the rows
+                cursor.execute(sql, ([type_name, schema] + batch,))
+            else:
+                if input_sizes and hasattr(cursor, "setinputsizes"):
+                    cursor.setinputsizes(input_sizes)
+                cursor.executemany(sql, batch)
+        except Exception:
+            print("\n❌ SQL Insert Error!")
+            print("SQL:", sql)
+            print("Sample row:", batch[0] if batch else "NO DATA")
+            raise
+        elapsed = time.perf_counter() - started
+        total_rows += len(batch)
+        total_seconds += elapsed
+        n_batches += 1
+        tuner.record(len(batch), elapsed)
+
+    return {
+        "rows": total_rows,
+        "seconds": total_seconds,
+        "rows_per_sec": total_rows / total_seconds if total_seconds > 0 else 0.0,
+        "batches": n_batches,
+        "batch_size": tuner.batch_size,
+    }
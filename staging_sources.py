@@ -0,0 +1,221 @@
+"""
+Input sources of the staging loader: the Excel workbook, or CSV / Parquet exports.
+
+    raw_data_source.xlsx     one sheet per staging table (as before)
+    exports/                 a directory with one <Table>.csv or <Table>.parquet per staging table
+    exports/Orders.parquet   a single CSV/Parquet file loads the staging table it is named after
+
+Inputs are read with the column types of their staging table, taken from the CREATE TABLE
+statements in infrastructure_initiation/staging_raw_table_creation.sql, and only the staging
+columns are read. Every staging column is NVARCHAR, so CSV values arrive as their exact source
+text (no type inference, no "05" -> 5.0 -> "5" round trip). Parquet columns keep their own
+types and are rendered as text by the loader's column cleaning exactly like workbook cells, so
+a Parquet export of the workbook gives the same staging rows (and row fingerprints).
+Workbook cells keep the type they were entered with: a text cell such as "01581" stays text,
+whether the sheet is read whole or in streaming chunks (see excel_frame).
+
+pyarrow is optional: it reads CSV (multi-threaded) and is required for Parquet; without it
+CSV files go through pandas' C parser.
+"""
+
+import csv
+import os
+import re
+from functools import lru_cache
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+
+STAGING_DDL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "infrastructure_initiation", "staging_raw_table_creation.sql")
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+FILE_EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+# SQL Server type -> pandas dtype used when a CSV is parsed (date/time columns stay text:
+# the loader's date cleaning normalizes them)
+TEXT_TYPES = ("NVARCHAR", "VARCHAR", "NCHAR", "CHAR", "DATE", "DATETIME", "DATETIME2", "TIME")
+PANDAS_TYPES = {
+    "INT": "Int64", "BIGINT": "Int64", "SMALLINT": "Int64", "TINYINT": "Int64", "BIT": "boolean",
+    "FLOAT": "float64", "REAL": "float64", "DECIMAL": "float64", "NUMERIC": "float64", "MONEY": "float64",
+}
+
+_CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+staging\.(\w+)\s*\((.*?)\n\s*\);", re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r"^(\w+)\s+(\w+)(?:\s*\(\s*(\w+)\s*(?:,\s*\d+\s*)?\))?", re.IGNORECASE)
+
+
+def parse_staging_ddl(path=STAGING_DDL):
+    """
+    {table: [(column, sql_type, length), ...]} of every staging table in the DDL script, in
+    table order. Identity and computed columns are left out (the loader never writes them);
+    length is None for NVARCHAR(MAX) and types without one.
+    """
+    with open(path, encoding="utf-8") as f:
+        ddl = f.read()
+    schema = {}
+    for table, body in _CREATE_TABLE.findall(ddl):
+        columns = []
+        for line in body.splitlines():
+            line = line.split("--", 1)[0].strip().rstrip(",")
+            match = _COLUMN.match(line)
+            if not match or match.group(1).upper() in ("CONSTRAINT", "PRIMARY", "INDEX"):
+                continue
+            name, sql_type, length = match.groups()
+            if sql_type.upper() == "AS" or "IDENTITY" in line.upper():
+                continue
+            columns.append((name, sql_type.upper(), int(length) if length and length.isdigit() else None))
+        schema[table] = columns
+    return schema
+
+
+@lru_cache(maxsize=None)
+def staging_schema():
+    return parse_staging_ddl()
+
+
+def staging_columns(table, exclude=()):
+    """Writable staging columns of `table` (None for a table the DDL does not define)."""
+    columns = staging_schema().get(table)
+    if columns is None:
+        return None
+    return [name for name, _, _ in columns if name not in exclude]
+
+
+def _pandas_dtypes(table, columns):
+    types = {name: sql_type for name, sql_type, _ in staging_schema().get(table, [])}
+    return {col: str if types.get(col, "NVARCHAR") in TEXT_TYPES else PANDAS_TYPES.get(types[col], str)
+            for col in columns}
+
+
+def _read_csv_options(table, columns):
+    dtypes = _pandas_dtypes(table, columns)
+    # Text stays verbatim ("" included); only typed columns know an empty value as missing
+    return {"usecols": columns, "dtype": dtypes, "keep_default_na": False, "encoding": "utf-8-sig",
+            "na_values": {col: [""] for col, dtype in dtypes.items() if dtype is not str}}
+
+
+# Cell values as entered (object columns): pandas would otherwise parse a column of
+# numeric-looking text as numbers ("01581" -> 1581), judging by whatever rows it was given
+_EXCEL_OPTIONS = {"dtype": object}
+
+
+def excel_frame(columns, rows):
+    """
+    DataFrame of worksheet rows (cell values, None for an empty cell) built the way
+    StagingSource.read parses a whole sheet, so streamed chunks carry the same values.
+    """
+    rows = [["" if value is None else value for value in row] for row in rows]
+    return TextParser([list(columns)] + rows, header=0, **_EXCEL_OPTIONS).read()
+
+
+def _arrow_types(table, columns):
+    arrow = {"Int64": pa.int64(), "boolean": pa.bool_(), "float64": pa.float64()}
+    return {col: pa.string() if dtype is str else arrow[dtype] for col, dtype in _pandas_dtypes(table, columns).items()}
+
+
+def detect_format(path):
+    """"excel", "csv", "parquet" or "directory" (of per-table CSV/Parquet files)."""
+    if os.path.isdir(path):
+        return "directory"
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXCEL_EXTENSIONS:
+        return "excel"
+    if ext in FILE_EXTENSIONS:
+        return FILE_EXTENSIONS[ext]
+    raise ValueError(f"Unsupported input: {path} (expected {', '.join(EXCEL_EXTENSIONS + tuple(FILE_EXTENSIONS))} "
+                     "or a directory of per-table files)")
+
+
+def _table_files(path, fmt):
+    """{staging table: file} for a single CSV/Parquet file or a directory of them."""
+    known = {table.lower(): table for table in staging_schema()}
+    candidates = [path] if fmt != "directory" else sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if os.path.splitext(name)[1].lower() in FILE_EXTENSIONS
+    )
+    files = {}
+    for file_path in candidates:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        table = known.get(stem.lower())
+        if table is None:
+            print(f"⚠️ {file_path}: no staging table named '{stem}' — skipping.")
+            continue
+        if table in files:
+            raise ValueError(f"Two input files for staging.{table}: {files[table]} and {file_path}")
+        files[table] = file_path
+    return files
+
+
+class StagingSource:
+    """One loader input; picklable, so process-pool workers can rebuild it from the path."""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = detect_format(path)
+        self.files = {} if self.format == "excel" else _table_files(path, self.format)
+        self._excel = None
+        if any(FILE_EXTENSIONS[os.path.splitext(f)[1].lower()] == "parquet" for f in self.files.values()) and pa is None:
+            raise ValueError("Reading Parquet files needs pyarrow (pip install pyarrow)")
+
+    def __str__(self):
+        return {"excel": f"Excel file {self.path}", "directory": f"directory {self.path} ({len(self.files)} tables)"}.get(
+            self.format, f"{self.format.upper()} file {self.path}")
+
+    def __getstate__(self):
+        # An open workbook does not cross process boundaries; workers reopen it
+        return dict(self.__dict__, _excel=None)
+
+    def _excel_file(self):
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.path)
+        return self._excel
+
+    def table_names(self):
+        if self.format == "excel":
+            return self._excel_file().sheet_names
+        return list(self.files)
+
+    def _file_columns(self, file_path):
+        if file_path.lower().endswith(".csv"):
+            with open(file_path, newline="", encoding="utf-8-sig") as f:
+                return next(csv.reader(f), [])
+        return pa_parquet.read_schema(file_path).names
+
+    def _wanted(self, table, file_columns, exclude):
+        """Staging columns present in the input, in input order (all input columns for an unknown table)."""
+        wanted = staging_columns(table, exclude)
+        if wanted is None:
+            return [c for c in file_columns if c not in exclude]
+        return [c for c in file_columns if c in wanted]
+
+    def read(self, table, exclude=()):
+        """The staging columns of one table as a DataFrame (uncleaned)."""
+        if self.format == "excel":
+            wanted = staging_columns(table, exclude)
+            return self._excel_file().parse(table, usecols=None if wanted is None else (lambda col: col in wanted),
+                                            **_EXCEL_OPTIONS)
+        file_path = self.files[table]
+        columns = self._wanted(table, self._file_columns(file_path), exclude)
+        if file_path.lower().endswith(".csv"):
+            if pa is not None:
+                options = pa_csv.ConvertOptions(column_types=_arrow_types(table, columns), include_columns=columns)
+                return pa_csv.read_csv(file_path, convert_options=options).to_pandas()
+            return pd.read_csv(file_path, **_read_csv_options(table, columns))
+        return pa_parquet.read_table(file_path, columns=columns).to_pandas()
+
+    def iter_chunks(self, table, chunk_size, exclude=()):
+        """Yield DataFrames of at most `chunk_size` rows of one CSV/Parquet table (streaming mode)."""
+        file_path = self.files[table]
+        columns = self._wanted(table, self._file_columns(file_path), exclude)
+        if file_path.lower().endswith(".csv"):
+            yield from pd.read_csv(file_path, chunksize=chunk_size, **_read_csv_options(table, columns))
+            return
+        for batch in pa_parquet.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
@@ -0,0 +1,116 @@
+"""
+Local columnar cache of parsed and cleaned workbook sheets.
+
+Each workbook is cached under CACHE_DIR/<key>/ where the key is the SHA-256 of the file
+content, size and modification time plus the cleaning-rules version, so editing (or just
+touching) the workbook or changing the cleaning rules invalidates it. Sheets are stored as uncompressed Arrow IPC files and read back through
+a memory map. Entries are evicted least-recently-used once the cache exceeds its size cap.
+
+pyarrow is optional: without it the cache is disabled and sheets are parsed as before.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+
+CACHE_DIR = os.path.join(".cache", "workbooks")
+CACHE_MAX_BYTES = 1024 ** 3
+MANIFEST = "_sheets.json"
+
+
+def cache_available():
+    return pa is not None
+
+
+def cache_entry_dir(file_path, rules_version, cache_dir=CACHE_DIR):
+    """Directory of the cache entry for this workbook (content, size, mtime) and cleaning-rules version."""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(f"size={stat.st_size};mtime={stat.st_mtime_ns};rules={rules_version}".encode())
+    return os.path.join(cache_dir, digest.hexdigest()[:32])
+
+
+def _sheet_path(entry_dir, sheet_name):
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in sheet_name)
+    return os.path.join(entry_dir, f"{safe}.arrow")
+
+
+def cached_sheet_names(entry_dir):
+    """Sheet names of a complete cache entry (marking it as recently used), or None on a miss."""
+    manifest = os.path.join(entry_dir, MANIFEST)
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest, "r", encoding="utf-8") as f:
+        sheet_names = json.load(f)["sheets"]
+    if not all(os.path.exists(_sheet_path(entry_dir, sheet)) for sheet in sheet_names):
+        return None
+    now = time.time()
+    os.utime(entry_dir, (now, now))
+    return sheet_names
+
+
+def read_sheet(entry_dir, sheet_name):
+    """Read a cached sheet through a memory map; returns None if it is not cached."""
+    path = _sheet_path(entry_dir, sheet_name)
+    if pa is None or not os.path.exists(path):
+        return None
+    with pa.memory_map(path, "r") as source:
+        table = pa_ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def write_sheet(entry_dir, sheet_name, df):
+    """Write one cleaned sheet; safe to call from several processes for different sheets."""
+    if pa is None:
+        return
+    os.makedirs(entry_dir, exist_ok=True)
+    path = _sheet_path(entry_dir, sheet_name)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def finalize_entry(entry_dir, sheet_names, max_bytes=CACHE_MAX_BYTES):
+    """Mark an entry complete once every sheet is written, then enforce the size cap."""
+    if pa is None:
+        return
+    with open(os.path.join(entry_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"sheets": list(sheet_names), "created": time.time()}, f)
+    evict(os.path.dirname(entry_dir), max_bytes, keep=entry_dir)
+
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, keep=None):
+    """Delete least-recently-used entries until the cache fits in `max_bytes`."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = [e for e in os.scandir(cache_dir) if e.is_dir()]
+    sizes = {e.path: _dir_size(e.path) for e in entries}
+    total = sum(sizes.values())
+    evicted = []
+    for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        if keep and os.path.samefile(entry.path, keep):
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+        total -= sizes[entry.path]
+        evicted.append(entry.path)
+    return evicted
@@ -87,26 +87,6 @@ def extract_tables_db(cursor, *args):
     return results
 
 
-def extract_table_cols(cursor, table_name):
-    result = []
-    for row in cursor.columns(table=table_name):
-        result.append(row.column_name)
-    return result
-
-
-def find_primary_key(cursor, table_name, schema):
-    table_primary_key = cursor.primaryKeys(table_name, schema=schema)
-    columns = [column[0] for column in cursor.description]
-    results = []
-    for row in cursor.fetchall():
-        results.append(dict(zip(columns, row)))
-    try:
-        return results[0]
-    except:
-        pass
-    return results
-
-
 def load_query(query_name, input_dir):
     sql_script = None
     for script in os.listdir(input_dir):